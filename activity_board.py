@@ -0,0 +1,502 @@
+# activity_board.py
+
+import bisect
+import functools
+import time
+
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle, QStyleOptionViewItem, QApplication, QListView
+from PyQt5.QtGui import QColor, QFont, QPen, QFontMetrics, QIcon
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QTimer, pyqtSignal
+
+from instrumentation import metrics, span
+
+# Custom roles exposed by ActivityListModel
+ActivityIdRole = Qt.UserRole + 1
+CategoryRole = Qt.UserRole + 2
+CompletionRole = Qt.UserRole + 3
+ThumbnailRole = Qt.UserRole + 4
+MatchedTaskRole = Qt.UserRole + 5
+
+# Item sizes per view mode
+LIST_ROW_HEIGHT = 72
+TILE_SIZE = QSize(160, 205)
+ICON_SIZE = QSize(120, 120)
+
+PROGRESS_CHUNK_COLOR = QColor("#4CAF50") # Until a theme sets its own
+
+RELAYOUT_INTERVAL_MS = 50 # While the board's width keeps changing, relayout at most this often
+
+# SQLite's LOWER() only folds ASCII letters; match it so Python-side
+# insert positions agree with the ORDER BY of get_activities
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def _sql_lower(text):
+    # NULL sorts before any string in SQLite
+    return (0, "") if text is None else (1, text.translate(_ASCII_LOWER))
+
+
+@functools.total_ordering
+class _Descending:
+    # Reverses the order of any comparable value inside a sort key tuple
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+
+def board_sort_key(sort_by):
+    """Python sort key equivalent to the ORDER BY of get_activities for sort_by."""
+    if sort_by == "category":
+        return lambda row: (_sql_lower(row.category), _sql_lower(row.name), row.id)
+    if sort_by == "completion":
+        return lambda row: (-row.completion_percent, _sql_lower(row.name), row.id)
+    if sort_by in ("modified", "created"):
+        column = sort_by + "_at"
+        return lambda row: _Descending((getattr(row, column) or "", row.id))
+    if sort_by == "tasks":
+        return lambda row: (-row.task_count, _sql_lower(row.name), row.id)
+    if sort_by == "relevance":
+        return lambda row: (row.search_rank is not None, row.search_rank or 0.0, _sql_lower(row.name), row.id)
+    return lambda row: (_sql_lower(row.name), row.id)
+
+
+def _insertion_row(rows, row, sort_key):
+    # bisect_right by sort_key; bisect's key= argument needs Python 3.10
+    key = sort_key(row)
+    low, high = 0, len(rows)
+    while low < high:
+        middle = (low + high) // 2
+        if key < sort_key(rows[middle]):
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def _increasing_subsequence(values):
+    # Indices of one longest strictly increasing subsequence of values
+    tails = [] # Index of the smallest tail value of an increasing run of each length
+    tail_values = []
+    previous = [None] * len(values)
+    for index, value in enumerate(values):
+        length = bisect.bisect_left(tail_values, value)
+        if length:
+            previous[index] = tails[length - 1]
+        if length == len(tails):
+            tails.append(index)
+            tail_values.append(value)
+        else:
+            tails[length] = index
+            tail_values[length] = value
+    result = []
+    index = tails[-1] if tails else None
+    while index is not None:
+        result.append(index)
+        index = previous[index]
+    return result[::-1]
+
+
+class ActivityListModel(QAbstractListModel):
+    """ActivitySummary rows for the board.
+
+    Holds the pages of rows loaded so far from get_activities_page and
+    nothing else; the view asks for data only for the items it paints.
+    When more pages exist, fetchMore() emits fetch_more_requested for the
+    owner to load the next one.
+
+    Rows carry no image data. Painting a row whose pixmap isn't cached
+    queues its id, and once per event loop pass the queued ids go out in one
+    thumbnails_requested(ids, thumb_size); the owner answers with
+    provide_thumbnails(). The bytes are decoded through the shared image
+    loader into the pixmap cache and then dropped, and the row is repainted
+    when its decode finishes.
+    """
+    fetch_more_requested = pyqtSignal()
+    thumbnails_requested = pyqtSignal(list, int)
+
+    def __init__(self, pixmap_cache, image_loader, parent=None):
+        super().__init__(parent)
+        self.pixmap_cache = pixmap_cache
+        self.image_loader = image_loader
+        self._rows = []
+        self._row_of = {} # activity id -> row number
+        self._thumb_size = 100
+        self._failed = set() # Thumbnail keys that didn't decode; don't retry them
+        self._requested = set() # Thumbnail keys asked for and not yet provided
+        self._wanted = [] # Ids queued for the next thumbnails_requested
+        self._has_more = False
+        self._fetching = False
+
+    def set_activities(self, activities, thumb_size, has_more=False):
+        self.beginResetModel()
+        self._rows = list(activities)
+        self._row_of = {activity.id: row for row, activity in enumerate(self._rows)}
+        self._requested.clear() # Answers still in flight are ignored; painting asks again
+        self._thumb_size = thumb_size
+        self._has_more = has_more
+        self._fetching = False
+        self.endResetModel()
+
+    def append_activities(self, activities, has_more):
+        self._fetching = False
+        self._has_more = has_more
+        # Rows that moved into the loaded range meanwhile are already here
+        activities = [activity for activity in activities if activity.id not in self._row_of]
+        if not activities:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(activities) - 1)
+        self._rows.extend(activities)
+        self._reindex(first, len(self._rows) - 1)
+        self.endInsertRows()
+
+    def reconcile_activities(self, activities, has_more, same_row):
+        """Turns the current rows into activities with the fewest row signals.
+
+        Used when the model shows a snapshot and the real first page arrives:
+        unchanged rows (same_row(old, new) is true) only take the fresh row
+        object, changed ones emit dataChanged, and just the missing, new or
+        out-of-order rows are removed, inserted or moved. The longest run of
+        rows already in the right relative order stays put, so one activity
+        moving to the end is one move, and the view keeps its scroll position
+        instead of re-laying out the board as after a reset.
+        """
+        self._fetching = False
+        self._has_more = has_more
+        position_of = {activity.id: position for position, activity in enumerate(activities)}
+        for activity_id in [row.id for row in self._rows if row.id not in position_of]:
+            self.remove_activity(activity_id)
+        staying = _increasing_subsequence([position_of[row.id] for row in self._rows])
+        stay_ids = {self._rows[row].id for row in staying}
+        changed = []
+        for position, activity in enumerate(activities):
+            activity_id = activity.id
+            current = self._row_of.get(activity_id)
+            if activity_id not in stay_ids:
+                # Place it right after the row that precedes it in activities
+                target = self._row_of[activities[position - 1].id] + 1 if position else 0
+                if current is None:
+                    self.beginInsertRows(QModelIndex(), target, target)
+                    self._rows.insert(target, activity)
+                    self._reindex(target, len(self._rows) - 1)
+                    self.endInsertRows()
+                    continue
+                if current != target:
+                    # beginMoveRows takes the destination before the source row is removed
+                    self.beginMoveRows(QModelIndex(), current, current, QModelIndex(), target)
+                    landed = target - 1 if current < target else target
+                    self._rows.insert(landed, self._rows.pop(current))
+                    self._reindex(min(current, landed), max(current, landed))
+                    self.endMoveRows()
+                    current = landed
+            if not same_row(self._rows[current], activity):
+                changed.append(activity_id)
+            self._rows[current] = activity
+        for activity_id in changed:
+            index = self.index(self._row_of[activity_id])
+            self.dataChanged.emit(index, index)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return self._has_more and not parent.isValid()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent) and not self._fetching:
+            self._fetching = True # Until append_activities delivers the page
+            self.fetch_more_requested.emit()
+
+    def activity_at(self, row):
+        return self._rows[row]
+
+    def upsert_activity(self, activity, sort_key):
+        """Inserts, updates or moves one activity row in place.
+
+        sort_key must give the same order as the query that filled the model
+        (see board_sort_key). Unlike set_activities this keeps the selection
+        and scroll position. A row that sorts after everything loaded so far
+        is left to the page that will contain it.
+        """
+        old = self._row_of.get(activity.id)
+        if old is None:
+            new = _insertion_row(self._rows, activity, sort_key)
+            if self._has_more and new == len(self._rows):
+                return
+            self.beginInsertRows(QModelIndex(), new, new)
+            self._rows.insert(new, activity)
+            self._reindex(new, len(self._rows) - 1)
+            self.endInsertRows()
+            return
+        others = self._rows[:old] + self._rows[old + 1:]
+        new = _insertion_row(others, activity, sort_key)
+        if self._has_more and new == len(others):
+            self.remove_activity(activity.id) # Moved past the loaded pages
+            return
+        if new != old:
+            # beginMoveRows takes the destination before the source row is removed
+            self.beginMoveRows(QModelIndex(), old, old, QModelIndex(), new if new < old else new + 1)
+            self._rows = others
+            self._rows.insert(new, activity)
+            self._reindex(min(old, new), max(old, new))
+            self.endMoveRows()
+        else:
+            self._rows[old] = activity
+        index = self.index(new)
+        self.dataChanged.emit(index, index)
+
+    def remove_activity(self, activity_id):
+        row = self._row_of.get(activity_id)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        del self._row_of[activity_id]
+        self._reindex(row, len(self._rows) - 1)
+        self.endRemoveRows()
+
+    def _reindex(self, first, last):
+        for row in range(first, last + 1):
+            self._row_of[self._rows[row].id] = row
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        activity = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return activity.name
+        if role == ActivityIdRole:
+            return activity.id
+        if role == CategoryRole:
+            return activity.category
+        if role == CompletionRole:
+            return activity.completion_percent
+        if role == MatchedTaskRole:
+            return activity.matched_task
+        if role == ThumbnailRole:
+            return self._thumbnail(activity)
+        if role == Qt.ToolTipRole:
+            return f"{activity.name}\n{activity.completion_percent:.1f}% complete"
+        return None
+
+    def _thumbnail(self, activity):
+        # Returns the pixmap if it's ready, "missing"/"invalid", or None while decoding
+        if not activity.has_thumbnail:
+            return "missing"
+        key = (activity.id, activity.modified_at, self._thumb_size)
+        if key in self._failed:
+            return "invalid"
+        pixmap = self.pixmap_cache.get(*key)
+        if pixmap is None and key not in self._requested:
+            self._requested.add(key)
+            if not self._wanted:
+                QTimer.singleShot(0, self._request_thumbnails) # After the rest of this paint
+            self._wanted.append(activity.id)
+        return pixmap
+
+    def _request_thumbnails(self):
+        wanted, self._wanted = self._wanted, []
+        if wanted:
+            self.thumbnails_requested.emit(wanted, self._thumb_size)
+
+    def provide_thumbnails(self, activity_ids, thumb_size, thumbnails):
+        """Decodes the thumbnails ({id: bytes}) fetched for thumbnails_requested(activity_ids, thumb_size)."""
+        if thumb_size != self._thumb_size:
+            return
+        for activity_id in activity_ids:
+            row = self._row_of.get(activity_id)
+            if row is None:
+                continue
+            key = (activity_id, self._rows[row].modified_at, thumb_size)
+            if key not in self._requested:
+                continue
+            data = thumbnails.get(activity_id)
+            if data is None:
+                self._requested.discard(key) # Removed meanwhile; the row's next update says so
+                continue
+            self.image_loader.request(key, data, thumb_size, functools.partial(self._thumbnail_ready, key))
+
+    def _thumbnail_ready(self, key, pixmap):
+        self._requested.discard(key)
+        if pixmap is None:
+            self._failed.add(key)
+        else:
+            self.pixmap_cache.put(*key, pixmap)
+        row = self._row_of.get(key[0])
+        if row is None or key[2] != self._thumb_size:
+            return # The activity left the board, or the view mode changed
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [ThumbnailRole])
+
+
+class ActivityListView(QListView):
+    """QListView that reflows its items at a bounded rate while resized, and times its work.
+
+    Qt's Adjust resize mode only lays the items out again once no resize
+    event has come for 100 ms, so while a window edge is dragged the tiles
+    keep a stale grid. Here the resize mode stays Fixed and a width change
+    relays out at once, then at most every RELAYOUT_INTERVAL_MS (the last
+    width included) for as long as the resizing goes on. The positions are
+    recomputed from the uniform item size; no item is rebuilt.
+
+    board.layout runs from the reset to the first paint that follows it
+    (item layout happens in between); board.relayout covers each reflow
+    and board.paint each paint.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._reset_at = None
+        self._relayout_pending = False
+        self._relayout_timer = QTimer(self)
+        self._relayout_timer.setSingleShot(True)
+        self._relayout_timer.setInterval(RELAYOUT_INTERVAL_MS)
+        self._relayout_timer.timeout.connect(self._relayout_if_pending)
+
+    def reset(self):
+        super().reset()
+        self._reset_at = time.perf_counter()
+
+    def paintEvent(self, event):
+        if self._reset_at is not None:
+            metrics.record("board.layout", (time.perf_counter() - self._reset_at) * 1000)
+            self._reset_at = None
+        with span("board.paint"):
+            super().paintEvent(event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if event.size().width() == event.oldSize().width() or self.model() is None:
+            return # Rows and tiles only depend on the width
+        if self._relayout_timer.isActive():
+            self._relayout_pending = True
+        else:
+            self._relayout()
+
+    def _relayout(self):
+        self._relayout_pending = False
+        with span("board.relayout"):
+            self.doItemsLayout()
+        self._relayout_timer.start()
+
+    def _relayout_if_pending(self):
+        if self._relayout_pending:
+            self._relayout()
+
+
+class ActivityDelegate(QStyledItemDelegate):
+    """Paints board items for the list, tiles and icons modes."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.mode = "tiles"
+        self.show_task_matches = False
+        self.progress_color = PROGRESS_CHUNK_COLOR # Set by the theme
+
+    def sizeHint(self, option, index):
+        if self.mode == "list":
+            return QSize(300, LIST_ROW_HEIGHT) # ListMode stretches rows to the viewport width
+        return ICON_SIZE if self.mode == "icons" else TILE_SIZE
+
+    def paint(self, painter, option, index):
+        painter.save()
+        # Selection/hover background from the current style
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        opt.text = ""
+        opt.icon = QIcon()
+        style = opt.widget.style() if opt.widget else QApplication.style()
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, opt, painter, opt.widget)
+
+        rect = option.rect.adjusted(3, 3, -3, -3)
+        painter.setPen(QPen(option.palette.mid().color()))
+        painter.drawRect(rect)
+
+        if self.mode == "list":
+            self._paint_list_item(painter, option, index, rect.adjusted(5, 5, -5, -5))
+        else:
+            self._paint_tile_item(painter, option, index, rect.adjusted(5, 5, -5, -5))
+        painter.restore()
+
+    def _paint_list_item(self, painter, option, index, rect):
+        thumb_rect = QRect(rect.left(), rect.top() + (rect.height() - 50) // 2, 50, 50)
+        self._paint_thumbnail(painter, option, index, thumb_rect, "N/A", "?")
+
+        bar_rect = QRect(rect.right() - 100, rect.center().y() - 9, 100, 18)
+        self._paint_progress(painter, option, index.data(CompletionRole), bar_rect)
+
+        text_rect = QRect(thumb_rect.right() + 10, rect.top(), bar_rect.left() - thumb_rect.right() - 20, rect.height())
+        lines = [(index.data(Qt.DisplayRole), "bold"), (index.data(CategoryRole) or "No Category", "italic")]
+        matched = index.data(MatchedTaskRole)
+        if self.show_task_matches and matched:
+            lines.append((f"Task: {matched}", "small"))
+        self._paint_lines(painter, option, lines, text_rect, Qt.AlignLeft)
+
+    def _paint_tile_item(self, painter, option, index, rect):
+        if self.mode == "icons":
+            thumb_rect = QRect(rect.center().x() - 50, rect.center().y() - 50, 100, 100)
+            self._paint_thumbnail(painter, option, index, thumb_rect, "No Image", "Invalid Image")
+            return
+        thumb_rect = QRect(rect.center().x() - 50, rect.top(), 100, 100)
+        self._paint_thumbnail(painter, option, index, thumb_rect, "No Image", "Invalid Image")
+
+        bar_rect = QRect(rect.left() + 4, rect.bottom() - 15, rect.width() - 8, 15)
+        self._paint_progress(painter, option, index.data(CompletionRole), bar_rect)
+
+        text_rect = QRect(rect.left(), thumb_rect.bottom() + 4, rect.width(), bar_rect.top() - thumb_rect.bottom() - 6)
+        lines = [(index.data(Qt.DisplayRole), "bold"), (index.data(CategoryRole) or "No Category", "italic")]
+        matched = index.data(MatchedTaskRole)
+        if self.show_task_matches and matched:
+            lines.append((f"Task: {matched}", "small"))
+        self._paint_lines(painter, option, lines, text_rect, Qt.AlignHCenter)
+
+    def _paint_thumbnail(self, painter, option, index, rect, missing_text, invalid_text):
+        thumbnail = index.data(ThumbnailRole)
+        if thumbnail is None or isinstance(thumbnail, str):
+            # Placeholder while decoding, or text when there's no usable image
+            painter.setPen(QPen(QColor("lightgray"), 1, Qt.DashLine))
+            painter.drawRect(rect)
+            text = {"missing": missing_text, "invalid": invalid_text}.get(thumbnail, "...")
+            painter.setPen(option.palette.text().color())
+            painter.drawText(rect, Qt.AlignCenter, text)
+            return
+        target = QRect(0, 0, thumbnail.width(), thumbnail.height())
+        target.moveCenter(rect.center())
+        painter.drawPixmap(target, thumbnail)
+
+    def _paint_lines(self, painter, option, lines, rect, alignment):
+        y = rect.top()
+        for text, style in lines:
+            font = QFont(option.font)
+            if style == "bold":
+                font.setBold(True)
+            elif style == "italic":
+                font.setItalic(True)
+            else:
+                font.setPointSizeF(max(font.pointSizeF() - 1, 7))
+            metrics = QFontMetrics(font)
+            if y + metrics.height() > rect.bottom() + 1:
+                break
+            painter.setFont(font)
+            painter.setPen(option.palette.mid().color() if style == "small" else option.palette.text().color())
+            elided = metrics.elidedText(text, Qt.ElideRight, rect.width())
+            painter.drawText(QRect(rect.left(), y, rect.width(), metrics.height()), alignment | Qt.AlignVCenter, elided)
+            y += metrics.height() + 2
+
+    def _paint_progress(self, painter, option, completion_percent, rect):
+        painter.setPen(QPen(option.palette.mid().color()))
+        painter.setBrush(option.palette.base())
+        painter.drawRect(rect)
+        chunk = rect.adjusted(1, 1, 0, 0)
+        chunk.setWidth(int((rect.width() - 1) * completion_percent / 100.0))
+        if chunk.width() > 0:
+            painter.fillRect(chunk, self.progress_color)
+        painter.setBrush(Qt.NoBrush)
+        painter.setPen(option.palette.text().color())
+        painter.setFont(option.font)
+        painter.drawText(rect, Qt.AlignCenter, f"{completion_percent:.0f}%")
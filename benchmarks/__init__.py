@@ -0,0 +1,12 @@
+# benchmarks/__init__.py
+"""Benchmark suite for ProjectTracker.
+
+Generates a reproducible synthetic database through DatabaseManager and
+times the hot paths (board queries, completion lookups, the editor save and
+the board refresh, headless). Run from the repository root:
+
+    python -m benchmarks run --activities 5000 --output after.json
+    python -m benchmarks compare before.json after.json
+
+See python -m benchmarks --help for the dataset options.
+"""
@@ -0,0 +1,126 @@
+# benchmarks/__main__.py
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.compare import DEFAULT_THRESHOLD, compare, format_report, load_results
+from benchmarks.dataset import DatasetSpec, ensure_dataset
+from benchmarks.suite import Suite, run_commit_benchmarks, run_database_benchmarks, run_gui_benchmarks
+from board_snapshot import SNAPSHOT_SUFFIX
+from instrumentation import metrics
+
+
+def _image_size(text):
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height or width)
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(args):
+    spec = DatasetSpec(args.activities, args.tasks, args.categories, args.image_ratio,
+                       args.image_size, seed=args.seed)
+    db_path = os.path.abspath(args.db or os.path.join(
+        tempfile.gettempdir(), "projecttracker-benchmarks", f"bench_{spec.activities}x{spec.tasks_per_activity}_s{spec.seed}.db"))
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    print(f"Dataset: {db_path}")
+    if ensure_dataset(db_path, spec):
+        print("  generated")
+
+    # Benchmarks that write (the editor save) run on a copy so the dataset stays reusable
+    run_path = db_path + ".run"
+    shutil.copyfile(db_path, run_path)
+    suite = Suite(args.repeat, args.warmup, args.filter)
+    try:
+        run_database_benchmarks(suite, run_path)
+        run_commit_benchmarks(suite, run_path)
+        if not args.no_gui:
+            run_gui_benchmarks(suite, run_path)
+    finally:
+        for suffix in ("", "-wal", "-shm", SNAPSHOT_SUFFIX):
+            if os.path.exists(run_path + suffix):
+                os.remove(run_path + suffix)
+
+    output = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "dataset": spec.to_dict(),
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+        },
+        "results": suite.results,
+        # Memory held by board rows and thumbnail fetches (tracemalloc)
+        "memory": suite.memory,
+        # Phase breakdown (board.query, board.layout, db.*, ...) recorded during the run
+        "spans": metrics.snapshot(),
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"Results written to {args.output}")
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+def run_compare(args):
+    rows = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+    print(format_report(rows))
+    regressions = [row for row in rows if row[4] == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="ProjectTracker benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Generate (or reuse) a dataset and time the hot paths")
+    run_parser.add_argument("--activities", type=int, default=1000)
+    run_parser.add_argument("--tasks", type=int, default=20, help="Tasks per activity")
+    run_parser.add_argument("--categories", type=int, default=12, help="Distinct categories")
+    run_parser.add_argument("--image-ratio", type=float, default=0.5, help="Share of activities with an image")
+    run_parser.add_argument("--image-size", type=_image_size, default=(800, 600), help="WIDTHxHEIGHT of generated images")
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    run_parser.add_argument("--warmup", type=int, default=1, help="Untimed runs before timing")
+    run_parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    run_parser.add_argument("--no-gui", action="store_true", help="Skip the headless widget benchmarks")
+    run_parser.add_argument("--db", help="Dataset path (default: a temp file named after the dataset)")
+    run_parser.add_argument("--output", "-o", help="Write JSON results here instead of stdout")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions between two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="Median slowdown that counts as a regression (default 0.10)")
+    compare_parser.set_defaults(func=run_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+# benchmarks/compare.py
+
+import json
+
+DEFAULT_THRESHOLD = 0.10 # Median slowdown (as a fraction) that counts as a regression
+NOISE_FLOOR_MS = 0.05 # Differences below this are timer noise, whatever the ratio
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Compares the medians of two result files.
+
+    Returns [(name, baseline_ms, current_ms, change, status)], where change is
+    the relative difference and status one of "regression", "improvement",
+    "ok", "new" or "removed".
+    """
+    old, new = baseline["results"], current["results"]
+    rows = []
+    for name in sorted(set(old) | set(new)):
+        if name not in new:
+            rows.append((name, old[name]["median_ms"], None, None, "removed"))
+            continue
+        if name not in old:
+            rows.append((name, None, new[name]["median_ms"], None, "new"))
+            continue
+        before, after = old[name]["median_ms"], new[name]["median_ms"]
+        change = (after - before) / before if before else 0.0
+        status = "ok"
+        if abs(after - before) >= NOISE_FLOOR_MS:
+            if change > threshold:
+                status = "regression"
+            elif change < -threshold:
+                status = "improvement"
+        rows.append((name, before, after, change, status))
+    return rows
+
+
+def format_report(rows):
+    lines = [f"{'benchmark':<48} {'before ms':>11} {'after ms':>11} {'change':>8}  status"]
+    for name, before, after, change, status in rows:
+        before_text = f"{before:.3f}" if before is not None else "-"
+        after_text = f"{after:.3f}" if after is not None else "-"
+        change_text = f"{change:+.1%}" if change is not None else "-"
+        lines.append(f"{name:<48} {before_text:>11} {after_text:>11} {change_text:>8}  {status}")
+    return "\n".join(lines)
@@ -0,0 +1,102 @@
+# benchmarks/dataset.py
+
+import json
+import os
+import random
+
+from database_manager import DatabaseManager, TaskChangeSet
+
+WORDS = ("alpha", "bravo", "cloud", "delta", "engine", "forest", "garden", "harbor", "island", "jigsaw",
+         "kernel", "ladder", "marble", "nebula", "orbit", "pixel", "quartz", "rocket", "signal", "timber",
+         "uplink", "vector", "willow", "xenon", "yonder", "zephyr", "infrastructure", "migration", "release")
+
+
+class DatasetSpec:
+    """Parameters of a synthetic dataset; the same spec and seed give the same database."""
+    def __init__(self, activities=1000, tasks_per_activity=20, categories=12, image_ratio=0.5,
+                 image_size=(800, 600), image_variants=8, seed=1):
+        self.activities = activities
+        self.tasks_per_activity = tasks_per_activity
+        self.categories = categories
+        self.image_ratio = image_ratio # Share of activities that get an image
+        self.image_size = tuple(image_size)
+        self.image_variants = image_variants # Distinct images, reused round-robin to keep generation fast
+        self.seed = seed
+
+    def to_dict(self):
+        return {
+            "activities": self.activities,
+            "tasks_per_activity": self.tasks_per_activity,
+            "categories": self.categories,
+            "image_ratio": self.image_ratio,
+            "image_size": list(self.image_size),
+            "image_variants": self.image_variants,
+            "seed": self.seed,
+        }
+
+
+def _make_images(spec, rng):
+    # Random noise compresses about as badly as screenshots do, so blob sizes stay realistic
+    from PyQt5.QtCore import QBuffer, QByteArray, QIODevice
+    from PyQt5.QtGui import QImage
+    from progress import make_thumbnails
+    width, height = spec.image_size
+    images = []
+    for _ in range(spec.image_variants if spec.image_ratio > 0 and width and height else 0):
+        pixels = rng.randbytes(width * height * 3)
+        image = QImage(pixels, width, height, width * 3, QImage.Format_RGB888)
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        image.save(buffer, "PNG")
+        buffer.close()
+        image_data = bytes(data)
+        images.append((image_data, make_thumbnails(image_data)))
+    return images
+
+
+def generate(db_path, spec):
+    """Creates a fresh database at db_path filled according to spec."""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    rng = random.Random(spec.seed)
+    categories = [f"{rng.choice(WORDS).title()} {index}" for index in range(spec.categories)]
+    images = _make_images(spec, rng)
+
+    db = DatabaseManager(db_path) # An absolute path is used as is
+    # Durability doesn't matter while filling a throwaway database
+    db.conn.execute("PRAGMA synchronous = OFF")
+    for index in range(spec.activities):
+        name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {index:06d}"
+        category = rng.choice(categories) if categories else None
+        tasks = [f"{rng.choice(WORDS)} {rng.choice(WORDS)} step {n}" for n in range(spec.tasks_per_activity)]
+        image_data, thumbnails = (None, None)
+        if images and rng.random() < spec.image_ratio:
+            image_data, thumbnails = images[index % len(images)]
+        activity_id, error = db.create_activity(name, category, tasks, image_data, thumbnails)
+        if error:
+            raise RuntimeError(f"Could not create benchmark activity: {error}")
+        # Complete a random share of the tasks so completion sorts have spread
+        done = [(task_id, description, True) for task_id, description, _ in db.get_tasks(activity_id)
+                if rng.random() < rng.random()]
+        if done:
+            db.apply_task_changes(activity_id, TaskChangeSet(updates=done))
+    db.close()
+    with open(db_path + ".json", "w") as f:
+        json.dump(spec.to_dict(), f)
+
+
+def ensure_dataset(db_path, spec):
+    """Reuses db_path if it was generated from the same spec, otherwise (re)generates it.
+
+    Returns True if the database was generated.
+    """
+    try:
+        with open(db_path + ".json") as f:
+            if json.load(f) == spec.to_dict() and os.path.exists(db_path):
+                return False
+    except (OSError, ValueError):
+        pass
+    generate(db_path, spec)
+    return True
@@ -0,0 +1,267 @@
+# benchmarks/suite.py
+
+import contextlib
+import os
+import random
+import time
+import tracemalloc
+
+from connection_profiles import PROFILES
+from database_manager import DatabaseManager
+from benchmarks.timing import measure
+
+SORTS = ("name", "category", "completion", "modified", "created", "tasks", "relevance")
+COMPLETION_SAMPLE = 200 # get_activity_completion calls per timed run
+EDITOR_TOGGLES = 10 # Tasks ticked/unticked per timed editor save
+COMMIT_SAMPLE = 50 # Single-task commits per timed run of commit[profile]
+
+
+class Suite:
+    """Collects named timings; filter (a substring) limits which benchmarks run."""
+    def __init__(self, repeat=5, warmup=1, name_filter=None, verbose=True):
+        self.repeat = repeat
+        self.warmup = warmup
+        self.name_filter = name_filter
+        self.verbose = verbose
+        self.results = {}
+        self.memory = {}
+
+    def wants(self, name):
+        return not self.name_filter or self.name_filter in name
+
+    def run(self, name, func, setup=None):
+        if not self.wants(name):
+            return
+        stats = measure(func, self.repeat, self.warmup, setup)
+        self.results[name] = stats
+        if self.verbose:
+            print(f"  {name:<56} median {stats['median_ms']:>10.3f} ms")
+
+    def run_memory(self, name, func):
+        """Records the memory still allocated by what func returns (a list), per item."""
+        if not self.wants(name):
+            return
+        tracemalloc.start()
+        try:
+            items = func()
+            allocated = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        self.memory[name] = {"items": len(items), "bytes": allocated,
+                             "bytes_per_item": round(allocated / len(items), 1) if items else None}
+        if self.verbose:
+            print(f"  {name:<56} {allocated / 1024:>10.1f} KiB, {self.memory[name]['bytes_per_item']} B/item")
+
+
+def _search_terms(db):
+    # One term per kind of match, taken from the data itself
+    category = db.conn.execute("SELECT category FROM activities WHERE category IS NOT NULL LIMIT 1").fetchone()
+    return {
+        "all": "",
+        "category": category[0].split()[0] if category else "alpha",
+        "name_prefix": "infra",
+        "task_text": "step",
+        "no_match": "qqqqzz",
+    }
+
+
+def run_database_benchmarks(suite, db_path):
+    """Board queries and completion lookups straight through DatabaseManager."""
+    db = DatabaseManager(db_path)
+    try:
+        for label, term in _search_terms(db).items():
+            for sort_by in SORTS:
+                suite.run(f"get_activities[{sort_by}, {label}]",
+                          lambda: db.get_activities(term, sort_by, "large"))
+                suite.run(f"get_activities_page[{sort_by}, {label}]",
+                          lambda: db.get_activities_page(term, sort_by, "large"))
+
+        # What the board holds per loaded activity, and the thumbnails fetched to paint one page
+        suite.run_memory("board_rows[large]", lambda: db.get_activities("", "name", "large"))
+        page, _ = db.get_activities_page("", "name", "large")
+        suite.run_memory("board_thumbnails[large, page]",
+                         lambda: list(db.get_thumbnails([row.id for row in page if row.has_thumbnail], "large").values()))
+
+        ids = [row[0] for row in db.conn.execute("SELECT id FROM activities").fetchall()]
+        sample = random.Random(0).sample(ids, min(COMPLETION_SAMPLE, len(ids)))
+        suite.run(f"get_activity_completion[x{len(sample)}]",
+                  lambda: [db.get_activity_completion(activity_id) for activity_id in sample])
+    finally:
+        db.close()
+
+
+def run_commit_benchmarks(suite, db_path):
+    """Small write transactions under each connection profile (writes to db_path)."""
+    for profile in PROFILES:
+        name = f"commit[{profile}, x{COMMIT_SAMPLE}]"
+        if not suite.wants(name):
+            continue
+        db = DatabaseManager(db_path, profile) # Switches the file's journal mode
+        try:
+            row = db.conn.execute("SELECT id, description, completed FROM tasks LIMIT 1").fetchone()
+            if row is None:
+                continue
+            task_id, description, completed = row
+            # Ticking back and forth leaves the task as it was after an even count
+            suite.run(name, lambda: [db.update_task(task_id, description, (completed + n) % 2 == 1)
+                                     for n in range(1, COMMIT_SAMPLE + 1)])
+        finally:
+            db.close()
+
+
+def _wait_until(app, predicate, timeout=60.0):
+    from PyQt5.QtCore import QEventLoop, QTimer
+    # The timer guarantees WaitForMoreEvents wakes up even if nothing else arrives
+    ticker = QTimer()
+    ticker.start(20)
+    deadline = time.perf_counter() + timeout
+    try:
+        while not predicate():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("Benchmark step did not finish in time")
+            app.processEvents(QEventLoop.AllEvents | QEventLoop.WaitForMoreEvents)
+    finally:
+        ticker.stop()
+
+
+@contextlib.contextmanager
+def _silent_message_boxes(progress):
+    # The editor confirms saves with a modal box; nobody is there to close it
+    original = progress.QMessageBox.information
+    progress.QMessageBox.information = staticmethod(lambda *args, **kwargs: progress.QMessageBox.Ok)
+    try:
+        yield
+    finally:
+        progress.QMessageBox.information = original
+
+
+def run_gui_benchmarks(suite, db_path):
+    """Board refresh and editor save through the real widgets, headless."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(["benchmarks"])
+    import progress
+    from db_worker import AsyncDatabaseManager
+
+    db = AsyncDatabaseManager(db_path)
+    display = progress.ActivityDisplayWidget(db)
+    display.resize(1200, 800)
+    display.show()
+    _wait_until(app, lambda: display.model.rowCount() > 0)
+
+    def refresh():
+        # From the request to a painted first page
+        reset = []
+        display.model.modelReset.connect(lambda: reset.append(True))
+        display.update_display()
+        _wait_until(app, lambda: reset)
+        display.model.modelReset.disconnect()
+        app.processEvents()
+        display.view.viewport().repaint()
+
+    for mode in ("list", "tiles"):
+        display.set_view_mode(mode)
+        for sort_by in ("name", "completion", "modified"):
+            display.set_sort_by(sort_by)
+            suite.run(f"update_display[{mode}, {sort_by}]", refresh)
+
+    # One step of a dragged window edge: the tiles reflow to a new width and repaint,
+    # with every page loaded. Each run waits out the relayout throttle first.
+    from PyQt5.QtCore import QModelIndex
+    from activity_board import RELAYOUT_INTERVAL_MS
+    refresh() # Settles the queries of the loop above, which --filter may have skipped
+    while display.model.canFetchMore(QModelIndex()):
+        loaded = display.model.rowCount()
+        display.model.fetchMore(QModelIndex())
+        _wait_until(app, lambda: display.model.rowCount() > loaded or not display.model.canFetchMore(QModelIndex()))
+    widths = iter(range(10 ** 6))
+
+    def reflow():
+        display.resize(1000 + 40 * (next(widths) % 6), 800)
+        display.view.viewport().repaint()
+
+    def throttle_passed():
+        time.sleep(RELAYOUT_INTERVAL_MS * 1.5 / 1000)
+        app.processEvents()
+
+    suite.run(f"board_reflow[tiles, {display.model.rowCount()} rows]", reflow, setup=throttle_passed)
+
+    # Switching between light and dark with the same board loaded, up to the repaint
+    from theme_manager import ThemeManager
+    themes = ThemeManager()
+    toggles = iter(range(10 ** 6))
+
+    def toggle_theme():
+        theme = themes.apply_theme(app, ("dark", "light")[next(toggles) % 2])
+        display.apply_theme(theme)
+        app.processEvents() # Delivers the palette change to the widgets
+        display.view.viewport().repaint()
+
+    suite.run(f"theme_toggle[tiles, {display.model.rowCount()} rows]", toggle_theme)
+    display.apply_theme(themes.apply_theme(app, "light"))
+
+    # From constructing the board to its first rows painted, with and without a saved snapshot
+    from board_snapshot import snapshot_path
+    boards = []
+
+    def discard_board(remove_snapshot=False):
+        while boards:
+            board = boards.pop()
+            board.close()
+            board.deleteLater()
+        if remove_snapshot and os.path.exists(snapshot_path(db.db_path)):
+            os.remove(snapshot_path(db.db_path))
+        app.processEvents()
+        # Start from an idle worker: thumbnail fetches of the last board would queue ahead
+        db.submit(lambda database: None).result()
+
+    def cold_start():
+        board = progress.ActivityDisplayWidget(db)
+        board.resize(1200, 800)
+        board.show()
+        _wait_until(app, lambda: board.model.rowCount() > 0)
+        board.view.viewport().repaint()
+        boards.append(board)
+
+    suite.run("cold_start[query]", cold_start, setup=lambda: discard_board(remove_snapshot=True))
+    display.save_snapshot()
+    db.submit(lambda database: None).result() # The snapshot is written once this runs
+    suite.run("cold_start[snapshot]", cold_start, setup=discard_board)
+    discard_board(remove_snapshot=True)
+
+    activity_id = db.submit(lambda database: database.conn.execute(
+        "SELECT id FROM activities ORDER BY task_count DESC LIMIT 1").fetchone()[0]).result()
+    editor = {}
+
+    def open_editor():
+        if "dialog" in editor:
+            editor.pop("dialog").deleteLater()
+        dialog = progress.ActivityEditorDialog(activity_id, db)
+        _wait_until(app, dialog.button_box.isEnabled)
+        editor["dialog"] = dialog
+
+    def prepare_save():
+        open_editor()
+        model = editor["dialog"].task_model
+        for row in range(min(EDITOR_TOGGLES, model.rowCount())):
+            index = model.index(row, 0)
+            checked = model.data(index, Qt.CheckStateRole) == Qt.Checked
+            model.setData(index, Qt.Unchecked if checked else Qt.Checked, Qt.CheckStateRole)
+
+    def save():
+        dialog = editor.pop("dialog")
+        saved = []
+        dialog.activity_saved.connect(saved.append)
+        dialog.save_changes()
+        _wait_until(app, lambda: saved)
+        dialog.deleteLater()
+
+    suite.run("ActivityEditorDialog.open", open_editor)
+    with _silent_message_boxes(progress):
+        suite.run(f"ActivityEditorDialog.save_changes[{EDITOR_TOGGLES} tasks]", save, setup=prepare_save)
+
+    display.close()
+    display.deleteLater()
+    db.close()
+    app.processEvents()
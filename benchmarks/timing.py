@@ -0,0 +1,33 @@
+# benchmarks/timing.py
+
+import statistics
+import time
+
+
+def summarize(samples_ms):
+    """Summary statistics (milliseconds) for a list of timings."""
+    ordered = sorted(samples_ms)
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0], 4),
+        "median_ms": round(statistics.median(ordered), 4),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "max_ms": round(ordered[-1], 4),
+    }
+
+
+def measure(func, repeat=5, warmup=1, setup=None):
+    """Times func() repeat times after warmup untimed calls; returns summarize() of the runs.
+
+    setup, if given, runs untimed before every call (e.g. to reset state).
+    """
+    samples = []
+    for run in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        if run >= warmup:
+            samples.append(elapsed)
+    return summarize(samples)
@@ -0,0 +1,138 @@
+# board_snapshot.py
+
+import contextlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+from database_manager import ActivitySummary
+from instrumentation import get_logger
+
+logger = get_logger("snapshot")
+
+# A snapshot is the first page of the board as it was at exit, so the next
+# start can paint it before the database has answered. Layout:
+#   header   MAGIC, format version, record count, length of the JSON meta
+#   meta     {"query": [search term, sort, thumbnail], "next_page": keyset or null}
+#   records  id, task_count, done_count, completion_percent, then the text
+#            columns and the thumbnail, each length-prefixed (-1 for NULL)
+# Board rows don't carry thumbnails, so they are written from a separate
+# {id: bytes} and read back into one, for the first paint to use.
+MAGIC = b"PTBOARD\0"
+FORMAT_VERSION = 2
+SNAPSHOT_SUFFIX = ".board"
+
+_HEADER = struct.Struct("<8sHII")
+_FIXED = struct.Struct("<qiid")
+_LENGTH = struct.Struct("<i")
+TEXT_COLUMNS = ("name", "category", "created_at", "modified_at")
+# Every column a board row is compared on when reconciling with the database
+COLUMNS = ("id", "task_count", "done_count", "completion_percent") + TEXT_COLUMNS + ("has_thumbnail",)
+
+
+def snapshot_path(db_path):
+    return db_path + SNAPSHOT_SUFFIX
+
+
+def row_values(row):
+    """The snapshot columns of an ActivitySummary, for comparisons."""
+    return tuple(getattr(row, column) for column in COLUMNS)
+
+
+def write_snapshot(path, query, rows, next_page, thumbnails):
+    """Writes rows (board rows of query) and their thumbnails atomically.
+
+    thumbnails maps activity ids to thumbnail bytes. Returns an error string
+    or None.
+    """
+    meta = json.dumps({"query": list(query), "next_page": next_page}).encode("utf-8")
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, len(rows), len(meta)), meta]
+    for row in rows:
+        parts.append(_FIXED.pack(row.id, row.task_count, row.done_count, row.completion_percent))
+        for column in TEXT_COLUMNS:
+            value = getattr(row, column)
+            _pack_bytes(parts, None if value is None else value.encode("utf-8"))
+        _pack_bytes(parts, thumbnails.get(row.id))
+    temp_path = None
+    try:
+        # A temporary file of its own: other instances on the same database may be saving too
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".",
+                                         suffix=".tmp", delete=False) as f:
+            temp_path = f.name
+            f.write(b"".join(parts))
+        os.replace(temp_path, path) # Never leaves a half-written snapshot behind
+    except OSError as e:
+        logger.error("Could not write board snapshot %s: %s", path, e)
+        if temp_path:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+        return f"Could not write board snapshot: {e}"
+    return None
+
+
+def _pack_bytes(parts, data):
+    if data is None:
+        parts.append(_LENGTH.pack(-1))
+    else:
+        parts.append(_LENGTH.pack(len(data)))
+        parts.append(bytes(data))
+
+
+def read_snapshot(path, query):
+    """(rows, next_page, thumbnails) saved for query, or None if there's no usable snapshot.
+
+    The file is memory-mapped and only the records are copied out, as
+    ActivitySummary rows like get_activities_page's, plus {id: thumbnail
+    bytes}. A snapshot of another query, another format version or a
+    damaged file is ignored.
+    """
+    try:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _parse(data, list(query))
+    except (OSError, ValueError, struct.error, UnicodeDecodeError) as e:
+        # A missing file is the normal first start; mmap also rejects empty files
+        if os.path.exists(path):
+            logger.warning("Ignoring unreadable board snapshot %s: %s", path, e)
+        return None
+
+
+def _parse(data, query):
+    magic, version, count, meta_length = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    offset = _HEADER.size
+    meta = json.loads(bytes(data[offset:offset + meta_length]))
+    if (not isinstance(meta, dict) or "query" not in meta or "next_page" not in meta
+            or not isinstance(meta["next_page"], (list, type(None)))):
+        raise ValueError("malformed snapshot header")
+    if meta["query"] != query:
+        return None
+    offset += meta_length
+    rows, thumbnails = [], {}
+    for _ in range(count):
+        activity_id, task_count, done_count, completion = _FIXED.unpack_from(data, offset)
+        offset += _FIXED.size
+        text = {}
+        for column in TEXT_COLUMNS:
+            value, offset = _unpack_bytes(data, offset)
+            text[column] = None if value is None else value.decode("utf-8")
+        thumbnail, offset = _unpack_bytes(data, offset)
+        if thumbnail:
+            thumbnails[activity_id] = thumbnail
+        rows.append(ActivitySummary(activity_id, text["name"], text["category"], bool(thumbnail),
+                                    text["created_at"], text["modified_at"], task_count, done_count, completion))
+    next_page = meta["next_page"]
+    return rows, None if next_page is None else tuple(next_page), thumbnails
+
+
+def _unpack_bytes(data, offset):
+    (length,) = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    if length < 0:
+        return None, offset
+    if offset + length > len(data):
+        raise ValueError("truncated record")
+    return data[offset:offset + length], offset + length
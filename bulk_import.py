@@ -0,0 +1,189 @@
+# bulk_import.py
+#
+# Streams activities and tasks from CSV or JSON-lines files into the database.
+# Input is read record by record through generators and written in batches,
+# one transaction each, so memory stays flat however large the file is.
+# Qt-free: used by tracker_cli.py.
+
+import csv
+import json
+import os
+import time
+
+from database_manager import DUPLICATE_SKIP, ImageFile
+from import_options import DEFAULT_BATCH_SIZE
+from instrumentation import get_logger
+
+logger = get_logger("import")
+
+_TRUE_VALUES = {"1", "true", "yes", "y", "x", "done"}
+
+
+class ImportRecord:
+    """One activity to import, or a further chunk of tasks for the previous one."""
+    __slots__ = ("name", "category", "tasks", "image_path", "continued")
+
+    def __init__(self, name, category=None, tasks=None, image_path=None, continued=False):
+        self.name = name
+        self.category = category
+        self.tasks = tasks or [] # [(description, completed)]
+        self.image_path = image_path
+        self.continued = continued
+
+
+class ImportStats:
+    __slots__ = ("records", "created", "merged", "renamed", "skipped", "tasks", "batches", "started")
+
+    def __init__(self):
+        self.records = self.created = self.merged = self.renamed = self.skipped = 0
+        self.tasks = self.batches = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def tasks_per_second(self):
+        return self.tasks / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"{self.records:,} records ({self.created:,} created, {self.merged:,} merged, "
+                f"{self.renamed:,} renamed, {self.skipped:,} skipped), {self.tasks:,} tasks "
+                f"in {self.elapsed:.1f} s, {self.tasks_per_second:,.0f} tasks/s")
+
+
+def _completed(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in _TRUE_VALUES
+
+
+def read_csv(lines, max_tasks=DEFAULT_BATCH_SIZE):
+    """ImportRecords from CSV with a header of name, category, task, completed, image.
+
+    Each row holds one task; consecutive rows with the same name form one
+    activity (a row with an empty task adds just the activity). Only name is
+    required. An activity with more than max_tasks tasks comes out as
+    several records, the later ones marked continued, so no record grows
+    with the input.
+    """
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or "name" not in [field.strip().lower() for field in reader.fieldnames]:
+        raise ValueError("CSV input needs a header row with at least a 'name' column")
+    record = None
+    for row in reader:
+        row = {(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+        name = row.get("name")
+        if not name:
+            continue
+        if record is not None and (name != record.name or len(record.tasks) >= max_tasks):
+            yield record
+            record = ImportRecord(name, continued=True) if name == record.name else None
+        if record is None:
+            record = ImportRecord(name, row.get("category") or None, image_path=row.get("image") or None)
+        if row.get("task"):
+            record.tasks.append((row["task"], _completed(row.get("completed"))))
+    if record is not None:
+        yield record
+
+
+def read_jsonl(lines, max_tasks=DEFAULT_BATCH_SIZE):
+    """ImportRecords from JSON lines of {"name", "category", "tasks", "image"}.
+
+    tasks holds strings or {"description", "completed"} objects. As in
+    read_csv, activities with more than max_tasks tasks are split into
+    continued records.
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Line {number}: {e}") from None
+        name = str(item.get("name") or "").strip()
+        if not name:
+            continue
+        tasks = []
+        for task in item.get("tasks") or []:
+            if isinstance(task, dict):
+                description, completed = str(task.get("description") or "").strip(), _completed(task.get("completed"))
+            else:
+                description, completed = str(task).strip(), False
+            if description:
+                tasks.append((description, completed))
+        yield ImportRecord(name, item.get("category") or None, tasks[:max_tasks], item.get("image") or None)
+        for start in range(max_tasks, len(tasks), max_tasks):
+            yield ImportRecord(name, tasks=tasks[start:start + max_tasks], continued=True)
+
+
+def _batches(records, batch_size):
+    # Lists of records holding about batch_size tasks (or records) each
+    batch, size = [], 0
+    for record in records:
+        batch.append(record)
+        size += max(1, len(record.tasks))
+        if size >= batch_size:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def _image_file(path, base_dir):
+    # The image is streamed from disk by the database, not read here
+    path = os.path.join(base_dir, os.path.expanduser(path))
+    if not os.path.isfile(path):
+        logger.warning("Skipping missing image %s", path)
+        return None
+    return ImageFile(path)
+
+
+def import_records(db, records, batch_size=DEFAULT_BATCH_SIZE, on_duplicate=DUPLICATE_SKIP,
+                   image_dir=".", progress=None):
+    """Writes records through DatabaseManager.import_activities, batch by batch.
+
+    progress(stats) is called after every batch. Image paths are relative
+    to image_dir. Returns (stats, error); batches written before an error
+    stay in the database.
+    """
+    stats = ImportStats()
+    last_id = None # Activity of the last record written, which continued records extend
+    for batch in _batches(records, batch_size):
+        rows, counted = [], [] # counted: whether each row is a new record for the stats
+        for record in batch:
+            if record.continued:
+                if rows:
+                    # Same batch as the records it continues: just more tasks for them
+                    rows[-1] = rows[-1][:2] + (rows[-1][2] + record.tasks,) + rows[-1][3:]
+                elif last_id is not None:
+                    rows.append((record.name, record.category, record.tasks, None, last_id))
+                    counted.append(False)
+                continue # Without last_id its activity was skipped as a duplicate
+            image_data = _image_file(record.image_path, image_dir) if record.image_path else None
+            rows.append((record.name, record.category, record.tasks, image_data, None))
+            counted.append(True)
+        results, error = db.import_activities(rows, on_duplicate)
+        if error:
+            return stats, error
+        for row, (activity_id, outcome), is_record in zip(rows, results, counted):
+            if is_record:
+                stats.records += 1
+                setattr(stats, outcome, getattr(stats, outcome) + 1)
+            if activity_id is not None:
+                stats.tasks += len(row[2])
+        if results:
+            last_id = results[-1][0]
+        stats.batches += 1
+        if progress:
+            progress(stats)
+    return stats, None
+
+
+def read_records(lines, file_format, max_tasks=DEFAULT_BATCH_SIZE):
+    if file_format == "csv":
+        return read_csv(lines, max_tasks)
+    if file_format == "jsonl":
+        return read_jsonl(lines, max_tasks)
+    raise ValueError(f"Unknown import format '{file_format}'")
@@ -0,0 +1,124 @@
+# connection_profiles.py
+
+import json
+import os
+import sqlite3
+
+from instrumentation import get_logger
+
+logger = get_logger("database")
+
+# A profile is the set of PRAGMAs a connection is opened with. The profile
+# of a database is chosen, first match wins, by:
+#   the profile argument of DatabaseManager (tracker_cli.py --profile)
+#   PROJECTTRACKER_DB_PROFILE=<profile name>
+#   connection_profiles.json in the Databases folder, e.g.
+#       {"*": "network", "mine.db": {"profile": "local", "cache_size": -65536}}
+#   where "*" covers every database of the folder and an object overrides
+#   single settings of a profile
+#   DEFAULT_PROFILE
+# Keeping the file next to the databases means every instance that opens
+# them, on whatever machine, agrees on the journal mode.
+PROFILE_ENV = "PROJECTTRACKER_DB_PROFILE"
+PROFILES_FILE = "connection_profiles.json"
+
+PROFILES = {
+    # Databases on a local disk, shared by several app instances and the
+    # command line: with WAL, readers don't block the writer or each other,
+    # and a commit is one append to the -wal file, synced at checkpoints
+    "local": {
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "busy_timeout": 5000, # ms a writer waits for another's lock before "database is locked"
+        "cache_size": -16384, # Negative: KiB, so 16 MB of page cache
+        "mmap_size": 64 * 1024 * 1024,
+    },
+    # Databases in a folder on a network share. WAL needs shared memory
+    # between the processes, which doesn't exist across machines, and mmap
+    # isn't safe over network file systems; locks are held longer, so
+    # writers wait longer for them
+    "network": {
+        "journal_mode": "delete",
+        "synchronous": "full",
+        "busy_timeout": 30000,
+        "cache_size": -16384,
+        "mmap_size": 0,
+    },
+}
+DEFAULT_PROFILE = "local"
+
+JOURNAL_MODES = ("delete", "truncate", "persist", "wal")
+SYNCHRONOUS_MODES = ("off", "normal", "full", "extra")
+_INTEGER_SETTINGS = ("busy_timeout", "cache_size", "mmap_size")
+
+
+def _read_profiles_file(db_folder):
+    path = os.path.join(db_folder, PROFILES_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable %s: %s", path, e)
+        return {}
+    if not isinstance(entries, dict):
+        logger.warning("Ignoring %s: expected an object of database names", path)
+        return {}
+    return entries
+
+
+def _validated(settings, source):
+    # Settings end up in PRAGMA statements, so only known keys and values pass
+    valid = {}
+    for key, value in settings.items():
+        if key == "journal_mode" and str(value).lower() in JOURNAL_MODES:
+            valid[key] = str(value).lower()
+        elif key == "synchronous" and str(value).lower() in SYNCHRONOUS_MODES:
+            valid[key] = str(value).lower()
+        elif key in _INTEGER_SETTINGS and isinstance(value, int) and not isinstance(value, bool):
+            valid[key] = value
+        elif key != "profile":
+            logger.warning("Ignoring connection setting %s=%r from %s", key, value, source)
+    return valid
+
+
+def resolve_profile(db_folder, db_name, profile=None):
+    """(profile name, settings) for the database db_name in db_folder."""
+    entry = None
+    if profile is None:
+        profile = os.environ.get(PROFILE_ENV) or None
+    if profile is None:
+        entries = _read_profiles_file(db_folder)
+        entry = entries.get(os.path.basename(db_name), entries.get("*"))
+        profile = entry.get("profile") if isinstance(entry, dict) else entry
+    if profile not in PROFILES:
+        if profile is not None:
+            logger.warning("Unknown connection profile %r; using %s", profile, DEFAULT_PROFILE)
+        profile = DEFAULT_PROFILE
+    settings = dict(PROFILES[profile])
+    if isinstance(entry, dict):
+        settings.update(_validated(entry, PROFILES_FILE))
+    return profile, settings
+
+
+def apply_profile(conn, settings):
+    """Runs the PRAGMAs of settings on conn; returns the journal mode in effect.
+
+    busy_timeout goes first so that changing the journal mode waits for
+    other connections instead of failing. If the journal mode can't be
+    changed (another connection holds the database, or the file system
+    doesn't support WAL) the database keeps its current mode.
+    """
+    conn.execute(f"PRAGMA busy_timeout = {settings['busy_timeout']}")
+    try:
+        journal_mode = conn.execute(f"PRAGMA journal_mode = {settings['journal_mode']}").fetchone()[0]
+    except sqlite3.OperationalError as e:
+        logger.warning("Could not switch to journal mode %s: %s", settings['journal_mode'], e)
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    if journal_mode != settings['journal_mode']:
+        logger.warning("Database stays in journal mode %s instead of %s", journal_mode, settings['journal_mode'])
+    conn.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+    conn.execute(f"PRAGMA cache_size = {settings['cache_size']}")
+    conn.execute(f"PRAGMA mmap_size = {settings['mmap_size']}")
+    return journal_mode
@@ -2,11 +2,193 @@
 
 import sqlite3
 from datetime import datetime
+import json
 import os
+import re
 import sys
 
+from connection_profiles import apply_profile, resolve_profile
+from instrumentation import get_logger, instrument_methods
+from migrations import COMPLETION_EXPR, run_migrations
+
+logger = get_logger("database")
+
+def build_fts_query(search_term):
+    """Turns free text into an FTS5 prefix query: 'infra proj' -> '"infra"* "proj"*'."""
+    tokens = re.findall(r"\w+", search_term or "")
+    return " ".join(f'"{token}"*' for token in tokens)
+
+# Change events passed to listeners registered with add_change_listener
+ACTIVITY_ADDED = "activity_added"
+ACTIVITY_CHANGED = "activity_changed"
+ACTIVITY_REMOVED = "activity_removed"
+TASKS_CHANGED = "tasks_changed"
+
+# Rows per get_activities_page call
+PAGE_SIZE = 200
+# Tasks per get_tasks_page call
+TASK_PAGE_SIZE = 500
+
+# Images are streamed in and out of the database in chunks of this size
+BLOB_CHUNK_SIZE = 256 * 1024
+# Activities per get_export_page call
+EXPORT_PAGE_SIZE = 500
+
+# What import_activities does with a record whose name already exists
+DUPLICATE_SKIP = "skip" # Leave the existing activity alone, drop the record
+DUPLICATE_MERGE = "merge" # Add the record's tasks to the existing activity
+DUPLICATE_RENAME = "rename" # Create it as "Name (2)", "Name (3)", ...
+DUPLICATE_FAIL = "fail" # Abort the batch
+DUPLICATE_POLICIES = (DUPLICATE_SKIP, DUPLICATE_MERGE, DUPLICATE_RENAME, DUPLICATE_FAIL)
+# From this many tasks in one import batch, the per-row task insert triggers
+# are switched off and replaced by one set-based statement each (see _insert_tasks_in_bulk)
+BULK_TRIGGER_THRESHOLD = 1000
+
+# Columns apply_coalesced_writes may set
+TASK_WRITE_FIELDS = ("description", "completed")
+
+def _sort_columns(sort_by, ranked):
+    """[(SQL expression, descending)] for a board sort, ending in a.id so the order is total.
+
+    Each list matches an index (the rowid is implicitly part of every index),
+    so sorted scans and keyset seeks don't need a temporary b-tree.
+    """
+    name = "LOWER(a.name)"
+    if sort_by == "category":
+        return [("LOWER(a.category)", False), (name, False), ("a.id", False)]
+    if sort_by == "completion":
+        # Same expression as idx_activities_completion
+        return [(COMPLETION_EXPR.format(p="a."), True), (name, False), ("a.id", False)]
+    if sort_by == "modified":
+        # COALESCE keeps the key non-NULL so seeks stay index range scans
+        return [("COALESCE(a.modified_at, '')", True), ("a.id", True)]
+    if sort_by == "created":
+        return [("COALESCE(a.created_at, '')", True), ("a.id", True)]
+    if sort_by == "tasks":
+        return [("a.task_count", True), (name, False), ("a.id", False)]
+    if sort_by == "relevance" and ranked:
+        # bm25() is negative, best matches first
+        return [("hits.rank", False), (name, False), ("a.id", False)]
+    return [(name, False), ("a.id", False)] # Default sort
+
+def _keyset_condition(sort_columns, after):
+    """WHERE condition for rows strictly after the key values in after.
+
+    Expands to (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..., honouring each
+    column's direction and SQLite's NULLs-first ordering, plus a leading
+    bound on k1 that lets SQLite seek into the index.
+    """
+    clauses, params = [], []
+    for i, (expr, desc) in enumerate(sort_columns):
+        terms = [f"{prev} IS ?" for prev, _ in sort_columns[:i]]
+        term_params = list(after[:i])
+        if after[i] is None:
+            # NULL sorts first: after it come the non-NULL values (ascending only)
+            if desc:
+                continue
+            terms.append(f"{expr} IS NOT NULL")
+        else:
+            # Descending keys are never NULL (see _sort_columns), so no NULL tail to keep
+            terms.append(f"{expr} {'<' if desc else '>'} ?")
+            term_params.append(after[i])
+        clauses.append(" AND ".join(terms))
+        params += term_params
+    condition = "(" + " OR ".join(f"({clause})" for clause in clauses) + ")" if clauses else "0"
+    first_expr, first_desc = sort_columns[0]
+    if after[0] is not None:
+        condition = f"{first_expr} {'<=' if first_desc else '>='} ? AND {condition}"
+        params = [after[0]] + params
+    return condition, params
+
+class ImageFile:
+    """An image to store from a file, wherever image_data is accepted.
+
+    Instead of reading the file into memory, the row gets a zeroblob of the
+    file's size that is then filled chunk by chunk through blobopen().
+    """
+    __slots__ = ("path",)
+
+    def __init__(self, path):
+        self.path = path
+
+    def __repr__(self):
+        return f"ImageFile({self.path!r})"
+
+class ActivitySummary:
+    """One board row: an activity's summary columns, and no image data.
+
+    Thumbnails aren't part of the record - has_thumbnail says whether the
+    requested size exists, and get_thumbnails() fetches the bytes for the
+    rows actually painted. Categories are interned, so the many rows that
+    share one hold a single string. search_rank and matched_task are None
+    unless the rows come from a ranked search.
+    """
+    __slots__ = ("id", "name", "category", "has_thumbnail", "created_at", "modified_at",
+                 "task_count", "done_count", "completion_percent", "search_rank", "matched_task")
+
+    def __init__(self, id, name, category, has_thumbnail, created_at, modified_at,
+                 task_count, done_count, completion_percent, search_rank=None, matched_task=None):
+        self.id = id
+        self.name = name
+        self.category = sys.intern(category) if category else category
+        self.has_thumbnail = has_thumbnail
+        self.created_at = created_at
+        self.modified_at = modified_at
+        self.task_count = task_count
+        self.done_count = done_count
+        self.completion_percent = completion_percent
+        self.search_rank = search_rank
+        self.matched_task = matched_task
+
+    @classmethod
+    def from_row(cls, row):
+        # row is a plain tuple in the column order of _activities_query: the summary
+        # columns, any extra columns, then search_rank and matched_task
+        return cls(row[0], row[1], row[2], bool(row[3]), *row[4:9], row[-2], row[-1])
+
+    def __repr__(self):
+        return f"ActivitySummary({self.id!r}, {self.name!r})"
+
+class TaskChangeSet:
+    """The task inserts, updates and deletes needed to save one activity.
+
+    inserts: [(description, completed)], updates: [(task_id, description, completed)],
+    deletes: [task_id]. Build it with from_rows() so unchanged tasks are left out.
+    """
+    def __init__(self, inserts=None, updates=None, deletes=None):
+        self.inserts = inserts or []
+        self.updates = updates or []
+        self.deletes = deletes or []
+
+    @classmethod
+    def from_rows(cls, original_tasks, rows, deleted_ids=()):
+        """Diffs the edited rows against the tasks as they were loaded.
+
+        original_tasks and rows are (task_id, description, completed) tuples,
+        as returned by get_tasks; rows use task_id None for new tasks. An
+        existing task whose description was cleared is deleted.
+        """
+        original = {task_id: (description, completed) for task_id, description, completed in original_tasks}
+        changes = cls(deletes=[task_id for task_id in deleted_ids if task_id in original])
+        for task_id, description, completed in rows:
+            description = description.strip()
+            if task_id is None:
+                if description:
+                    changes.inserts.append((description, bool(completed)))
+            elif not description:
+                if task_id not in changes.deletes:
+                    changes.deletes.append(task_id)
+            elif original.get(task_id) != (description, bool(completed)):
+                changes.updates.append((task_id, description, bool(completed)))
+        return changes
+
+    def is_empty(self):
+        return not (self.inserts or self.updates or self.deletes)
+
+# Every public method is timed as a "db.<method>" span in the session metrics
+@instrument_methods("db")
 class DatabaseManager:
-    def __init__(self, db_name="activities.db"):
+    def __init__(self, db_name="activities.db", profile=None):
         # Get the absolute path of the directory containing this script (or the executable)
         if getattr(sys, 'frozen', False):
             # If running as a PyInstaller bundle
@@ -21,18 +203,27 @@ class DatabaseManager:
         # Create the Databases directory if it doesn't exist
         os.makedirs(self.db_folder, exist_ok=True)
 
-        # Construct the full path to the database file
+        # Construct the full path to the database file (an absolute db_name is used as is)
         self.db_path = os.path.join(self.db_folder, db_name)
+        self.migration_report = []
+        self.fts_enabled = False
+        self._change_listeners = []
+        # Journaling, syncing, caching and lock waits; see connection_profiles.py
+        self.profile, self.connection_settings = resolve_profile(self.db_folder, db_name, profile)
+        self.journal_mode = None
 
-        print(f"Database Path: {self.db_path}") # For debugging
+        logger.debug("Database Path: %s (profile %s)", self.db_path, self.profile)
 
         try:
             self.conn = sqlite3.connect(self.db_path)
             self.conn.row_factory = sqlite3.Row # Access columns by name
+            self.journal_mode = apply_profile(self.conn, self.connection_settings)
+            # Off by default in SQLite; needed for ON DELETE CASCADE to fire
+            self.conn.execute("PRAGMA foreign_keys = ON")
             self.create_tables()
-            print("Database connection successful.") # For debugging
+            logger.debug("Database connection successful.")
         except sqlite3.Error as e:
-            print(f"Database connection error: {e}")
+            logger.error("Database connection error: %s", e)
             # Optionally, raise the error or handle it to show a message to the user
             # For now, we'll let it potentially fail later if conn is None
             self.conn = None # Indicate connection failure
@@ -40,182 +231,634 @@ class DatabaseManager:
     def create_tables(self):
         if not self.conn: return # Don't proceed if connection failed
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS activities (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE, -- Added UNIQUE constraint
-                category TEXT,
-                image BLOB,
-                created_at TEXT, -- Storing as TEXT ISO format is often better
-                modified_at TEXT
-            )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    activity_id INTEGER,
-                    description TEXT NOT NULL,
-                    completed INTEGER NOT NULL DEFAULT 0, -- 0 for False, 1 for True
-                    FOREIGN KEY (activity_id) REFERENCES activities (id) ON DELETE CASCADE -- Ensure tasks deleted when activity is
-                )
-            ''')
-            self.conn.commit()
-            print("Tables checked/created.") # For debugging
+            # Brings the schema up to date; each step is timed and reported
+            self.migration_report = run_migrations(self.conn)
+            self.fts_enabled = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'activities_fts'").fetchone() is not None
+            logger.debug("Tables checked/created.")
         except sqlite3.Error as e:
-            print(f"Error creating tables: {e}")
+            logger.error("Error creating tables: %s", e)
+
+    def add_change_listener(self, callback):
+        """Registers callback(event, activity_id), called after each committed change.
+
+        event is one of ACTIVITY_ADDED, ACTIVITY_CHANGED, ACTIVITY_REMOVED or
+        TASKS_CHANGED. Callbacks run on the thread that made the change.
+        """
+        self._change_listeners.append(callback)
+
+    def _notify(self, event, activity_id):
+        for callback in self._change_listeners:
+            callback(event, activity_id)
+
+    def _task_activity_id(self, cursor, task_id):
+        row = cursor.execute("SELECT activity_id FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return row['activity_id'] if row else None
+
+    def _save_image(self, cursor, activity_id, image_data, thumbnails=None):
+        # image_data semantics match update_activity: None keeps, empty bytes removes
+        if image_data is None:
+            return
+        if not image_data:
+            cursor.execute("DELETE FROM activity_images WHERE activity_id = ?", (activity_id,))
+            return
+        thumb_small, thumb_large = thumbnails if thumbnails else (None, None)
+        if isinstance(image_data, ImageFile):
+            self._save_image_file(cursor, activity_id, image_data.path, thumb_small, thumb_large)
+            return
+        cursor.execute("INSERT OR REPLACE INTO activity_images (activity_id, thumb_small, thumb_large, image) VALUES (?, ?, ?, ?)",
+                       (activity_id, thumb_small, thumb_large, image_data))
+
+    def _save_image_file(self, cursor, activity_id, path, thumb_small, thumb_large):
+        # Reserves the image's size with zeroblob() and streams the file into it,
+        # inside the caller's transaction. File errors are raised as sqlite3
+        # errors so the callers' handlers roll the whole save back.
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if not hasattr(self.conn, "blobopen"): # Python < 3.11: no incremental I/O
+                    image_data = f.read()
+                    cursor.execute("INSERT OR REPLACE INTO activity_images (activity_id, thumb_small, thumb_large, image) "
+                                   "VALUES (?, ?, ?, ?)", (activity_id, thumb_small, thumb_large, image_data))
+                    return
+                cursor.execute("INSERT OR REPLACE INTO activity_images (activity_id, thumb_small, thumb_large, image) "
+                               "VALUES (?, ?, ?, zeroblob(?))", (activity_id, thumb_small, thumb_large, size))
+                # activity_id is the table's rowid
+                with self.conn.blobopen("activity_images", "image", activity_id) as blob:
+                    remaining = size
+                    while remaining:
+                        chunk = f.read(min(BLOB_CHUNK_SIZE, remaining))
+                        if not chunk:
+                            raise sqlite3.OperationalError(f"Image file {path} shrank while it was stored")
+                        blob.write(chunk)
+                        remaining -= len(chunk)
+        except OSError as e:
+            raise sqlite3.OperationalError(f"Could not read image file: {e}") from e
 
-    def create_activity(self, name, category, tasks, image_data=None):
+    def create_activity(self, name, category, tasks, image_data=None, thumbnails=None):
         if not self.conn: return None, "Database connection error"
         cursor = self.conn.cursor()
         now = datetime.now().isoformat()
         try:
-            cursor.execute("INSERT INTO activities (name, category, image, created_at, modified_at) VALUES (?, ?, ?, ?, ?)",
-                           (name, category, image_data, now, now))
+            cursor.execute("INSERT INTO activities (name, category, created_at, modified_at) VALUES (?, ?, ?, ?)",
+                           (name, category, now, now))
             activity_id = cursor.lastrowid
+            self._save_image(cursor, activity_id, image_data, thumbnails)
             for task_desc in tasks:
                 if task_desc.strip(): # Ignore empty tasks
                     cursor.execute("INSERT INTO tasks (activity_id, description, completed) VALUES (?, ?, ?)",
                                    (activity_id, task_desc.strip(), 0)) # Start as not completed
             self.conn.commit()
-            print(f"Activity '{name}' created with ID: {activity_id}") # For debugging
+            logger.debug("Activity '%s' created with ID: %s", name, activity_id)
+            self._notify(ACTIVITY_ADDED, activity_id)
             return activity_id, None # Success
         except sqlite3.IntegrityError:
+             self.conn.rollback()
              return None, f"Activity with name '{name}' already exists."
         except sqlite3.Error as e:
             self.conn.rollback() # Rollback on error
-            print(f"Error creating activity: {e}")
+            logger.error("Error creating activity: %s", e)
             return None, f"Database error: {e}"
 
-    def update_activity(self, activity_id, name, category, image_data):
+    def update_activity(self, activity_id, name, category, image_data, thumbnails=None):
         if not self.conn: return "Database connection error"
         cursor = self.conn.cursor()
         now = datetime.now().isoformat()
         try:
-            # Check if image_data needs update. If None is passed explicitly,
-            # it means "don't change image". If an empty bytes object or similar
-            # is passed, it might mean "remove image" - handle as needed.
-            # Let's assume None means "keep current image".
-            if image_data is not None: # If new image data is provided (even if it's empty bytes for removal)
-                 cursor.execute("UPDATE activities SET name = ?, category = ?, image = ?, modified_at = ? WHERE id = ?",
-                           (name, category, image_data, now, activity_id))
-            else: # Keep the existing image
-                cursor.execute("UPDATE activities SET name = ?, category = ?, modified_at = ? WHERE id = ?",
-                           (name, category, now, activity_id))
-
+            self._update_activity_row(cursor, activity_id, name, category, image_data, thumbnails, now)
             self.conn.commit()
-            print(f"Activity ID {activity_id} updated.") # For debugging
+            logger.debug("Activity ID %s updated.", activity_id)
+            self._notify(ACTIVITY_CHANGED, activity_id)
             return None # Success
         except sqlite3.IntegrityError:
+             self.conn.rollback()
              return f"Activity with name '{name}' already exists."
         except sqlite3.Error as e:
             self.conn.rollback()
-            print(f"Error updating activity {activity_id}: {e}")
+            logger.error("Error updating activity %s: %s", activity_id, e)
             return f"Database error: {e}"
 
+    def _update_activity_row(self, cursor, activity_id, name, category, image_data, thumbnails, now):
+        cursor.execute("UPDATE activities SET name = ?, category = ?, modified_at = ? WHERE id = ?",
+                       (name, category, now, activity_id))
+        # None means "keep current image", empty bytes means "remove image"
+        self._save_image(cursor, activity_id, image_data, thumbnails)
+
+    def apply_task_changes(self, activity_id, changes, details=None):
+        """Saves a TaskChangeSet, and optionally new activity details, in one transaction.
+
+        details is (name, category, image_data, thumbnails) with the same
+        meaning as update_activity's arguments, or None to leave them alone.
+        Returns (new_task_ids, error); new_task_ids follow the order of
+        changes.inserts. On error nothing is written.
+        """
+        if not self.conn: return [], "Database connection error"
+        if details is None and changes.is_empty():
+            return [], None # Nothing changed, nothing to write
+        cursor = self.conn.cursor()
+        now = datetime.now().isoformat()
+        try:
+            if details is not None:
+                self._update_activity_row(cursor, activity_id, *details, now)
+            else:
+                # Task edits still count as modifying the activity
+                cursor.execute("UPDATE activities SET modified_at = ? WHERE id = ?", (now, activity_id))
+            if changes.deletes:
+                cursor.executemany("DELETE FROM tasks WHERE id = ? AND activity_id = ?",
+                                   [(task_id, activity_id) for task_id in changes.deletes])
+            if changes.updates:
+                cursor.executemany("UPDATE tasks SET description = ?, completed = ? WHERE id = ? AND activity_id = ?",
+                                   [(description, 1 if completed else 0, task_id, activity_id)
+                                    for task_id, description, completed in changes.updates])
+            new_task_ids = []
+            if changes.inserts:
+                cursor.executemany("INSERT INTO tasks (activity_id, description, completed) VALUES (?, ?, ?)",
+                                   [(activity_id, description, 1 if completed else 0)
+                                    for description, completed in changes.inserts])
+                # This transaction holds the write lock and ids only grow, so the
+                # newest rows for the activity are exactly the ones just inserted
+                cursor.execute("SELECT id FROM tasks WHERE activity_id = ? ORDER BY id DESC LIMIT ?",
+                               (activity_id, len(changes.inserts)))
+                new_task_ids = [row['id'] for row in reversed(cursor.fetchall())]
+            self.conn.commit()
+            logger.debug("Activity ID %s saved: %s added, %s updated, %s deleted.", activity_id,
+                         len(changes.inserts), len(changes.updates), len(changes.deletes))
+            self._notify(ACTIVITY_CHANGED if details is not None else TASKS_CHANGED, activity_id)
+            return new_task_ids, None # Success
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            name = details[0] if details else ""
+            return [], f"Activity with name '{name}' already exists."
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error("Error saving activity %s: %s", activity_id, e)
+            return [], f"Database error: {e}"
+
+    def import_activities(self, records, on_duplicate=DUPLICATE_SKIP):
+        """Inserts a batch of imported activities and their tasks in one transaction.
+
+        records are (name, category, tasks, image_data, activity_id) tuples,
+        tasks being [(description, completed)]. A record with an activity_id
+        adds its tasks to that activity whatever its name (the continuation
+        of a large activity split across batches). Other records are created,
+        or handled per on_duplicate when the name is taken, by an existing
+        activity or an earlier record. Images are stored without thumbnails;
+        the app generates those on its next start.
+
+        Returns ([(activity_id, outcome)], error) with one entry per record,
+        outcome being "created", "merged", "renamed" or "skipped" (id None).
+        On error nothing of the batch is written.
+        """
+        if not self.conn: return [], "Database connection error"
+        cursor = self.conn.cursor()
+        now = datetime.now().isoformat()
+        results = []
+        task_rows = []
+        try:
+            existing = self._existing_names(cursor, {record[0] for record in records if record[4] is None})
+            for name, category, tasks, image_data, activity_id in records:
+                outcome = "merged"
+                if activity_id is None:
+                    activity_id = existing.get(name)
+                    if activity_id is None:
+                        outcome = "created"
+                    elif on_duplicate == DUPLICATE_SKIP:
+                        results.append((None, "skipped"))
+                        continue
+                    elif on_duplicate == DUPLICATE_FAIL:
+                        self.conn.rollback()
+                        return [], f"Activity with name '{name}' already exists."
+                    elif on_duplicate == DUPLICATE_RENAME:
+                        name = self._free_name(cursor, name, existing)
+                        activity_id, outcome = None, "renamed"
+                if activity_id is None:
+                    cursor.execute("INSERT INTO activities (name, category, created_at, modified_at) VALUES (?, ?, ?, ?)",
+                                   (name, category, now, now))
+                    activity_id = existing[name] = cursor.lastrowid
+                    if image_data:
+                        self._save_image(cursor, activity_id, image_data)
+                elif tasks:
+                    cursor.execute("UPDATE activities SET modified_at = ? WHERE id = ?", (now, activity_id))
+                task_rows.extend((activity_id, description, 1 if completed else 0) for description, completed in tasks)
+                results.append((activity_id, outcome))
+            if len(task_rows) >= BULK_TRIGGER_THRESHOLD:
+                self._insert_tasks_in_bulk(cursor, task_rows)
+            else:
+                # The triggers keep the counters and the FTS index in step
+                cursor.executemany("INSERT INTO tasks (activity_id, description, completed) VALUES (?, ?, ?)", task_rows)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error("Error importing activities: %s", e)
+            return [], f"Database error: {e}"
+        logger.debug("Imported %s activities with %s tasks.", len(results), len(task_rows))
+        for activity_id, outcome in results:
+            if activity_id is not None:
+                self._notify(ACTIVITY_ADDED if outcome in ("created", "renamed") else TASKS_CHANGED, activity_id)
+        return results, None
+
+    def _insert_tasks_in_bulk(self, cursor, task_rows):
+        # Row by row, the counter and FTS triggers cost several times the insert
+        # itself. A row in bulk_insert switches them off for this transaction
+        # (see migrations.gate_bulk_insert_triggers); their effect is applied
+        # once for all new rows and the row deleted again before the commit.
+        cursor.execute("INSERT INTO bulk_insert (active) VALUES (1)")
+        # AUTOINCREMENT ids only grow, so the new tasks are the ones above the current maximum
+        last_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+        cursor.executemany("INSERT INTO tasks (activity_id, description, completed) VALUES (?, ?, ?)", task_rows)
+        cursor.execute("DELETE FROM bulk_insert")
+        cursor.execute("""
+            UPDATE activities SET
+                task_count = task_count + (SELECT COUNT(*) FROM tasks t WHERE t.activity_id = activities.id AND t.id > ?),
+                done_count = done_count + (SELECT COUNT(*) FROM tasks t WHERE t.activity_id = activities.id AND t.id > ?
+                                           AND t.completed = 1)
+            WHERE id IN (SELECT DISTINCT activity_id FROM tasks WHERE id > ?)
+        """, (last_id, last_id, last_id))
+        if self.fts_enabled:
+            cursor.execute("INSERT INTO tasks_fts (rowid, description) SELECT id, description FROM tasks WHERE id > ?",
+                           (last_id,))
+
+    def _existing_names(self, cursor, names):
+        # {name: id} of the activities among names, queried in chunks below SQLite's variable limit
+        names = list(names)
+        found = {}
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            cursor.execute(f"SELECT id, name FROM activities WHERE name IN ({','.join('?' * len(chunk))})", chunk)
+            found.update((row['name'], row['id']) for row in cursor.fetchall())
+        return found
+
+    def _free_name(self, cursor, name, taken):
+        # "name (2)", "name (3)", ... whichever is free first
+        number = 2
+        while True:
+            candidate = f"{name} ({number})"
+            if candidate not in taken and not cursor.execute(
+                    "SELECT 1 FROM activities WHERE name = ?", (candidate,)).fetchone():
+                return candidate
+            number += 1
+
     def add_task(self, activity_id, description):
-        print(f"DEBUG [db_manager.add_task]: ENTERED. activity_id={activity_id}, description='{description}'")
-        if not self.conn: 
-            print("DEBUG [db_manager.add_task]: EXITING early - no DB connection.") # Add print
-            return None, "Database connection error"
-        
+        if not self.conn: return None, "Database connection error"
         cursor = self.conn.cursor()
         try:
-            print(f"  DB: Executing INSERT task for activity_id={activity_id}, description='{description.strip()}'")
             cursor.execute("INSERT INTO tasks (activity_id, description, completed) VALUES (?, ?, ?)",
                            (activity_id, description.strip(), 0))
             task_id = cursor.lastrowid
-            print(f"  DB: INSERT executed. Last Row ID: {task_id}") # Add print immediately after execute
-
-            print("  DB: Attempting commit...") # Add print before commit
             self.conn.commit()
-            print(f"  DB: COMMIT successful. Task ID {task_id} should be saved.") # Confirm commit
+            logger.debug("Task ID %s added to activity %s.", task_id, activity_id)
+            self._notify(TASKS_CHANGED, activity_id)
             return task_id, None # Success
         except sqlite3.Error as e:
-            # ---> Print the EXCEPTION <---
-            print(f"!!!! DB ERROR [db_manager.add_task]: Exception occurred: {e} !!!!")
             self.conn.rollback() # Rollback on error
-            print(f"  DB: Rolled back transaction due to error.")
+            logger.error("Error adding task to activity %s: %s", activity_id, e)
             return None, f"Database error: {e}"
-        finally:
-             # ---> Print on exit, regardless of success/failure <---
-             print(f"DEBUG [db_manager.add_task]: EXITING.")
 
     def update_task(self, task_id, description, completed):
         if not self.conn: return "Database connection error"
         cursor = self.conn.cursor()
         try:
+            activity_id = self._task_activity_id(cursor, task_id)
             cursor.execute("UPDATE tasks SET description = ?, completed = ? WHERE id = ?",
                         (description.strip(), 1 if completed else 0, task_id))
             self.conn.commit()
-            print(f"Task ID {task_id} updated.") # For debugging
+            logger.debug("Task ID %s updated.", task_id)
+            if activity_id is not None:
+                self._notify(TASKS_CHANGED, activity_id)
             return None # Success
         except sqlite3.Error as e:
             self.conn.rollback()
-            print(f"Error updating task {task_id}: {e}")
+            logger.error("Error updating task %s: %s", task_id, e)
             return f"Database error: {e}"
 
     def delete_task(self, task_id):
         if not self.conn: return "Database connection error"
         cursor = self.conn.cursor()
         try:
+            activity_id = self._task_activity_id(cursor, task_id)
             cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
             self.conn.commit()
-            print(f"Task ID {task_id} deleted.") # For debugging
+            logger.debug("Task ID %s deleted.", task_id)
+            if activity_id is not None:
+                self._notify(TASKS_CHANGED, activity_id)
             return None # Success
         except sqlite3.Error as e:
             self.conn.rollback()
-            print(f"Error deleting task {task_id}: {e}")
+            logger.error("Error deleting task %s: %s", task_id, e)
             return f"Database error: {e}"
 
-    def get_activities(self, search_term="", sort_by="name"):
-        if not self.conn: return []
-        cursor = self.conn.cursor()
-        # Using '%' for LIKE requires concatenation or specific param style in some DB APIs
-        # Using f-strings here for simplicity, but parameter binding is safer
-        search_query = f"%{search_term}%"
-
-        base_query = "SELECT a.id, a.name, a.category, a.image, a.created_at, a.modified_at FROM activities a "
-        where_clause = "WHERE a.name LIKE ? OR a.category LIKE ? "
-        params = [search_query, search_query]
-
-        # Subquery to calculate completion ratio safely handling division by zero
-        completion_subquery = """
-            (SELECT CAST(SUM(CASE WHEN t.completed = 1 THEN 1 ELSE 0 END) AS REAL) * 100.0 / COUNT(t.id)
-             FROM tasks t
-             WHERE t.activity_id = a.id)
+    def apply_coalesced_writes(self, task_writes):
+        """Applies the task updates a WriteBehindQueue collected, in one transaction.
+
+        task_writes maps task_id -> (activity_id, {field: value}) with fields
+        from TASK_WRITE_FIELDS. Rows sharing a set of fields are written with
+        one executemany. Returns an error string or None; on error nothing is
+        written.
         """
+        if not self.conn: return "Database connection error"
+        if not task_writes:
+            return None
+        cursor = self.conn.cursor()
+        now = datetime.now().isoformat()
+        # One statement per distinct set of fields; names come from the whitelists only
+        task_statements = {}
+        for task_id, (_, fields) in task_writes.items():
+            columns = tuple(field for field in TASK_WRITE_FIELDS if field in fields)
+            values = [fields[field] for field in columns]
+            if "completed" in fields:
+                values[columns.index("completed")] = 1 if fields["completed"] else 0
+            if "description" in fields:
+                values[columns.index("description")] = fields["description"].strip()
+            task_statements.setdefault(columns, []).append((*values, task_id))
+        touched = {activity_id for activity_id, _ in task_writes.values()}
+        try:
+            for columns, rows in task_statements.items():
+                if columns:
+                    assignments = ", ".join(f"{column} = ?" for column in columns)
+                    cursor.executemany(f"UPDATE tasks SET {assignments} WHERE id = ?", rows)
+            # Task edits still count as modifying the activity
+            cursor.executemany("UPDATE activities SET modified_at = ? WHERE id = ?",
+                               [(now, activity_id) for activity_id in touched])
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error("Error applying %s task writes: %s", len(task_writes), e)
+            return f"Database error: {e}"
+        logger.debug("Applied %s task writes.", len(task_writes))
+        for activity_id in touched:
+            self._notify(TASKS_CHANGED, activity_id)
+        return None # Success
+
+    def _is_ranked(self, search_term, name_hits):
+        # True when get_activities runs a ranked search (and rows carry search_rank)
+        return bool(build_fts_query(search_term)) and (self.fts_enabled or name_hits is not None)
 
-        if sort_by == "name":
-            order_by = "ORDER BY LOWER(a.name)"
-        elif sort_by == "category":
-            order_by = "ORDER BY LOWER(a.category), LOWER(a.name)"
-        elif sort_by == 'completion':
-             # Recalculate base query to include completion for sorting
-             base_query = f"SELECT a.id, a.name, a.category, a.image, a.created_at, a.modified_at, COALESCE({completion_subquery}, 0) as completion_percent FROM activities a "
-             order_by = "ORDER BY completion_percent DESC, LOWER(a.name)"
+    def _activities_query(self, search_term, thumbnail, activity_id, name_hits, extra_columns=""):
+        # Builds the summary SELECT shared by get_activities and get_activities_page.
+        # Returns (query, params, ranked); the query ends inside a WHERE clause so
+        # callers can append "AND ..." conditions, and ranked says hits.rank exists.
+        # Only whether the requested thumbnail exists is selected, never image data;
+        # length() reads the size from the record header without loading the BLOB
+        # (thumbnail None skips the image join, e.g. for the command line)
+        thumb_column = "i.thumb_large" if thumbnail == "large" else "i.thumb_small"
+        completion = COMPLETION_EXPR.format(p="a.")
+        columns = f"""a.id, a.name, a.category, {f"length({thumb_column}) > 0" if thumbnail else "0"} AS has_thumbnail, a.created_at,
+                   a.modified_at, a.task_count, a.done_count, {completion} AS completion_percent{extra_columns}"""
+        joins = "LEFT JOIN activity_images i ON i.activity_id = a.id" if thumbnail else ""
+        params = []
+
+        fts_query = build_fts_query(search_term) if self.fts_enabled else ""
+        if not self._is_ranked(search_term, name_hits):
+            name_hits = None # No words in the term; it's matched as a substring below
+        # Restricts every branch below to one activity when asked to
+        single_activity = "AND a.id = ?" if activity_id is not None else ""
+        if fts_query or name_hits is not None:
+            # Ranked prefix search over names, categories and task descriptions.
+            # Each activity keeps its best match; for task hits the best-ranked
+            # task (bare column with MIN) is reported as matched_task.
+            if name_hits is not None:
+                activity_hits = f"""
+                    SELECT CAST(key AS INTEGER) AS activity_id, value AS rank FROM json_each(?)
+                    {"WHERE CAST(key AS INTEGER) = ?" if single_activity else ""}"""
+                params = [json.dumps(name_hits)]
+            else:
+                activity_hits = f"""
+                    SELECT rowid AS activity_id, bm25(activities_fts, 10.0, 5.0) AS rank
+                    FROM activities_fts WHERE activities_fts MATCH ? {"AND rowid = ?" if single_activity else ""}"""
+                params = [fts_query]
+            if single_activity:
+                params.append(activity_id)
+            if fts_query:
+                task_matches = f"""
+                    SELECT rowid AS task_id, bm25(tasks_fts) AS rank
+                    FROM tasks_fts WHERE tasks_fts MATCH ?
+                    {"AND rowid IN (SELECT id FROM tasks WHERE activity_id = ?)" if single_activity else ""}"""
+                params += [fts_query, activity_id] if single_activity else [fts_query]
+            else:
+                task_matches = "SELECT NULL AS task_id, NULL AS rank WHERE 0" # No FTS5: names only
+            full_query = f"""
+                WITH activity_hits AS ({activity_hits}
+                ), task_matches AS ({task_matches}
+                ), task_hits AS (
+                    SELECT t.activity_id, t.description, MIN(tm.rank) AS rank
+                    FROM task_matches tm JOIN tasks t ON t.id = tm.task_id
+                    GROUP BY t.activity_id
+                ), hits AS (
+                    SELECT activity_id, MIN(rank) AS rank FROM (
+                        SELECT activity_id, rank FROM activity_hits
+                        UNION ALL
+                        SELECT activity_id, rank FROM task_hits
+                    ) GROUP BY activity_id
+                )
+                SELECT {columns}, hits.rank AS search_rank, th.description AS matched_task
+                FROM hits
+                JOIN activities a ON a.id = hits.activity_id
+                LEFT JOIN task_hits th ON th.activity_id = a.id
+                {joins}
+                WHERE 1
+            """
+        elif search_term and search_term.strip():
+            # Substring match for SQLite builds without FTS5, and for terms without
+            # word characters ("+", "#"), which leave nothing for FTS to match
+            search_query = f"%{search_term}%"
+            full_query = f"""
+                SELECT {columns}, NULL AS search_rank, NULL AS matched_task FROM activities a {joins}
+                WHERE (a.name LIKE ? OR a.category LIKE ?) {single_activity}
+            """
+            params = [search_query, search_query]
         else:
-            order_by = "ORDER BY LOWER(a.name)" # Default sort
+            full_query = f"SELECT {columns}, NULL AS search_rank, NULL AS matched_task FROM activities a {joins} WHERE 1 {single_activity} "
+        if single_activity and not (fts_query or name_hits is not None):
+            params.append(activity_id)
+
+        return full_query, params, self._is_ranked(search_term, name_hits)
 
-        full_query = base_query + where_clause + order_by
+    def get_activities(self, search_term="", sort_by="name", thumbnail="small", activity_id=None, name_hits=None):
+        """ActivitySummary rows for the board, filtered by search_term and ordered by sort_by.
+
+        With activity_id, returns at most that one row (empty if it doesn't
+        match the search), in the same shape, for incremental board updates.
+        name_hits ({activity_id: rank}, e.g. from SearchIndex) replaces the
+        name/category part of the search; task descriptions are still matched
+        through the FTS index.
+        """
+        if not self.conn: return []
+        cursor = self.conn.cursor()
+        cursor.row_factory = None # Plain tuples; from_row keeps only what the board uses
+        full_query, params, ranked = self._activities_query(search_term, thumbnail, activity_id, name_hits)
+        order_by = "ORDER BY " + ", ".join(f"{expr} DESC" if desc else expr for expr, desc in _sort_columns(sort_by, ranked))
 
         try:
-            cursor.execute(full_query, params)
-            return cursor.fetchall()
+            cursor.execute(full_query + order_by, params)
+            return [ActivitySummary.from_row(row) for row in cursor]
         except sqlite3.Error as e:
-            print(f"Error getting activities: {e}")
+            logger.error("Error getting activities: %s", e)
             return []
 
+    def get_activities_page(self, search_term="", sort_by="name", thumbnail="small", after=None,
+                            limit=PAGE_SIZE, name_hits=None):
+        """One page of get_activities, using keyset pagination.
+
+        Returns (rows, next_page): pass next_page back as after to continue
+        where the page ended, or stop when it is None. Pages seek directly
+        to the (sort key, id) of the previous page's last row instead of
+        using OFFSET, so late pages cost the same as the first.
+        """
+        if not self.conn: return [], None
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        sort_columns = _sort_columns(sort_by, self._is_ranked(search_term, name_hits))
+        # Selecting the sort expressions gives the next page's seek values
+        extra = "".join(f", {expr} AS sort_key_{i}" for i, (expr, _) in enumerate(sort_columns))
+        full_query, params, _ = self._activities_query(search_term, thumbnail, None, name_hits, extra)
+        if after is not None:
+            condition, condition_params = _keyset_condition(sort_columns, after)
+            full_query += f" AND {condition} "
+            params = params + condition_params
+        order_by = "ORDER BY " + ", ".join(f"{expr} DESC" if desc else expr for expr, desc in sort_columns)
+
+        try:
+            cursor.execute(f"{full_query} {order_by} LIMIT ?", params + [limit + 1])
+            rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error getting activities: %s", e)
+            return [], None
+        # The sort keys sit between the summary columns and search_rank, matched_task
+        next_page = tuple(rows[limit - 1][9:9 + len(sort_columns)]) if len(rows) > limit else None
+        return [ActivitySummary.from_row(row) for row in rows[:limit]], next_page
+
+    def get_search_entries(self, activity_id=None):
+        """(id, name, category) for every activity (or just activity_id), to build a SearchIndex."""
+        if not self.conn: return []
+        try:
+            if activity_id is not None:
+                return self.conn.execute("SELECT id, name, category FROM activities WHERE id = ?", (activity_id,)).fetchall()
+            return self.conn.execute("SELECT id, name, category FROM activities").fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error getting search entries: %s", e)
+            return []
+
+    def get_activity_id(self, name):
+        """Id of the activity called name (exact match preferred, else case-insensitive), or None."""
+        if not self.conn: return None
+        try:
+            row = self.conn.execute("SELECT id FROM activities WHERE name = ? COLLATE NOCASE ORDER BY name = ? DESC LIMIT 1",
+                                    (name, name)).fetchone()
+            return row['id'] if row else None
+        except sqlite3.Error as e:
+            logger.error("Error looking up activity %r: %s", name, e)
+            return None
+
     def get_activity(self, activity_id):
         if not self.conn: return None
         cursor = self.conn.cursor()
         try:
-            cursor.execute("SELECT id, name, category, image FROM activities WHERE id = ?", (activity_id,))
+            # The full image is only loaded here, i.e. when the editor opens
+            cursor.execute('''
+                SELECT a.id, a.name, a.category, i.image
+                FROM activities a LEFT JOIN activity_images i ON i.activity_id = a.id
+                WHERE a.id = ?
+            ''', (activity_id,))
             return cursor.fetchone()
         except sqlite3.Error as e:
-            print(f"Error getting activity {activity_id}: {e}")
+            logger.error("Error getting activity %s: %s", activity_id, e)
             return None
 
+    def get_image(self, activity_id):
+        if not self.conn: return None
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("SELECT image FROM activity_images WHERE activity_id = ?", (activity_id,))
+            row = cursor.fetchone()
+            return row['image'] if row else None
+        except sqlite3.Error as e:
+            logger.error("Error getting image for activity %s: %s", activity_id, e)
+            return None
+
+    def iter_image_chunks(self, activity_id, chunk_size=BLOB_CHUNK_SIZE):
+        """Yields the activity's image in chunks, never holding all of it in memory.
+
+        Yields nothing if the activity has no image.
+        """
+        if not self.conn: return
+        if hasattr(self.conn, "blobopen"):
+            try:
+                blob = self.conn.blobopen("activity_images", "image", activity_id, readonly=True)
+            except sqlite3.Error:
+                return # No image row, or a NULL image
+            with blob:
+                while True:
+                    chunk = blob.read(chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+        # Python < 3.11: substr() ranges keep Python's side bounded at least
+        row = self.conn.execute("SELECT length(image) FROM activity_images WHERE activity_id = ?", (activity_id,)).fetchone()
+        size = row[0] if row and row[0] else 0
+        for start in range(1, size + 1, chunk_size):
+            yield self.conn.execute("SELECT substr(image, ?, ?) FROM activity_images WHERE activity_id = ?",
+                                    (start, chunk_size, activity_id)).fetchone()[0]
+
+    def get_export_page(self, after_id=None, limit=EXPORT_PAGE_SIZE):
+        """Activities by id for an export, without image data: returns (rows, next_after_id).
+
+        Rows have id, name, category, created_at, modified_at and image_size
+        (None without an image); read images with iter_image_chunks().
+        """
+        if not self.conn: return [], None
+        try:
+            rows = self.conn.execute("""
+                SELECT a.id, a.name, a.category, a.created_at, a.modified_at, length(i.image) AS image_size
+                FROM activities a LEFT JOIN activity_images i ON i.activity_id = a.id
+                WHERE a.id > ? ORDER BY a.id LIMIT ?
+            """, (after_id if after_id is not None else -1, limit + 1)).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error getting activities for export: %s", e)
+            return [], None
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, rows[-1]['id']
+
+    def get_thumbnails(self, activity_ids, thumbnail="small"):
+        """{activity_id: thumbnail bytes} of the given activities that have one."""
+        if not self.conn: return {}
+        thumb_column = "thumb_large" if thumbnail == "large" else "thumb_small"
+        try:
+            rows = self.conn.execute(f"""
+                SELECT activity_id, {thumb_column} FROM activity_images
+                WHERE activity_id IN (SELECT value FROM json_each(?)) AND length({thumb_column}) > 0""",
+                (json.dumps(list(activity_ids)),)).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error getting thumbnails: %s", e)
+            return {}
+        return {activity_id: data for activity_id, data in rows}
+
+    def get_activities_missing_thumbnails(self):
+        # NULL: not generated yet. Empty: the image couldn't be decoded, which isn't retried
+        if not self.conn: return []
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("SELECT activity_id FROM activity_images WHERE thumb_small IS NULL OR thumb_large IS NULL")
+            return [row['activity_id'] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error("Error finding images without thumbnails: %s", e)
+            return []
+
+    def set_thumbnails(self, activity_id, thumb_small, thumb_large):
+        if not self.conn: return "Database connection error"
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("UPDATE activity_images SET thumb_small = ?, thumb_large = ? WHERE activity_id = ?",
+                           (thumb_small, thumb_large, activity_id))
+            self.conn.commit()
+            self._notify(ACTIVITY_CHANGED, activity_id)
+            return None # Success
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error("Error saving thumbnails for activity %s: %s", activity_id, e)
+            return f"Database error: {e}"
+
     def get_tasks(self, activity_id):
         if not self.conn: return []
         cursor = self.conn.cursor()
@@ -224,9 +867,29 @@ class DatabaseManager:
             # Return rows where completed is treated as boolean
             return [(row['id'], row['description'], bool(row['completed'])) for row in cursor.fetchall()]
         except sqlite3.Error as e:
-            print(f"Error getting tasks for activity {activity_id}: {e}")
+            logger.error("Error getting tasks for activity %s: %s", activity_id, e)
             return []
 
+    def get_tasks_page(self, activity_id, after_id=None, limit=TASK_PAGE_SIZE):
+        """Like get_tasks, one page at a time: returns (tasks, next_after_id).
+
+        Seeks on idx_tasks_activity (activity_id, id); next_after_id is None
+        once the last page has been returned.
+        """
+        if not self.conn: return [], None
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("SELECT id, description, completed FROM tasks WHERE activity_id = ? AND id > ? ORDER BY id LIMIT ?",
+                           (activity_id, after_id if after_id is not None else -1, limit + 1))
+            tasks = [(row['id'], row['description'], bool(row['completed'])) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error("Error getting tasks for activity %s: %s", activity_id, e)
+            return [], None
+        if len(tasks) <= limit:
+            return tasks, None
+        tasks = tasks[:limit]
+        return tasks, tasks[-1][0]
+
     def delete_activity(self, activity_id):
         if not self.conn: return "Database connection error"
         cursor = self.conn.cursor()
@@ -234,32 +897,41 @@ class DatabaseManager:
             # Using CASCADE delete now, so only need to delete from activities
             cursor.execute("DELETE FROM activities WHERE id = ?", (activity_id,))
             self.conn.commit()
-            print(f"Activity ID {activity_id} and its tasks deleted.") # For debugging
+            logger.debug("Activity ID %s and its tasks deleted.", activity_id)
+            self._notify(ACTIVITY_REMOVED, activity_id)
             return None # Success
         except sqlite3.Error as e:
             self.conn.rollback()
-            print(f"Error deleting activity {activity_id}: {e}")
+            logger.error("Error deleting activity %s: %s", activity_id, e)
             return f"Database error: {e}"
 
     def get_activity_completion(self, activity_id):
         if not self.conn: return 0.0
         cursor = self.conn.cursor()
         try:
-            cursor.execute("""
-                SELECT COUNT(CASE WHEN completed = 1 THEN 1 END) AS completed_count, COUNT(*) AS total_count
-                FROM tasks
-                WHERE activity_id = ?
-            """, (activity_id,))
+            cursor.execute(f"SELECT {COMPLETION_EXPR.format(p='')} AS completion_percent FROM activities WHERE id = ?",
+                           (activity_id,))
             result = cursor.fetchone()
-            if result and result['total_count'] > 0:
-                return (float(result['completed_count']) / result['total_count']) * 100.0
-            else:
-                return 0.0 # No tasks or failed query
+            return float(result['completion_percent']) if result else 0.0
         except sqlite3.Error as e:
-            print(f"Error getting completion for activity {activity_id}: {e}")
+            logger.error("Error getting completion for activity %s: %s", activity_id, e)
             return 0.0
 
+    def data_version(self):
+        """PRAGMA data_version: changes when another connection commits to the database.
+
+        Commits made through this connection don't change it, so polling it
+        tells apart other instances' writes from our own. It only reads the
+        database header, so it is cheap enough to poll every second.
+        """
+        if not self.conn: return None
+        try:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error("Error reading data_version: %s", e)
+            return None
+
     def close(self):
         if self.conn:
             self.conn.close()
-            print("Database connection closed.") # For debugging
\ No newline at end of file
+            logger.debug("Database connection closed.")
\ No newline at end of file
@@ -0,0 +1,190 @@
+# db_worker.py
+
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from database_manager import DatabaseManager
+from instrumentation import get_logger, metrics, span
+
+logger = get_logger("worker")
+
+# How often the idle worker checks whether another connection has committed
+DATA_VERSION_POLL_SECONDS = 1.0
+
+
+class DatabaseRequest:
+    __slots__ = ("request_id", "func", "args", "callback", "on_error", "key", "future", "submitted")
+
+    def __init__(self, request_id, func, args, callback, key, on_error=None):
+        self.request_id = request_id
+        self.func = func
+        self.args = args
+        self.callback = callback
+        self.on_error = on_error
+        self.key = key
+        self.future = Future()
+        self.submitted = time.perf_counter()
+
+
+class AsyncDatabaseManager(QObject):
+    """Runs DatabaseManager calls on a dedicated worker thread.
+
+    The worker owns its own sqlite3 connection (connections can't be shared
+    across threads) and processes requests one at a time from a queue, so the
+    GUI thread never waits on SQLite.
+
+    submit() takes any callable whose first argument is the worker's
+    DatabaseManager, typically an unbound method:
+
+        db.submit(DatabaseManager.get_activities, term, sort_by, callback=self.populate, key="board")
+
+    It returns a concurrent.futures.Future, and the optional callback is
+    invoked with the result on the GUI thread. If the call raises, the
+    optional on_error is invoked instead, with the error message, and
+    request_failed(message) is emitted for every failed request. Requests
+    that share a key supersede each other: queued older ones are dropped, an
+    in-flight one is interrupted, and only the newest result is delivered.
+    Use keys for reads only - a superseded write would be lost.
+
+    data_changed(event, activity_id) relays the DatabaseManager change events
+    of every committed write, whoever submitted it. external_change() is
+    emitted when someone else - another instance, the command line - has
+    committed to the database: the worker polls PRAGMA data_version between
+    requests, so nothing is re-read unless such a commit actually happened.
+    """
+    # Emitted from the worker thread; the connection is queued onto the GUI thread
+    _request_finished = pyqtSignal(object, object)
+    _request_raised = pyqtSignal(object, str)
+    request_failed = pyqtSignal(str)
+    data_changed = pyqtSignal(str, int)
+    external_change = pyqtSignal()
+
+    def __init__(self, db_name="activities.db", parent=None, poll_interval=DATA_VERSION_POLL_SECONDS):
+        super().__init__(parent)
+        self.db_name = db_name
+        self.poll_interval = poll_interval # None turns the data_version polling off
+        self.db_path = None # Resolved by DatabaseManager once the worker has connected
+        self.profile = None
+        self.journal_mode = None
+        self._queue = queue.Queue()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._latest = {} # key -> newest request id
+        self._pending = {} # key -> requests still waiting in the queue
+        self._active = None
+        self._db = None
+        self._connected = False
+        self._ready = threading.Event()
+        self._request_finished.connect(self._deliver)
+        self._request_raised.connect(self._deliver_error)
+
+        self._thread = threading.Thread(target=self._run, name="DatabaseWorker", daemon=True)
+        self._thread.start()
+        self._ready.wait() # Opening the connection and migrating is the only blocking step
+
+    def is_connected(self):
+        return self._connected
+
+    def submit(self, func, *args, callback=None, key=None, on_error=None):
+        request = DatabaseRequest(next(self._ids), func, args, callback, key, on_error)
+        if key is not None:
+            with self._lock:
+                self._latest[key] = request.request_id
+                for stale in self._pending.pop(key, []):
+                    stale.future.cancel()
+                self._pending[key] = [request]
+                active = self._active
+                if active is not None and active.key == key and self._db and self._db.conn:
+                    # Abort the stale query; it returns its error value and is discarded
+                    self._db.conn.interrupt()
+        self._queue.put(request)
+        return request.future
+
+    def close(self):
+        # Drains the queue first so pending writes still reach the database
+        self._queue.put(None)
+        self._thread.join()
+
+    # --- Worker thread ---
+    def _run(self):
+        self._db = DatabaseManager(self.db_name) # Connection belongs to this thread
+        self._connected = self._db.conn is not None
+        self.db_path = self._db.db_path if self._connected else None
+        self.profile, self.journal_mode = self._db.profile, self._db.journal_mode
+        self._db.add_change_listener(self.data_changed.emit)
+        self._ready.set()
+        polling = self._connected and self.poll_interval is not None
+        data_version = self._db.data_version() if polling else None
+        next_poll = time.monotonic() + (self.poll_interval or 0)
+        while True:
+            if polling and time.monotonic() >= next_poll:
+                # Also between back-to-back requests, so a busy queue doesn't hide changes
+                data_version = self._check_data_version(data_version)
+                next_poll = time.monotonic() + self.poll_interval
+            try:
+                request = self._queue.get(timeout=max(0.0, next_poll - time.monotonic()) if polling else None)
+            except queue.Empty:
+                continue
+            if request is None:
+                break
+            with self._lock:
+                if request.key is not None:
+                    pending = self._pending.get(request.key, [])
+                    if request in pending:
+                        pending.remove(request)
+                if not request.future.set_running_or_notify_cancel():
+                    continue # Superseded while queued
+                self._active = request
+            metrics.record("worker.queue_wait", (time.perf_counter() - request.submitted) * 1000)
+            name = getattr(request.func, '__name__', 'request')
+            try:
+                # The span also names the running request in stall reports
+                with span(f"worker.{name}"):
+                    result = request.func(self._db, *request.args)
+            except Exception as e:
+                logger.exception("Database request %s failed", name)
+                request.future.set_exception(e)
+                self._request_raised.emit(request, f"{name}: {e}")
+                continue
+            finally:
+                with self._lock:
+                    self._active = None
+            request.future.set_result(result)
+            self._request_finished.emit(request, result)
+        self._db.close()
+
+    def _check_data_version(self, last_version):
+        version = self._db.data_version()
+        if version is not None and last_version is not None and version != last_version:
+            logger.debug("Database changed by another connection (data_version %s -> %s)", last_version, version)
+            self.external_change.emit()
+        return version if version is not None else last_version
+
+    # --- GUI thread ---
+    def _deliver(self, request, result):
+        if request.key is not None and self._latest.get(request.key) != request.request_id:
+            return # A newer request with the same key replaced this one
+        if _receiver_alive(request.callback):
+            request.callback(result)
+
+    def _deliver_error(self, request, message):
+        self.request_failed.emit(message)
+        if request.key is not None and self._latest.get(request.key) != request.request_id:
+            return
+        if _receiver_alive(request.on_error):
+            request.on_error(message)
+
+
+def _receiver_alive(func):
+    # False without a callback, or when the widget that asked is gone
+    if func is None:
+        return False
+    # Look through functools.partial to the bound method
+    owner = getattr(getattr(func, "func", func), "__self__", None)
+    return not (isinstance(owner, QObject) and sip.isdeleted(owner))
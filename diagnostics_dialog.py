@@ -0,0 +1,93 @@
+# diagnostics_dialog.py
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QLabel,
+    QFileDialog, QMessageBox, QHeaderView, QAbstractItemView
+)
+from PyQt5.QtCore import Qt, QTimer
+
+from instrumentation import metrics
+
+COLUMNS = ("count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms", "total_ms")
+
+
+class DiagnosticsDialog(QDialog):
+    """Live view of the session metrics (opened with Ctrl+Shift+D).
+
+    extra_stats is a callable returning a dict of additional figures to show
+    and include in the JSON dump, e.g. the pixmap cache statistics; stalls
+    one returning the stall watchdog's worst stalls, which the dump includes
+    with their stacks.
+    """
+    def __init__(self, extra_stats=None, stalls=None, parent=None):
+        super().__init__(parent)
+        self.extra_stats = extra_stats
+        self.stalls = stalls
+        self.setWindowTitle("Diagnostics")
+        self.resize(760, 480)
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(COLUMNS) + 1)
+        self.table.setHorizontalHeaderLabels(["span"] + list(COLUMNS))
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+        layout.addWidget(self.table, 1)
+
+        self.extra_label = QLabel()
+        self.extra_label.setWordWrap(True)
+        self.extra_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(self.extra_label)
+
+        buttons = QHBoxLayout()
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        save_button = QPushButton("Save JSON...")
+        save_button.clicked.connect(self.save_json)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        buttons.addWidget(reset_button)
+        buttons.addWidget(save_button)
+        buttons.addStretch(1)
+        buttons.addWidget(close_button)
+        layout.addLayout(buttons)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def _extra(self):
+        return self.extra_stats() if self.extra_stats else {}
+
+    def refresh(self):
+        snapshot = metrics.snapshot()
+        self.table.setSortingEnabled(False) # Keeps rows together while they're filled
+        self.table.setRowCount(len(snapshot))
+        for row, (name, values) in enumerate(snapshot.items()):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            for column, key in enumerate(COLUMNS, 1):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, values[key]) # Numeric, so sorting by column works
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        self.table.setSortingEnabled(True)
+        figures = [f"{key}: {value}" for key, value in self._extra().items()]
+        stalls = self.stalls() if self.stalls else []
+        if stalls:
+            figures.append(f"worst stall: {stalls[0]['duration_ms']} ms ({stalls[0]['operation']})")
+        self.extra_label.setText("   ".join(figures))
+
+    def reset(self):
+        metrics.reset()
+        self.refresh()
+
+    def save_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Metrics", "metrics.json", "JSON Files (*.json)")
+        if not path:
+            return
+        try:
+            metrics.dump(path, {"extra": self._extra(), "stalls": self.stalls() if self.stalls else []})
+        except OSError as e:
+            QMessageBox.warning(self, "Save Error", f"Could not save metrics:\n{e}")
@@ -0,0 +1,82 @@
+# image_loader.py
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QBuffer, QByteArray, QIODevice, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QPixmap
+
+from instrumentation import span
+
+
+def read_scaled_image(image_data, max_size):
+    """Decodes image_data into a QImage no larger than max_size (a QSize).
+
+    image_data is the encoded bytes or a file path; a file is read by Qt
+    as it decodes rather than loaded into memory first. The target size is
+    handed to QImageReader before decoding, so formats that support it
+    (JPEG) decode straight at the reduced resolution instead of
+    materializing the full image first. Returns a null QImage on failure.
+    """
+    if isinstance(image_data, str):
+        reader = QImageReader(image_data)
+    else:
+        buffer = QBuffer()
+        buffer.setData(QByteArray(image_data))
+        buffer.open(QIODevice.ReadOnly)
+        reader = QImageReader(buffer)
+    reader.setAutoTransform(True) # Respect EXIF orientation
+    original = reader.size()
+    if original.isValid() and (original.width() > max_size.width() or original.height() > max_size.height()):
+        reader.setScaledSize(original.scaled(max_size, Qt.KeepAspectRatio))
+    return reader.read()
+
+
+class _DecodeSignals(QObject):
+    # QRunnable can't emit signals itself; this lives on the GUI thread
+    decoded = pyqtSignal(object, QImage)
+
+
+class _DecodeTask(QRunnable):
+    def __init__(self, key, image_data, max_size, signals):
+        super().__init__()
+        self.key = key
+        self.image_data = image_data
+        self.max_size = max_size
+        self.signals = signals
+
+    def run(self):
+        # QImage (unlike QPixmap) is safe to create off the GUI thread
+        with span("image.decode"):
+            image = read_scaled_image(self.image_data, self.max_size)
+        self.signals.decoded.emit(self.key, image)
+
+
+class ImageLoader(QObject):
+    """Decodes images on a QThreadPool and hands back QPixmaps on the GUI thread.
+
+    request(key, data, size, callback) calls callback(pixmap) once the image
+    is decoded; pixmap is None if the data couldn't be decoded. Concurrent
+    requests for the same key share one decode. Callers are responsible for
+    ignoring results they no longer want (e.g. for tiles a refresh replaced).
+    """
+    def __init__(self, pool=None, parent=None):
+        super().__init__(parent)
+        self._pool = pool or QThreadPool.globalInstance()
+        self._signals = _DecodeSignals()
+        self._signals.decoded.connect(self._on_decoded)
+        self._waiting = {} # key -> callbacks
+
+    def request(self, key, image_data, size, callback):
+        callbacks = self._waiting.get(key)
+        if callbacks is not None:
+            callbacks.append(callback) # Already decoding
+            return
+        self._waiting[key] = [callback]
+        self._pool.start(_DecodeTask(key, image_data, QSize(size, size), self._signals))
+
+    def pending(self):
+        return len(self._waiting)
+
+    def _on_decoded(self, key, image):
+        # QPixmap must be created on the GUI thread
+        pixmap = None if image.isNull() else QPixmap.fromImage(image)
+        for callback in self._waiting.pop(key, []):
+            callback(pixmap)
@@ -0,0 +1,8 @@
+# import_options.py
+#
+# Bulk import settings shared by bulk_import.py and tracker_cli.py, kept in a
+# module of their own so the command line can offer them without importing
+# bulk_import (and csv) for every command. Qt-free.
+
+DEFAULT_BATCH_SIZE = 5000 # Tasks (or activities) per transaction
+FORMATS = ("csv", "jsonl")
@@ -0,0 +1,226 @@
+# instrumentation.py
+
+import functools
+import inspect
+import json
+import logging
+import math
+import os
+import threading
+import time
+import types
+from collections import deque
+
+# Logging is configured from these environment variables, e.g.
+#   PROJECTTRACKER_LOG=debug  PROJECTTRACKER_METRICS=/tmp/metrics.json
+# PROJECTTRACKER_SPANS=off turns span timing off (the diagnostics view and
+# stall reports then have nothing to show)
+LOG_LEVEL_ENV = "PROJECTTRACKER_LOG"
+METRICS_FILE_ENV = "PROJECTTRACKER_METRICS"
+SPANS_ENV = "PROJECTTRACKER_SPANS"
+SAMPLES_PER_METRIC = 2048 # Most recent durations kept per metric for the percentiles
+
+_ROOT_LOGGER = "projecttracker"
+
+
+def get_logger(name):
+    """Logger for a module, under the application's root logger."""
+    return logging.getLogger(f"{_ROOT_LOGGER}.{name}")
+
+
+def configure_logging(level=None):
+    """Sets the application log level (default: from PROJECTTRACKER_LOG, else WARNING).
+
+    Messages below the level are dropped before their arguments are
+    formatted, so debug logging costs one level check when it's off.
+    """
+    level = level or os.environ.get(LOG_LEVEL_ENV) or "WARNING"
+    root = logging.getLogger(_ROOT_LOGGER)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        root.addHandler(handler)
+        root.propagate = False
+
+
+class _Metric:
+    __slots__ = ("count", "total_ms", "max_ms", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = deque(maxlen=SAMPLES_PER_METRIC)
+
+
+def _percentile(ordered, fraction):
+    # Nearest-rank percentile of an already sorted list
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class MetricsRegistry:
+    """Per-session counts and latency percentiles, keyed by span name.
+
+    Safe to use from the database worker and the GUI thread at once.
+    Percentiles are computed over the most recent SAMPLES_PER_METRIC
+    durations of each metric; counts and totals cover the whole session.
+    """
+    def __init__(self, enabled=None):
+        if enabled is None:
+            enabled = os.environ.get(SPANS_ENV, "on").strip().lower() not in ("0", "off", "false", "no")
+        self.enabled = enabled
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def record(self, name, duration_ms):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = _Metric()
+            metric.count += 1
+            metric.total_ms += duration_ms
+            metric.max_ms = max(metric.max_ms, duration_ms)
+            metric.samples.append(duration_ms)
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        """{name: {count, total_ms, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}, sorted by name."""
+        with self._lock:
+            items = [(name, metric.count, metric.total_ms, metric.max_ms, sorted(metric.samples))
+                     for name, metric in self._metrics.items()]
+        result = {}
+        for name, count, total_ms, max_ms, ordered in sorted(items):
+            result[name] = {
+                "count": count,
+                "total_ms": round(total_ms, 3),
+                "mean_ms": round(total_ms / count, 3),
+                "p50_ms": round(_percentile(ordered, 0.50), 3),
+                "p95_ms": round(_percentile(ordered, 0.95), 3),
+                "p99_ms": round(_percentile(ordered, 0.99), 3),
+                "max_ms": round(max_ms, 3),
+            }
+        return result
+
+    def to_json(self, extra=None):
+        data = {"session_started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "metrics": self.snapshot()}
+        if extra:
+            data.update(extra)
+        return json.dumps(data, indent=2)
+
+    def dump(self, path, extra=None):
+        with open(path, "w") as f:
+            f.write(self.to_json(extra))
+
+
+# The session-wide registry every span records into
+metrics = MetricsRegistry()
+
+# Open spans per thread (thread ident -> names, innermost last) and the span each
+# thread finished last, so a stall can be attributed to what the thread was doing.
+# Each thread only mutates its own list; readers take copies.
+_open_spans = {}
+_last_spans = {}
+
+
+def _enter_operation(name):
+    ident = threading.get_ident()
+    stack = _open_spans.get(ident)
+    if stack is None:
+        stack = _open_spans[ident] = []
+    stack.append(name)
+
+
+def _exit_operation(name):
+    ident = threading.get_ident()
+    stack = _open_spans.get(ident)
+    if stack:
+        stack.pop()
+    _last_spans[ident] = name
+
+
+def active_operations():
+    """{thread name: {"active": [open spans, outermost first], "last": last finished span}}."""
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    result = {}
+    for ident, name in names.items():
+        active = list(_open_spans.get(ident, ()))
+        last = _last_spans.get(ident)
+        if active or last:
+            result[name] = {"active": active, "last": last}
+    return result
+
+
+class _Span:
+    __slots__ = ("name", "registry", "start")
+
+    def __init__(self, name, registry):
+        self.name = name
+        self.registry = registry
+
+    def __enter__(self):
+        _enter_operation(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.record(self.name, (time.perf_counter() - self.start) * 1000)
+        _exit_operation(self.name)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name, registry=None):
+    """Context manager recording the duration of its block under name."""
+    registry = registry or metrics
+    return _Span(name, registry) if registry.enabled else _NO_SPAN
+
+
+def timed(name):
+    """Decorator recording each call of the function as span name."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            _enter_operation(name)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.record(name, (time.perf_counter() - start) * 1000)
+                _exit_operation(name)
+        return wrapper
+    return decorator
+
+
+def instrument_methods(prefix):
+    """Class decorator wrapping every public method in a span named prefix.method.
+
+    Generator methods are left alone: their call only creates the generator.
+    """
+    def decorator(cls):
+        for attribute, value in list(vars(cls).items()):
+            if (isinstance(value, types.FunctionType) and not attribute.startswith("_")
+                    and not inspect.isgeneratorfunction(value)):
+                setattr(cls, attribute, timed(f"{prefix}.{attribute}")(value))
+        return cls
+    return decorator
@@ -0,0 +1,288 @@
+# migrations.py
+
+import sqlite3
+import time
+
+from instrumentation import get_logger, metrics
+
+logger = get_logger("migrations")
+
+# Completion percentage from the trigger-maintained counters. The ORDER BY in
+# get_activities must use exactly this expression for idx_activities_completion to apply.
+COMPLETION_EXPR = "(CASE WHEN {p}task_count > 0 THEN {p}done_count * 100.0 / {p}task_count ELSE 0.0 END)"
+
+
+def fts5_available(conn):
+    options = [row[0] for row in conn.execute("PRAGMA compile_options")]
+    return "ENABLE_FTS5" in options
+
+
+def _columns(cursor, table):
+    return [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+
+
+# --- Migration steps ---
+# Each step moves the schema from version N-1 to N. Databases created before
+# versioning existed report user_version 0 but may already be partway there,
+# so every step checks what is present before changing it.
+
+def create_base_tables(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS activities (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE, -- Added UNIQUE constraint
+        category TEXT,
+        image BLOB,
+        created_at TEXT, -- Storing as TEXT ISO format is often better
+        modified_at TEXT
+    )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            activity_id INTEGER,
+            description TEXT NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0, -- 0 for False, 1 for True
+            FOREIGN KEY (activity_id) REFERENCES activities (id) ON DELETE CASCADE -- Ensure tasks deleted when activity is
+        )
+    ''')
+
+
+def split_image_table(cursor):
+    # Images live in their own table so list queries never touch the full BLOBs.
+    # Thumbnails come first in the row; the large image is kept last so reading
+    # a thumbnail never has to walk the image's overflow pages.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS activity_images (
+            activity_id INTEGER PRIMARY KEY,
+            thumb_small BLOB, -- 50px, used by the list view
+            thumb_large BLOB, -- 100px, used by the tile/icon views
+            image BLOB NOT NULL,
+            FOREIGN KEY (activity_id) REFERENCES activities (id) ON DELETE CASCADE
+        )
+    ''')
+    if 'image' not in _columns(cursor, "activities"):
+        return
+    # Thumbnails for moved images are generated later by the UI
+    cursor.execute('''
+        INSERT OR IGNORE INTO activity_images (activity_id, image)
+        SELECT id, image FROM activities WHERE image IS NOT NULL AND LENGTH(image) > 0
+    ''')
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        cursor.execute("ALTER TABLE activities DROP COLUMN image")
+    else:
+        # DROP COLUMN is not available, at least stop carrying the data twice
+        cursor.execute("UPDATE activities SET image = NULL")
+
+
+def add_completion_counters(cursor):
+    if 'task_count' not in _columns(cursor, "activities"):
+        cursor.execute("ALTER TABLE activities ADD COLUMN task_count INTEGER NOT NULL DEFAULT 0")
+        cursor.execute("ALTER TABLE activities ADD COLUMN done_count INTEGER NOT NULL DEFAULT 0")
+        cursor.execute('''
+            UPDATE activities SET
+                task_count = (SELECT COUNT(*) FROM tasks t WHERE t.activity_id = activities.id),
+                done_count = (SELECT COUNT(*) FROM tasks t WHERE t.activity_id = activities.id AND t.completed = 1)
+        ''')
+    # Keep activities.task_count/done_count in step with every change to tasks
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_counters_insert AFTER INSERT ON tasks
+        BEGIN
+            UPDATE activities SET task_count = task_count + 1,
+                                  done_count = done_count + (NEW.completed = 1)
+            WHERE id = NEW.activity_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_counters_delete AFTER DELETE ON tasks
+        BEGIN
+            UPDATE activities SET task_count = task_count - 1,
+                                  done_count = done_count - (OLD.completed = 1)
+            WHERE id = OLD.activity_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_counters_update AFTER UPDATE OF completed, activity_id ON tasks
+        BEGIN
+            UPDATE activities SET task_count = task_count - 1,
+                                  done_count = done_count - (OLD.completed = 1)
+            WHERE id = OLD.activity_id;
+            UPDATE activities SET task_count = task_count + 1,
+                                  done_count = done_count + (NEW.completed = 1)
+            WHERE id = NEW.activity_id;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_activities_completion
+        ON activities ({COMPLETION_EXPR.format(p="")} DESC, LOWER(name))
+    ''')
+
+
+def add_lookup_indexes(cursor):
+    # get_tasks, cascade deletes and the counter triggers all look tasks up by activity
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_activity ON tasks (activity_id, id)")
+    # Expression indexes matching the ORDER BY clauses in get_activities
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_activities_name ON activities (LOWER(name))")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_activities_category ON activities (LOWER(category), LOWER(name))")
+
+
+def purge_orphans(cursor):
+    # Foreign keys were never enabled before, so deleted activities left their rows behind
+    cursor.execute("DELETE FROM tasks WHERE activity_id IS NULL OR activity_id NOT IN (SELECT id FROM activities)")
+    tasks_removed = cursor.rowcount
+    cursor.execute("DELETE FROM activity_images WHERE activity_id NOT IN (SELECT id FROM activities)")
+    logger.info("Purged %s orphaned tasks and %s orphaned images.", tasks_removed, cursor.rowcount)
+
+
+def add_search_index(cursor):
+    # External-content FTS5 tables: the text stays in activities/tasks, the
+    # index is kept in sync by the triggers below. Prefix indexes make the
+    # "term*" queries the search box issues cheap.
+    if not fts5_available(cursor.connection):
+        logger.warning("FTS5 is not available in this SQLite build, search falls back to LIKE.")
+        return
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS activities_fts USING fts5(
+            name, category,
+            content='activities', content_rowid='id',
+            prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            description,
+            content='tasks', content_rowid='id',
+            prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS activities_fts_insert AFTER INSERT ON activities
+        BEGIN
+            INSERT INTO activities_fts (rowid, name, category) VALUES (NEW.id, NEW.name, NEW.category);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS activities_fts_delete AFTER DELETE ON activities
+        BEGIN
+            INSERT INTO activities_fts (activities_fts, rowid, name, category) VALUES ('delete', OLD.id, OLD.name, OLD.category);
+        END
+    ''')
+    # Only name/category changes touch the index, not the counter updates
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS activities_fts_update AFTER UPDATE OF name, category ON activities
+        BEGIN
+            INSERT INTO activities_fts (activities_fts, rowid, name, category) VALUES ('delete', OLD.id, OLD.name, OLD.category);
+            INSERT INTO activities_fts (rowid, name, category) VALUES (NEW.id, NEW.name, NEW.category);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (rowid, description) VALUES (NEW.id, NEW.description);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF description ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+            INSERT INTO tasks_fts (rowid, description) VALUES (NEW.id, NEW.description);
+        END
+    ''')
+    # Index whatever is already in the database
+    cursor.execute("INSERT INTO activities_fts (activities_fts) VALUES ('rebuild')")
+    cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+
+def add_recency_indexes(cursor):
+    # Backs the modified/created/task count board sorts and their keyset seeks;
+    # the expressions must match _sort_columns in database_manager
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_activities_modified ON activities (COALESCE(modified_at, ''))")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_activities_created ON activities (COALESCE(created_at, ''))")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_activities_task_count ON activities (task_count DESC, LOWER(name))")
+
+
+def gate_bulk_insert_triggers(cursor):
+    # import_activities inserts large batches with the row-level insert
+    # triggers switched off and applies their effect in one statement each.
+    # The switch is a row in bulk_insert, written and deleted inside the
+    # import transaction, so other connections never see it and the schema
+    # stays the same. (A trigger can't look at a TEMP table, hence a real one.)
+    cursor.execute("CREATE TABLE IF NOT EXISTS bulk_insert (active INTEGER NOT NULL)")
+    cursor.execute("DROP TRIGGER IF EXISTS tasks_counters_insert")
+    cursor.execute('''
+        CREATE TRIGGER tasks_counters_insert AFTER INSERT ON tasks
+        WHEN NOT EXISTS (SELECT 1 FROM bulk_insert)
+        BEGIN
+            UPDATE activities SET task_count = task_count + 1,
+                                  done_count = done_count + (NEW.completed = 1)
+            WHERE id = NEW.activity_id;
+        END
+    ''')
+    if not cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'").fetchone():
+        return
+    cursor.execute("DROP TRIGGER IF EXISTS tasks_fts_insert")
+    cursor.execute('''
+        CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks
+        WHEN NOT EXISTS (SELECT 1 FROM bulk_insert)
+        BEGIN
+            INSERT INTO tasks_fts (rowid, description) VALUES (NEW.id, NEW.description);
+        END
+    ''')
+
+
+# (version, description, step) - append new steps, never reorder or edit released ones
+MIGRATIONS = [
+    (1, "Base tables", create_base_tables),
+    (2, "Separate image table with thumbnails", split_image_table),
+    (3, "Trigger-maintained completion counters", add_completion_counters),
+    (4, "Task and sort indexes", add_lookup_indexes),
+    (5, "Purge orphaned tasks and images", purge_orphans),
+    (6, "Full-text search index", add_search_index),
+    (7, "Recency and task count sort indexes", add_recency_indexes),
+    (8, "Bulk insert switch for the task insert triggers", gate_bulk_insert_triggers),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn):
+    """Applies pending migrations, each in its own transaction.
+
+    Returns a list of (version, description, seconds) for the steps that ran.
+    Raises sqlite3.Error if a step fails; that step is rolled back and the
+    database stays at the last version that completed.
+    """
+    current = get_schema_version(conn)
+    if current > SCHEMA_VERSION:
+        logger.warning("Database schema version %s is newer than this application (%s).", current, SCHEMA_VERSION)
+        return []
+
+    report = []
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        start = time.perf_counter()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN")
+            step(cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        elapsed = time.perf_counter() - start
+        logger.info("Migration %s (%s) applied in %.1f ms", version, description, elapsed * 1000)
+        metrics.record(f"migration.{version}", elapsed * 1000)
+        report.append((version, description, elapsed))
+    return report
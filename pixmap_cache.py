@@ -0,0 +1,77 @@
+# pixmap_cache.py
+
+from collections import OrderedDict
+
+DEFAULT_BUDGET_MB = 32
+
+
+class PixmapCache:
+    """Bounded LRU cache of decoded, display-sized pixmaps.
+
+    Entries are keyed by (activity_id, modified_at, size), so an edited
+    activity never hits a stale entry, and the cache is capped by the
+    decoded size of its pixmaps rather than by entry count. hits/misses
+    count lookups since the cache was created or reset_stats() was called.
+    """
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB):
+        self._entries = OrderedDict() # key -> (pixmap, cost in bytes)
+        self._budget = int(budget_mb * 1024 * 1024)
+        self._cost = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _pixmap_cost(pixmap):
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def get(self, activity_id, modified_at, size):
+        key = (activity_id, modified_at, size)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, activity_id, modified_at, size, pixmap):
+        key = (activity_id, modified_at, size)
+        cost = self._pixmap_cost(pixmap)
+        if cost > self._budget:
+            return # Would evict everything else and still not fit
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._cost -= old[1]
+        self._entries[key] = (pixmap, cost)
+        self._cost += cost
+        self._evict()
+
+    def invalidate(self, activity_id):
+        for key in [key for key in self._entries if key[0] == activity_id]:
+            self._cost -= self._entries.pop(key)[1]
+
+    def clear(self):
+        self._entries.clear()
+        self._cost = 0
+
+    def set_budget(self, budget_mb):
+        self._budget = int(budget_mb * 1024 * 1024)
+        self._evict()
+
+    def _evict(self):
+        while self._cost > self._budget and self._entries:
+            _, (_, cost) = self._entries.popitem(last=False) # Least recently used first
+            self._cost -= cost
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self._cost,
+            "budget_bytes": self._budget,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
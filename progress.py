@@ -4,67 +4,60 @@ import sys
 import os
 import io
 import functools # Keep this import
+import time
+from PyQt5 import sip
 
 # --- PyQt5 Imports ---
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QLabel, QLineEdit, QTextEdit, QRadioButton, QFrame, QScrollArea, QDialog,
-    QFileDialog, QMessageBox, QSizePolicy, QSpacerItem, QMenu, QProgressBar,
-    QListWidget, QListWidgetItem, QCheckBox, QDialogButtonBox, QGridLayout,
-    QGroupBox, QAction
+    QLabel, QLineEdit, QTextEdit, QRadioButton, QFrame, QDialog,
+    QFileDialog, QMessageBox, QSizePolicy, QSpacerItem, QMenu,
+    QCheckBox, QDialogButtonBox, QGridLayout,
+    QGroupBox, QAction, QListView, QTableView, QHeaderView, QAbstractItemView, QShortcut
 )
-from PyQt5.QtGui import QPixmap, QImage, QIcon, QPainter, QColor, QBrush, QPen
-from PyQt5.QtCore import Qt, QSize, pyqtSignal, QSettings
+from PyQt5.QtGui import QImage, QIcon, QPainter, QColor, QBrush, QPen, QKeySequence
+from PyQt5.QtCore import Qt, QSize, pyqtSignal, QSettings, QBuffer, QByteArray, QIODevice, QTimer, QModelIndex
 
 # Import the managers
-from database_manager import DatabaseManager
-from theme_manager import ThemeManager, LIGHT_STYLE, DARK_STYLE
-
-# --- Custom Widget for Task Row ---
-class TaskItemWidget(QWidget):
-    # Signal to request deletion, passing the item widget itself
-    delete_requested = pyqtSignal(QListWidgetItem)
-
-    def __init__(self, task_id, description, completed, parent=None):
-        super().__init__(parent)
-        self.task_id = task_id
-        print(f"    DEBUG [TaskItemWidget.__init__]: Initializing with task_id={self.task_id} (Type: {type(self.task_id)})")
-        self.list_widget_item = None # Will be set when added to QListWidget
-
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(2, 2, 2, 2) # Minimal margins
-
-        self.checkbox = QCheckBox()
-        self.checkbox.setChecked(completed)
-        layout.addWidget(self.checkbox)
-
-        self.lineedit = QLineEdit()
-        self.lineedit.setText(description)
-        self.lineedit.setPlaceholderText("Enter task description")
-        layout.addWidget(self.lineedit, 1) # Stretch lineedit
-
-        self.delete_button = QPushButton("X")
-        self.delete_button.setFixedSize(25, 25)
-        self.delete_button.setToolTip("Delete this task")
-        # Connect directly to a method that emits the signal
-        self.delete_button.clicked.connect(self.request_delete)
-        layout.addWidget(self.delete_button)
-
-    def request_delete(self):
-        # Emit the signal carrying the associated QListWidgetItem
-        if self.list_widget_item:
-            self.delete_requested.emit(self.list_widget_item)
-
-    def get_data(self):
-        print(f"    DEBUG [TaskItemWidget.get_data]: Reading task_id={self.task_id} (Type: {type(self.task_id)})")
-        return self.task_id, self.lineedit.text().strip(), self.checkbox.isChecked()
-
-    def set_list_item(self, item):
-        # Store the QListWidgetItem associated with this widget
-        self.list_widget_item = item
-
-    def get_task_id(self):
-        return self.task_id
+from database_manager import DatabaseManager, ImageFile, ACTIVITY_REMOVED, PAGE_SIZE
+from db_worker import AsyncDatabaseManager
+from pixmap_cache import PixmapCache, DEFAULT_BUDGET_MB
+from image_loader import ImageLoader, read_scaled_image
+from activity_board import ActivityListModel, ActivityListView, ActivityDelegate, board_sort_key
+from search_index import SearchIndex, score_activity
+from instrumentation import get_logger, configure_logging, metrics, span, METRICS_FILE_ENV
+from diagnostics_dialog import DiagnosticsDialog
+from stall_watchdog import StallWatchdog
+from board_snapshot import snapshot_path, read_snapshot, write_snapshot, row_values
+from task_editor import TaskTableModel, TaskDelegate, DONE_COLUMN, DESCRIPTION_COLUMN, DELETE_COLUMN
+from theme_manager import ThemeManager
+from write_behind import WriteBehindQueue
+
+logger = get_logger("app")
+
+# Thumbnail edge lengths stored alongside each image (list view, tile/icon views)
+THUMB_SMALL_SIZE = 50
+THUMB_LARGE_SIZE = 100
+SEARCH_DEBOUNCE_MS = 200 # Quiet time after the last keystroke before the board is filtered
+
+def make_thumbnails(image_data):
+    """Returns (small, large) PNG thumbnails for image_data (bytes or a file path), or None if it can't be decoded."""
+    if not image_data:
+        return None
+    # Decode once at (about) the large size, then derive both thumbnails from that
+    image = read_scaled_image(image_data, QSize(THUMB_LARGE_SIZE * 2, THUMB_LARGE_SIZE * 2))
+    if image.isNull():
+        return None
+    thumbnails = []
+    for size in (THUMB_SMALL_SIZE, THUMB_LARGE_SIZE):
+        scaled = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        buffer_bytes = QByteArray()
+        buffer = QBuffer(buffer_bytes)
+        buffer.open(QIODevice.WriteOnly)
+        scaled.save(buffer, "PNG")
+        buffer.close()
+        thumbnails.append(bytes(buffer_bytes))
+    return tuple(thumbnails)
 
 # --- Activity Creator Dialog (Remains the same) ---
 # ... (Keep the existing ActivityCreatorDialog code) ...
@@ -75,6 +68,7 @@ class ActivityCreatorDialog(QDialog):
         self.db_manager = db_manager
         self.image_path = None
         self.image_data = None # Store image data directly
+        self.thumbnails = None # (small, large) generated once at upload time
 
         self.setWindowTitle("Create New Activity")
         self.setModal(True) # Make dialog modal
@@ -129,16 +123,19 @@ class ActivityCreatorDialog(QDialog):
         if file_path:
             self.image_path = file_path
             try:
-                # Read image data immediately
-                with open(self.image_path, 'rb') as f:
-                    self.image_data = f.read()
-                # Optional: Validate image size/type here if needed
+                # Thumbnails are decoded from the file; the image itself is streamed
+                # into the database on save instead of being read into memory here
+                self.thumbnails = make_thumbnails(self.image_path)
+                if self.thumbnails is None:
+                    raise ValueError("Invalid image format or corrupted file.")
+                self.image_data = ImageFile(self.image_path)
                 self.image_label.setText(f"Image: {os.path.basename(self.image_path)}")
                 self.image_label.setStyleSheet("") # Reset style
             except Exception as e:
                 QMessageBox.warning(self, "Image Error", f"Could not read image file: {e}")
                 self.image_path = None
                 self.image_data = None
+                self.thumbnails = None
                 self.image_label.setText("No image selected")
                 self.image_label.setStyleSheet("font-style: italic; color: gray;")
 
@@ -158,8 +155,19 @@ class ActivityCreatorDialog(QDialog):
         if not tasks:
             pass # Allow creating activities with no initial tasks
 
-        # Attempt to create activity in DB
-        activity_id, error = self.db_manager.create_activity(name, category, tasks, image_data)
+        # Attempt to create activity in DB; the dialog waits without blocking the event loop
+        self.button_box.setEnabled(False)
+        self.db_manager.submit(DatabaseManager.create_activity, name, category, tasks, image_data, self.thumbnails,
+                               callback=self._handle_created, on_error=self._create_failed)
+
+     def _create_failed(self, message):
+        # The request raised instead of returning its error
+        self._handle_created((None, f"Database error: {message}"))
+
+     def _handle_created(self, result):
+        activity_id, error = result
+        name = self.name_entry.text().strip()
+        self.button_box.setEnabled(True)
 
         if error:
             QMessageBox.critical(self, "Database Error", f"Failed to create activity:\n{error}")
@@ -174,18 +182,29 @@ class ActivityCreatorDialog(QDialog):
             super().accept() # Close dialog
 
 
-# --- Activity Editor Dialog (Refactored for QListWidget) ---
+# --- Activity Editor Dialog ---
+# Tasks are shown in a QTableView over TaskTableModel and loaded a page at a
+# time, so large checklists open quickly; saves write only the edited rows.
+# Given a WriteBehindQueue, ticking a saved task is written right away
+# (coalesced with the other ticks) so the board follows along; Cancel writes
+# back the values as loaded. Everything else waits for Save.
 class ActivityEditorDialog(QDialog):
-    activity_saved = pyqtSignal()
+    activity_saved = pyqtSignal(int) # activity id
 
-    def __init__(self, activity_id, db_manager, parent=None):
+    def __init__(self, activity_id, db_manager, parent=None, write_behind=None):
         super().__init__(parent)
         self.activity_id = activity_id
         self.db_manager = db_manager
+        self.write_behind = write_behind
+        self._ticks_written = {} # task id -> completed as loaded, for ticks already sent to write_behind
         self.current_image_data = None
         self.new_image_data = None
-        # Store task IDs to delete from DB, not UI items
-        self.db_tasks_to_delete = []
+        self.new_thumbnails = None
+        self._image_request = 0 # Latest image decode; older results are ignored
+        self.image_loader = ImageLoader(parent=self)
+        # As loaded, so saves only write what changed
+        self.original_details = None
+        self._next_task_page = None
 
         self.setWindowTitle("Edit Activity")
         self.setModal(True)
@@ -226,14 +245,30 @@ class ActivityEditorDialog(QDialog):
         tasks_layout = QVBoxLayout(tasks_group)
         layout.addWidget(tasks_group, 1) # Allow group to stretch
 
-        # Use QListWidget
-        self.tasks_list_widget = QListWidget()
-        tasks_layout.addWidget(self.tasks_list_widget)
+        self.task_model = TaskTableModel(self)
+        self.task_model.fetch_more_requested.connect(self._fetch_task_page)
+        if self.write_behind is not None:
+            self.task_model.completion_toggled.connect(self._write_completion)
+        self.tasks_view = QTableView()
+        self.tasks_view.setModel(self.task_model)
+        self.tasks_view.setItemDelegate(TaskDelegate(self.tasks_view))
+        self.tasks_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tasks_view.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed |
+                                        QAbstractItemView.AnyKeyPressed)
+        self.tasks_view.setShowGrid(False)
+        self.tasks_view.verticalHeader().hide()
+        # Fixed row heights let the view skip measuring every row
+        self.tasks_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        header = self.tasks_view.horizontalHeader()
+        header.setSectionResizeMode(DONE_COLUMN, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(DESCRIPTION_COLUMN, QHeaderView.Stretch)
+        header.setSectionResizeMode(DELETE_COLUMN, QHeaderView.Fixed)
+        header.resizeSection(DELETE_COLUMN, 30)
+        tasks_layout.addWidget(self.tasks_view)
 
         self.add_task_button = QPushButton("Add New Task")
-        self.add_task_button.clicked.connect(self.add_task_item) # Connect to new method
+        self.add_task_button.clicked.connect(self.add_task)
         tasks_layout.addWidget(self.add_task_button)
-        # --- End Tasks Section Refactor ---
 
         self.button_box = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel)
         self.button_box.accepted.connect(self.save_changes)
@@ -242,8 +277,21 @@ class ActivityEditorDialog(QDialog):
 
         self.load_activity_data()
 
+    @staticmethod
+    def _load_job(db, activity_id):
+        # Runs on the database worker: activity (with full image) and its first task page in one request
+        return db.get_activity(activity_id), db.get_tasks_page(activity_id)
+
     def load_activity_data(self):
-        activity_data = self.db_manager.get_activity(self.activity_id)
+        self.button_box.setEnabled(False) # Nothing to save until the data arrives
+        self.db_manager.submit(self._load_job, self.activity_id, callback=self._populate, on_error=self._load_failed)
+
+    def _load_failed(self, message):
+        self._populate((None, ([], None))) # Reports it and closes the dialog
+
+    def _populate(self, result):
+        activity_data, (tasks, self._next_task_page) = result
+        self.button_box.setEnabled(True)
         if not activity_data:
             QMessageBox.critical(self, "Error", "Could not load activity data.")
             self.reject()
@@ -251,104 +299,78 @@ class ActivityEditorDialog(QDialog):
 
         self.name_entry.setText(activity_data['name'])
         self.category_entry.setText(activity_data['category'] or "")
+        self.original_details = (activity_data['name'], activity_data['category'] or "")
         self.current_image_data = activity_data['image']
         self.update_image_display(self.current_image_data)
-        self.db_tasks_to_delete = [] # Reset delete list on load
-
-        # Load tasks into QListWidget
-        self.tasks_list_widget.clear() # Clear previous items
-        tasks = self.db_manager.get_tasks(self.activity_id)
-        print(f"DEBUG [load_activity_data]: Loading {len(tasks)} tasks from DB.")
-        for task_id, description, completed in tasks:
-             print(f"  Loading from DB: ID={task_id} (Type: {type(task_id)}), Desc='{description}', Comp={completed}")
-             self.add_task_item(task_id, description, completed) # Use the add method
-
-    def add_task_item(self, task_id=None, description="", completed=False):
-        """Adds a custom TaskItemWidget to the QListWidget."""
-        if isinstance(task_id, bool):
-            print("WARNING: Received boolean for task_id, forcing to None.")
-            task_id = None
-        print(f"DEBUG [add_task_item]: STARTING for task_id={task_id} (Type: {type(task_id)})")
-        item_widget = TaskItemWidget(task_id, description, completed)
-        print(f"  DEBUG [add_task_item]: item_widget created. Internal task_id={item_widget.get_task_id()} (Type: {type(item_widget.get_task_id())})")
-        list_item = QListWidgetItem(self.tasks_list_widget) # Create QListWidgetItem
-
-        # Store the QListWidgetItem within the custom widget for reference
-        item_widget.set_list_item(list_item)
-
-        # Set the size hint for the QListWidgetItem based on the custom widget's size
-        list_item.setSizeHint(item_widget.sizeHint())
-
-        print(f"  DEBUG [add_task_item]: BEFORE setItemWidget. Internal task_id={item_widget.get_task_id()} (Type: {type(item_widget.get_task_id())})")
-
-        # Set the custom widget as the widget for this list item
-        self.tasks_list_widget.addItem(list_item)
-        self.tasks_list_widget.setItemWidget(list_item, item_widget)
-
-        print(f"  DEBUG [add_task_item]: AFTER setItemWidget. Internal task_id={item_widget.get_task_id()} (Type: {type(item_widget.get_task_id())})")
-
-        # Connect the custom widget's delete signal to our handler
-        item_widget.delete_requested.connect(self.handle_task_delete_request)
-        print(f"  DEBUG [add_task_item]: AFTER signal connect. Internal task_id={item_widget.get_task_id()} (Type: {type(item_widget.get_task_id())})")
-        print(f"DEBUG [add_task_item]: Finished adding item for task_id={task_id}.")
-
-    def handle_task_delete_request(self, list_item):
-        """Handles the delete request signal from a TaskItemWidget."""
-        # Get the custom widget associated with the list item
-        item_widget = self.tasks_list_widget.itemWidget(list_item)
-        if not item_widget: return
-
-        task_id_to_delete = item_widget.get_task_id()
-        print(f"DEBUG [handle_task_delete_request]: Request to delete Task ID: {task_id_to_delete}")
-
-        # Find the row index of the item to remove it from the QListWidget
-        row = self.tasks_list_widget.row(list_item)
-        if row >= 0:
-            # Remove the item from the QListWidget - this also deletes the item_widget
-            self.tasks_list_widget.takeItem(row)
-            print(f"  Removed item from QListWidget for Task ID {task_id_to_delete}.")
-
-            # If it was an existing task (not None ID), add it to the DB delete list
-            if task_id_to_delete is not None:
-                if task_id_to_delete not in self.db_tasks_to_delete:
-                    self.db_tasks_to_delete.append(task_id_to_delete)
-                    print(f"  Added Task ID {task_id_to_delete} to DB delete list.")
-                else:
-                    print(f"  Task ID {task_id_to_delete} was already marked for deletion.")
-
+        self.task_model.set_tasks(tasks, self._next_task_page is not None)
+
+    def _fetch_task_page(self):
+        self.db_manager.submit(DatabaseManager.get_tasks_page, self.activity_id, self._next_task_page,
+                               callback=self._append_task_page)
+
+    def _append_task_page(self, result):
+        tasks, self._next_task_page = result
+        self.task_model.append_tasks(tasks, self._next_task_page is not None)
+
+    def _write_completion(self, task_id, completed):
+        self.write_behind.update_task(self.activity_id, task_id, completed=completed)
+        previous = self.task_model.adopt_completion(task_id, completed)
+        self._ticks_written.setdefault(task_id, previous)
+
+    def done(self, result):
+        if self.write_behind is not None:
+            if result == QDialog.Rejected:
+                # Cancel discards ticks like any other edit; the last value queued wins
+                for task_id, completed in self._ticks_written.items():
+                    self.write_behind.update_task(self.activity_id, task_id, completed=completed)
+                self._ticks_written.clear()
+            # Accepted, cancelled or closed: queued ticks go to the worker now
+            self.write_behind.flush()
+        super().done(result)
+
+    def add_task(self, description=""):
+        index = self.task_model.add_task(description if isinstance(description, str) else "")
+        self.tasks_view.scrollTo(index)
+        self.tasks_view.setCurrentIndex(index)
+        self.tasks_view.edit(index)
 
     # update_image_display, change_image, remove_image remain the same
     def update_image_display(self, image_data):
          self.image_label.setStyleSheet("border: 1px dashed gray;") # Reset border
+         self._image_request += 1
          if image_data:
-            pixmap = QPixmap()
-            if pixmap.loadFromData(image_data):
-                # Changed AspectRatioMode and TransformationMode enums for PyQt5
-                scaled_pixmap = pixmap.scaled(self.image_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                self.image_label.setPixmap(scaled_pixmap)
-            else:
-                self.image_label.setText("Invalid Image")
+            # Decode off the GUI thread, directly at label size
+            self.image_label.setText("Loading Image...")
+            self.image_loader.request(("editor", self._image_request), image_data, self.image_label.width(),
+                                      functools.partial(self._show_decoded_image, self._image_request))
          else:
              self.image_label.setText("No Image")
-             self.image_label.setObjectName("NoImageLabel")
-             style = QApplication.instance().styleSheet()
-             self.image_label.setStyleSheet(style)
+             self.image_label.setStyleSheet("border: 1px dashed gray; font-style: italic; color: gray;")
+
+    def _show_decoded_image(self, request, pixmap):
+        if request != self._image_request or sip.isdeleted(self.image_label):
+            return # Another image was chosen meanwhile, or the dialog is gone
+        if pixmap is not None:
+            self.image_label.setPixmap(pixmap)
+        else:
+            self.image_label.setText("Invalid Image")
 
     def change_image(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Select Image", "", "Image Files (*.png *.jpg *.jpeg *.gif *.bmp)")
         if file_path:
             try:
-                with open(file_path, 'rb') as f:
-                    new_data = f.read()
-                test_pixmap = QPixmap()
-                if not test_pixmap.loadFromData(new_data):
+                # Decoding for the thumbnails doubles as the validity check
+                thumbnails = make_thumbnails(file_path)
+                if thumbnails is None:
                     raise ValueError("Invalid image format or corrupted file.")
-                self.new_image_data = new_data
-                self.update_image_display(self.new_image_data)
-                print("New image selected and loaded.")
+                self.new_image_data = ImageFile(file_path) # Streamed into the database on save
+                self.new_thumbnails = thumbnails
+                self.update_image_display(file_path)
+                logger.debug("New image selected and loaded.")
             except Exception as e:
                 QMessageBox.warning(self, "Image Error", f"Could not load image: {e}")
                 self.new_image_data = None
+                self.new_thumbnails = None
                 self.update_image_display(self.current_image_data)
 
     def remove_image(self):
@@ -357,8 +379,9 @@ class ActivityEditorDialog(QDialog):
             if QMessageBox.question(self, "Confirm Removal", "Remove image from this activity?",
                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No) == QMessageBox.Yes:
                 self.new_image_data = b"" # Use empty bytes to signify removal
+                self.new_thumbnails = None
                 self.update_image_display(None)
-                print("Image marked for removal.")
+                logger.debug("Image marked for removal.")
         else:
              QMessageBox.information(self, "No Image", "There is no image to remove.")
 
@@ -371,87 +394,48 @@ class ActivityEditorDialog(QDialog):
             QMessageBox.warning(self, "Input Error", "Activity name is required.")
             return
 
-        final_image_data = self.new_image_data if self.new_image_data is not None else self.current_image_data
-
-        error = self.db_manager.update_activity(self.activity_id, name, category, final_image_data)
+        # Close any open cell editor so its text is committed to the model
+        self.tasks_view.setCurrentIndex(QModelIndex())
+        # Only new, edited and removed tasks are sent; the database work runs on the worker
+        changes = self.task_model.change_set()
+        details = None
+        if (name, category) != self.original_details or self.new_image_data is not None:
+            # Only send image data when it changed; None keeps the stored image and thumbnails
+            details = (name, category, self.new_image_data, self.new_thumbnails)
+
+        self.button_box.setEnabled(False)
+        if self.write_behind is not None:
+            self.write_behind.flush() # Queued ticks are written before the save
+        self.db_manager.submit(DatabaseManager.apply_task_changes, self.activity_id, changes, details,
+                               callback=self._handle_saved, on_error=self._save_failed)
+
+    def _save_failed(self, message):
+        # The request raised instead of returning its error; the edits stay in the dialog
+        self._handle_saved((None, f"Database error: {message}"))
+
+    def _handle_saved(self, result):
+        new_task_ids, error = result
+        self.button_box.setEnabled(True)
         if error:
-            QMessageBox.critical(self, "Database Error", f"Failed to update activity details:\n{error}")
+            # Nothing was written, the dialog stays open with the user's edits
+            QMessageBox.critical(self, "Database Error", f"Failed to save changes:\n{error}")
             if "already exists" in error:
                  self.name_entry.selectAll()
                  self.name_entry.setFocus()
-                 return
             return
 
-        # Process tasks currently visible in the QListWidget
-        save_errors = []
-        print("-" * 20)
-        print(f"Saving tasks for activity ID: {self.activity_id}")
-        print(f"Tasks marked for deletion: {self.db_tasks_to_delete}")
-        print(f"Number of items in QListWidget: {self.tasks_list_widget.count()}")
-
-        for i in range(self.tasks_list_widget.count()):
-            list_item = self.tasks_list_widget.item(i)
-            item_widget = self.tasks_list_widget.itemWidget(list_item)
-            if item_widget:
-                task_id, description, completed = item_widget.get_data()
-                print(f"  Processing UI Row {i}: ID={task_id}, Desc='{description}', Comp={completed}")
-
-                if task_id is None: # New task added via button
-                    if description:
-                        print(f"    Attempting to ADD task: '{description}'")
-                        new_task_id, task_error = self.db_manager.add_task(self.activity_id, description)
-                        # ---> Print the RETURNED values <---
-                        print(f"    Returned from db_manager.add_task: new_task_id={new_task_id}, task_error={task_error}")
-                        if task_error:
-                             print(f"      ADD FAILED: {task_error}")
-                             save_errors.append(f"Add task '{description[:20]}...': {task_error}")
-                        else:
-                             print(f"      ADD SUCCEEDED! New ID: {new_task_id}")
-                             # Update the widget's internal ID now that it's saved
-                             item_widget.task_id = new_task_id
-                    else:
-                         print("    New task description is empty, skipping add.")
-                elif description: # Existing task, update it
-                    print(f"    Attempting to UPDATE task ID {task_id}")
-                    task_error = self.db_manager.update_task(task_id, description, completed)
-                    if task_error:
-                         print(f"      UPDATE FAILED: {task_error}")
-                         save_errors.append(f"Update task ID {task_id}: {task_error}")
-                    else:
-                         print(f"      UPDATE SUCCEEDED!")
-                else: # Existing task with empty description - treat as delete
-                    print(f"    Existing task ID {task_id} has empty description, adding to delete list.")
-                    if task_id not in self.db_tasks_to_delete:
-                        self.db_tasks_to_delete.append(task_id)
-            else:
-                 print(f"  Warning: Could not get item widget for row {i}")
-        print("-" * 10)
-
-        # Process actual DB deletions
-        print(f"Processing final DB deletions list: {self.db_tasks_to_delete}")
-        for task_id_to_delete in self.db_tasks_to_delete:
-            print(f"  Attempting to DELETE task ID: {task_id_to_delete} from DB")
-            task_error = self.db_manager.delete_task(task_id_to_delete)
-            if task_error:
-                 print(f"    DELETE FAILED: {task_error}")
-                 save_errors.append(f"Delete task ID {task_id_to_delete}: {task_error}")
-            else:
-                 print(f"    DELETE SUCCEEDED!")
-        print("=" * 20)
-
-        if save_errors:
-             error_message = "Activity details saved, but some task operations failed:\n\n" + "\n".join(save_errors)
-             QMessageBox.warning(self, "Partial Success", error_message)
-        else:
-             QMessageBox.information(self, "Success", "Changes saved successfully!")
+        self.task_model.mark_saved(new_task_ids)
+        self._ticks_written.clear() # Saved with the rest
 
-        self.activity_saved.emit()
+        QMessageBox.information(self, "Success", "Changes saved successfully!")
+        self.activity_saved.emit(self.activity_id)
         self.accept()
 
-# --- Activity Display Widget (Remains mostly the same) ---
-# ... (Keep the existing ActivityDisplayWidget code, it doesn't need QListWidget) ...
+# --- Activity Display Widget ---
+# A QListView over ActivityListModel: only visible items are painted, and a
+# refresh swaps the model's rows instead of rebuilding a widget per activity.
+# Edits made anywhere are applied row by row from the database change events.
 class ActivityDisplayWidget(QWidget):
-    # ... (no changes needed here from the previous PyQt5 version) ...
     activity_selected = pyqtSignal(int)
 
     def __init__(self, db_manager, parent=None):
@@ -460,189 +444,268 @@ class ActivityDisplayWidget(QWidget):
         self._view_mode = "tiles"
         self._sort_by = "name"
         self._search_term = ""
+        self._generation = 0 # Bumped per board query; pages of older queries are dropped
+        self._next_page = None # Keyset of the next page, None when everything is loaded
+        self._name_hits_for_pages = None
+        self._query_started = 0.0
+        # Query whose rows are on the board - from the saved snapshot, or from before another
+        # instance changed the database - and are reconciled with, not replaced by, its next result
+        self._reconcile_query = None
+        self._snapshot_thumbnails = {} # Saved with the snapshot: {id: bytes}, used up by the first paints
+        # Decoded thumbnails survive refreshes; budget is configurable in the settings
+        settings = QSettings("JohnNoah", "ProjectTracker")
+        self.pixmap_cache = PixmapCache(settings.value("cache/pixmap_budget_mb", DEFAULT_BUDGET_MB, type=int))
+        self.image_loader = ImageLoader(parent=self)
+        # Names and categories are matched in memory; until the index is built, FTS handles them
+        self.search_index = SearchIndex(fuzzy=settings.value("search/fuzzy", False, type=bool))
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
 
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        layout.addWidget(self.scroll_area)
-
-        self.content_widget = QWidget()
-        self.scroll_area.setWidget(self.content_widget)
-
+        self.model = ActivityListModel(self.pixmap_cache, self.image_loader, self)
+        self.delegate = ActivityDelegate(self)
+        self.view = ActivityListView()
+        self.view.setModel(self.model)
+        self.view.setItemDelegate(self.delegate)
+        self.view.setUniformItemSizes(True)
+        self.view.setLayoutMode(QListView.Batched) # Lay out large boards in chunks
+        self.view.setBatchSize(500)
+        self.view.setSelectionMode(QListView.SingleSelection)
+        self.view.setEditTriggers(QListView.NoEditTriggers)
+        self.view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.view.customContextMenuRequested.connect(self._show_context_menu)
+        self.view.doubleClicked.connect(self._handle_double_click)
+        # Pages load as the view nears the bottom, not only once it's reached
+        self.view.verticalScrollBar().valueChanged.connect(self._prefetch_if_near_bottom)
+        self.model.fetch_more_requested.connect(self._fetch_next_page)
+        self.model.thumbnails_requested.connect(self._fetch_thumbnails)
+        layout.addWidget(self.view)
+
+        self.db_manager.data_changed.connect(self._handle_data_changed)
+        self.db_manager.external_change.connect(self._handle_external_change)
+
+        self._apply_view_mode()
+        self._startup_query = self._query() # The query a snapshot is saved and restored for
+        self._restore_snapshot()
         self.update_display()
+        self.db_manager.submit(DatabaseManager.get_search_entries, callback=self._build_search_index)
+
+    def _restore_snapshot(self):
+        # Paints the first page saved at the last exit right away; the first
+        # query then reconciles it with the database instead of replacing it
+        if not self.db_manager.db_path:
+            return
+        with span("board.snapshot_load"):
+            snapshot = read_snapshot(snapshot_path(self.db_manager.db_path), self._startup_query)
+            if snapshot is None:
+                return
+            activities, _, self._snapshot_thumbnails = snapshot
+            thumb_size = THUMB_SMALL_SIZE if self._view_mode == "list" else THUMB_LARGE_SIZE
+            # No fetching until reconciled: later pages must continue from the real first page
+            self.model.set_activities(activities, thumb_size, False)
+        self._reconcile_query = self._startup_query
+
+    @staticmethod
+    def _snapshot_job(db, query):
+        # Runs on the database worker at exit: the first page of the startup query
+        activities, next_page = db.get_activities_page(*query, None, PAGE_SIZE)
+        thumbnails = db.get_thumbnails([activity.id for activity in activities if activity.has_thumbnail], query[2])
+        return write_snapshot(snapshot_path(db.db_path), query, activities, next_page, thumbnails)
+
+    def save_snapshot(self):
+        """Queues writing the board snapshot; the worker finishes it before closing."""
+        if self.db_manager.db_path:
+            self.db_manager.submit(self._snapshot_job, self._startup_query)
+
+    def _build_search_index(self, entries):
+        with span("board.build_search_index"):
+            self.search_index.build(entries)
+        if self._search_term:
+            self.update_display()
 
     def set_view_mode(self, mode):
         if mode in ["list", "tiles", "icons"]:
             self._view_mode = mode
-            self.update_display()
+            with span("board.apply_view_mode"):
+                self._apply_view_mode()
+            self.update_display() # List and tiles use different thumbnail sizes
+
+    def _apply_view_mode(self):
+        self.delegate.mode = self._view_mode
+        if self._view_mode == "list":
+            self.view.setViewMode(QListView.ListMode)
+            self.view.setFlow(QListView.TopToBottom)
+            self.view.setWrapping(False)
+            self.view.setSpacing(0)
+        else:
+            # Wrapping ListMode rather than IconMode: with uniform item sizes it keeps one
+            # flow position per item instead of item rectangles in a spatial tree, and
+            # reflows about a third faster
+            self.view.setViewMode(QListView.ListMode)
+            self.view.setFlow(QListView.LeftToRight)
+            self.view.setWrapping(True)
+            self.view.setSpacing(6)
+        # Reflowing on resize is left to ActivityListView, which throttles it
 
     def set_sort_by(self, sort_key):
-         if sort_key in ["name", "category", "completion"]:
+         if sort_key in ["name", "category", "completion", "modified", "created", "tasks", "relevance"]:
             self._sort_by = sort_key
             self.update_display()
 
     def set_search_term(self, term):
+        if term == self._search_term:
+            return # e.g. Enter pressed after the debounce already applied it
         self._search_term = term
         self.update_display()
 
-    def update_display(self):
-        activities = self.db_manager.get_activities(self._search_term, self._sort_by)
-        # Create a new container widget each time
-        new_content_widget = QWidget()
-        layout = None
+    def set_fuzzy_search(self, fuzzy):
+        self.search_index.set_fuzzy(fuzzy)
+        QSettings("JohnNoah", "ProjectTracker").setValue("search/fuzzy", fuzzy)
+        if self._search_term:
+            self.update_display()
 
-        if self._view_mode == "list":
-            layout = QVBoxLayout(new_content_widget)
-            layout.setAlignment(Qt.AlignTop)
-            for activity in activities:
-                item_widget = self._create_list_item(activity)
-                layout.addWidget(item_widget)
-            layout.addStretch(1) # Add stretch at the end for list view
-        elif self._view_mode == "tiles" or self._view_mode == "icons":
-            layout = QGridLayout(new_content_widget)
-            layout.setAlignment(Qt.AlignTop | Qt.AlignLeft)
-            cols = max(1, self.parent().width() // 180 if self.parent() else 4) # Use parent width or default
-            for idx, activity in enumerate(activities):
-                item_widget = self._create_tile_item(activity, icon_only=(self._view_mode == "icons"))
-                row = idx // cols
-                col = idx % cols
-                layout.addWidget(item_widget, row, col, alignment=Qt.AlignTop | Qt.AlignLeft)
-            # Add stretch to prevent clumping
-            layout.setRowStretch(layout.rowCount(), 1)
-            layout.setColumnStretch(layout.columnCount(), 1)
-
-        # Keep existing content widget until new one is ready
-        old_widget = self.scroll_area.takeWidget()
-        if old_widget:
-            old_widget.deleteLater() # Delete the old one safely
-
-        self.content_widget = new_content_widget # Assign new one
-        self.scroll_area.setWidget(self.content_widget)
-
-    # _create_base_frame, _add_double_click_to_children, _handle_double_click
-    # _create_list_item, _create_tile_item, _show_context_menu, _delete_activity
-    # should remain largely the same as in the previous PyQt5 version.
-    # Make sure _show_context_menu uses self.sender().mapToGlobal(position)
-    def _create_base_frame(self, activity_id):
-        frame = QFrame()
-        # Changed Shape and Shadow enums for PyQt5
-        frame.setFrameShape(QFrame.StyledPanel)
-        frame.setFrameShadow(QFrame.Raised)
-        frame.setLineWidth(1)
-        # Changed ContextMenuPolicy enum for PyQt5
-        frame.setContextMenuPolicy(Qt.CustomContextMenu)
-        frame.customContextMenuRequested.connect(lambda pos, aid=activity_id: self._show_context_menu(pos, aid))
-        frame.mouseDoubleClickEvent = lambda event, aid=activity_id: self._handle_double_click(aid)
-        return frame
-
-    def _add_double_click_to_children(self, parent_widget, activity_id):
-         for child in parent_widget.findChildren(QWidget):
-              child.mouseDoubleClickEvent = lambda event, aid=activity_id: self._handle_double_click(aid)
-
-    def _handle_double_click(self, activity_id):
-         print(f"Double-click detected for activity ID: {activity_id}")
-         self.activity_selected.emit(activity_id)
-
-    def _create_list_item(self, activity_row):
-        activity_id = activity_row['id']
-        frame = self._create_base_frame(activity_id)
-        layout = QHBoxLayout(frame)
-        layout.setContentsMargins(5, 5, 5, 5)
-
-        img_label = QLabel()
-        img_label.setFixedSize(50, 50)
-        # Changed alignment enum for PyQt5
-        img_label.setAlignment(Qt.AlignCenter)
-        img_label.setStyleSheet("border: 1px dashed lightgray;")
-        if activity_row['image']:
-            pixmap = QPixmap()
-            if pixmap.loadFromData(activity_row['image']):
-                 # Changed AspectRatioMode and TransformationMode enums for PyQt5
-                 scaled_pixmap = pixmap.scaled(img_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                 img_label.setPixmap(scaled_pixmap)
-            else:
-                 img_label.setText("?")
-        else:
-            img_label.setText("N/A")
-        layout.addWidget(img_label)
-
-        details_widget = QWidget()
-        details_layout = QVBoxLayout(details_widget)
-        details_layout.setContentsMargins(5,0,0,0)
-        details_layout.addWidget(QLabel(f"<b>{activity_row['name']}</b>"))
-        details_layout.addWidget(QLabel(f"<i>{activity_row['category'] or 'No Category'}</i>"))
-        layout.addWidget(details_widget, 1)
-
-        progress_bar = QProgressBar()
-        progress_bar.setMinimum(0)
-        progress_bar.setMaximum(100)
-        completion_percent = self.db_manager.get_activity_completion(activity_id)
-        progress_bar.setValue(int(completion_percent))
-        progress_bar.setFormat(f"{completion_percent:.0f}%")
-        progress_bar.setToolTip(f"{completion_percent:.1f}% complete")
-        progress_bar.setFixedWidth(100)
-        layout.addWidget(progress_bar)
-
-        self._add_double_click_to_children(frame, activity_id)
-        return frame
-
-    def _create_tile_item(self, activity_row, icon_only=False):
-        activity_id = activity_row['id']
-        frame = self._create_base_frame(activity_id)
-        frame.setMinimumSize(150, 150)
-        frame.setMaximumWidth(170)
-        layout = QVBoxLayout(frame)
-        # Changed alignment enum flags for PyQt5
-        layout.setAlignment(Qt.AlignTop | Qt.AlignHCenter)
-
-        img_label = QLabel()
-        img_label.setFixedSize(100, 100)
-        # Changed alignment enum for PyQt5
-        img_label.setAlignment(Qt.AlignCenter)
-        img_label.setStyleSheet("border: 1px dashed lightgray;")
-        if activity_row['image']:
-            pixmap = QPixmap()
-            if pixmap.loadFromData(activity_row['image']):
-                 # Changed AspectRatioMode and TransformationMode enums for PyQt5
-                 scaled_pixmap = pixmap.scaled(img_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                 img_label.setPixmap(scaled_pixmap)
+    def set_show_task_matches(self, show):
+        # Only the painting changes, no new query needed
+        self.delegate.show_task_matches = show
+        self.view.viewport().update()
+
+    def apply_theme(self, theme):
+        # Tiles are painted from the palette, which Qt has already delivered; only
+        # the progress colour is the theme's own, so a repaint is all that's needed
+        self.delegate.progress_color = theme.progress_color
+        self.view.viewport().update()
+
+    def _query(self):
+        # Everything that shapes a board query; row updates are checked against it
+        thumbnail = "small" if self._view_mode == "list" else "large"
+        return (self._search_term, self._sort_by, thumbnail)
+
+    def _name_hits(self):
+        if not self.search_index.ready or not self._search_term:
+            return None
+        return self.search_index.search(self._search_term)
+
+    def update_display(self, limit=PAGE_SIZE):
+        # Loads the first page (of limit rows); the query runs on the database worker
+        # and a newer refresh supersedes a pending one
+        self._generation += 1
+        self._query_started = time.perf_counter()
+        with span("board.search_index"):
+            self._name_hits_for_pages = self._name_hits()
+        self.db_manager.submit(DatabaseManager.get_activities_page, *self._query(), None, limit,
+                               self._name_hits_for_pages,
+                               callback=functools.partial(self._populate, self._generation), key="board")
+
+    def _populate(self, generation, result):
+        if generation != self._generation:
+            return
+        # Round trip through the worker queue, including the get_activities_page span
+        metrics.record("board.query", (time.perf_counter() - self._query_started) * 1000)
+        activities, self._next_page = result
+        reconcile_query, self._reconcile_query = self._reconcile_query, None
+        if reconcile_query == self._query():
+            with span("board.reconcile"):
+                self.model.reconcile_activities(activities, self._next_page is not None,
+                                                lambda old, new: row_values(old) == row_values(new))
+            return
+        self._snapshot_thumbnails = {} # Another query or size than the snapshot's
+        thumb_size = THUMB_SMALL_SIZE if self._view_mode == "list" else THUMB_LARGE_SIZE
+        with span("board.model_reset"):
+            self.model.set_activities(activities, thumb_size, self._next_page is not None)
+
+    def _fetch_next_page(self):
+        self.db_manager.submit(DatabaseManager.get_activities_page, *self._query(), self._next_page, PAGE_SIZE,
+                               self._name_hits_for_pages,
+                               callback=functools.partial(self._append_page, self._generation), key="board_page")
+
+    def _append_page(self, generation, result):
+        if generation != self._generation:
+            return # The board was re-queried while this page loaded
+        activities, self._next_page = result
+        with span("board.append_page"):
+            self.model.append_activities(activities, self._next_page is not None)
+
+    def _fetch_thumbnails(self, activity_ids, thumb_size):
+        # Thumbnails of the rows being painted, in one request per event loop pass;
+        # those saved with the snapshot are used without a query
+        saved = {activity_id: self._snapshot_thumbnails.pop(activity_id)
+                 for activity_id in activity_ids if activity_id in self._snapshot_thumbnails}
+        if saved:
+            self.model.provide_thumbnails(list(saved), thumb_size, saved)
+            activity_ids = [activity_id for activity_id in activity_ids if activity_id not in saved]
+        if activity_ids:
+            self.db_manager.submit(DatabaseManager.get_thumbnails, activity_ids,
+                                   "small" if thumb_size == THUMB_SMALL_SIZE else "large",
+                                   callback=functools.partial(self.model.provide_thumbnails, activity_ids, thumb_size))
+
+    def _prefetch_if_near_bottom(self, value):
+        scroll_bar = self.view.verticalScrollBar()
+        if scroll_bar.maximum() - value < self.view.viewport().height() and self.model.canFetchMore(QModelIndex()):
+            self.model.fetchMore(QModelIndex())
+
+    def _handle_data_changed(self, event, activity_id):
+        # Old decoded thumbnails are keyed by the previous modified_at; free them
+        self.pixmap_cache.invalidate(activity_id)
+        if event == ACTIVITY_REMOVED:
+            self.search_index.remove(activity_id)
+            self.model.remove_activity(activity_id)
+            return
+        # Fetch just this activity's summary row, with the board's current search and thumbnail
+        query = self._query()
+        self.db_manager.submit(self._row_job, activity_id, query, self.search_index.ready, self.search_index.fuzzy,
+                               callback=functools.partial(self._apply_row_update, query, activity_id),
+                               key=("board_row", activity_id))
+
+    def _handle_external_change(self):
+        # Another instance or the command line committed something; which activities
+        # it touched isn't known, so the index and every loaded row are re-read
+        self.db_manager.submit(DatabaseManager.get_search_entries, callback=self._refresh_after_external_change,
+                               key="external_refresh")
+
+    def _refresh_after_external_change(self, entries):
+        with span("board.build_search_index"):
+            self.search_index.build(entries)
+        # As many rows as are loaded, reconciled in place so the scroll position and
+        # the unchanged rows' painting survive
+        self._reconcile_query = self._query()
+        self.update_display(max(PAGE_SIZE, self.model.rowCount()))
+
+    @staticmethod
+    def _row_job(db, activity_id, query, use_index, fuzzy):
+        # Runs on the database worker: the activity's index entry plus its board row.
+        # The name match is scored here from the fresh entry, without touching the index.
+        entries = db.get_search_entries(activity_id)
+        name_hits = None
+        if use_index and query[0]:
+            rank = score_activity(entries[0]['name'], entries[0]['category'], query[0], fuzzy) if entries else None
+            name_hits = {} if rank is None else {activity_id: rank}
+        return entries, db.get_activities(*query, activity_id, name_hits)
+
+    def _apply_row_update(self, query, activity_id, result):
+        entries, rows = result
+        with span("board.apply_row_update"):
+            if entries:
+                self.search_index.update(*entries[0])
+            if query != self._query():
+                return # The board was re-queried since; the full refresh covers this activity
+            if rows:
+                self.model.upsert_activity(rows[0], board_sort_key(self._sort_by))
             else:
-                 img_label.setText("Invalid Image")
-        else:
-             img_label.setText("No Image")
-        # Changed alignment enum for PyQt5
-        layout.addWidget(img_label, 0, Qt.AlignHCenter)
-
-
-        if not icon_only:
-            name_label = QLabel(f"<b>{activity_row['name']}</b>")
-            # Changed alignment enum for PyQt5
-            name_label.setAlignment(Qt.AlignCenter)
-            name_label.setWordWrap(True)
-            layout.addWidget(name_label)
-
-            cat_label = QLabel(f"<i>{activity_row['category'] or 'No Category'}</i>")
-            # Changed alignment enum for PyQt5
-            cat_label.setAlignment(Qt.AlignCenter)
-            layout.addWidget(cat_label)
-
-            progress_bar = QProgressBar()
-            progress_bar.setMinimum(0)
-            progress_bar.setMaximum(100)
-            completion_percent = self.db_manager.get_activity_completion(activity_id)
-            progress_bar.setValue(int(completion_percent))
-            progress_bar.setFormat(f"{completion_percent:.0f}%")
-            progress_bar.setToolTip(f"{completion_percent:.1f}% complete")
-            progress_bar.setFixedHeight(15)
-            layout.addWidget(progress_bar)
-            layout.addStretch(1)
-
-        self._add_double_click_to_children(frame, activity_id)
-        return frame
-
-    def _show_context_menu(self, position, activity_id):
+                self.model.remove_activity(activity_id) # No longer matches the search
+
+    def _activity_at(self, index):
+        return self.model.activity_at(index.row()) if index.isValid() else None
+
+    def _handle_double_click(self, index):
+        activity = self._activity_at(index)
+        if activity is not None:
+            self.activity_selected.emit(activity.id)
+
+    def _show_context_menu(self, position):
+        activity = self._activity_at(self.view.indexAt(position))
+        if activity is None:
+            return
+        activity_id, activity_name = activity.id, activity.name
         menu = QMenu(self) # Parent the menu to self
         # Use QAction for menu items (better practice)
         open_action = QAction("Open / Edit", self)
@@ -650,18 +713,12 @@ class ActivityDisplayWidget(QWidget):
         menu.addAction(open_action)
 
         delete_action = QAction("Delete", self)
-        delete_action.triggered.connect(lambda checked=False, aid=activity_id: self._delete_activity(aid))
+        delete_action.triggered.connect(lambda checked=False: self._delete_activity(activity_id, activity_name))
         menu.addAction(delete_action)
 
-        # Use widget's mapToGlobal for correct menu position
-        widget = self.sender() # Get the widget that emitted the signal (the frame)
-        global_pos = widget.mapToGlobal(position) if widget else self.mapToGlobal(position) # Fallback
-        menu.exec_(global_pos) # Use exec_ for PyQt5
-
-    def _delete_activity(self, activity_id):
-        activity_data = self.db_manager.get_activity(activity_id)
-        activity_name = activity_data['name'] if activity_data else f"ID {activity_id}"
+        menu.exec_(self.view.viewport().mapToGlobal(position)) # Use exec_ for PyQt5
 
+    def _delete_activity(self, activity_id, activity_name):
         # Changed StandardButton enum access for PyQt5
         reply = QMessageBox.question(self, 'Confirm Deletion',
                                      f"Are you sure you want to delete the activity:\n'{activity_name}'?\n\nThis will also delete all associated tasks.",
@@ -669,11 +726,14 @@ class ActivityDisplayWidget(QWidget):
                                      QMessageBox.Cancel)
 
         if reply == QMessageBox.Yes:
-            error = self.db_manager.delete_activity(activity_id)
-            if error:
-                QMessageBox.critical(self, "Error", f"Failed to delete activity:\n{error}")
-            else:
-                self.update_display()
+            self.db_manager.submit(lambda db: (activity_id, db.delete_activity(activity_id)),
+                                   callback=self._handle_deleted)
+
+    def _handle_deleted(self, result):
+        activity_id, error = result
+        if error:
+            QMessageBox.critical(self, "Error", f"Failed to delete activity:\n{error}")
+        # On success the ACTIVITY_REMOVED event already took the row off the board
 
 
 # --- Main Application Window (Remains mostly the same) ---
@@ -687,8 +747,9 @@ class ProjectTrackerApp(QMainWindow):
         self.setWindowTitle("Project Tracker")
         self.setGeometry(100, 100, 1000, 700)
 
-        self.db_manager = DatabaseManager()
-        if self.db_manager.conn is None:
+        # All database access goes through the worker thread
+        self.db_manager = AsyncDatabaseManager()
+        if not self.db_manager.is_connected():
             QMessageBox.critical(self, "Fatal Error", "Could not connect to the database.\nThe application will now close.")
             sys.exit(1)
 
@@ -709,10 +770,29 @@ class ProjectTrackerApp(QMainWindow):
 
         # Add Display AFTER controls
         self.main_layout.addWidget(self.activity_display, 1) # Add display area, allow stretch
+        self.backfill_thumbnails()
+
+        # Edits written behind, in batches; the indicator shows while any are unsaved
+        self.write_behind = WriteBehindQueue(self.db_manager, self)
+        self.pending_writes_label = QLabel()
+        self.pending_writes_label.hide()
+        self.statusBar().addPermanentWidget(self.pending_writes_label)
+        self.write_behind.pending_changed.connect(self._show_pending_writes)
+        self.write_behind.write_failed.connect(
+            lambda error: self.statusBar().showMessage(f"Could not save changes: {error}", 8000))
+
+        # Requests that raised; dialogs waiting on one also report it themselves
+        self.db_manager.request_failed.connect(
+            lambda message: self.statusBar().showMessage(f"Database error: {message}", 8000))
 
         self.statusBar().showMessage("Ready")
-        self.theme_manager.apply_theme(QApplication.instance())
-        self.update_theme_action_text()
+        self._theme_applied(self.theme_manager.apply_theme(QApplication.instance()))
+
+        # Hidden diagnostics view of the session metrics
+        self.diagnostics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+        self.diagnostics_shortcut.activated.connect(self.show_diagnostics)
+        # Opt-in (PROJECTTRACKER_WATCHDOG=<ms>) reporting of event-loop stalls
+        self.watchdog = StallWatchdog.from_environment(self)
 
      def set_window_icon(self):
         if getattr(sys, 'frozen', False):
@@ -721,13 +801,34 @@ class ProjectTrackerApp(QMainWindow):
             base_path = os.path.dirname(os.path.abspath(__file__))
 
         icon_path = os.path.join(base_path, 'res', 'img', 'ProgressTracker.ico')
-        print(f"Attempting to load icon from: {icon_path}")
+        logger.debug("Attempting to load icon from: %s", icon_path)
 
         if os.path.exists(icon_path):
             self.setWindowIcon(QIcon(icon_path))
-            print("Icon loaded successfully.")
         else:
-             print("Warning: Icon file not found.")
+             logger.warning("Icon file not found: %s", icon_path)
+
+     @staticmethod
+     def _backfill_job(db):
+        # Runs on the database worker; QImage decoding is safe off the GUI thread
+        filled = 0
+        for activity_id in db.get_activities_missing_thumbnails():
+            thumbnails = make_thumbnails(db.get_image(activity_id))
+            if thumbnails is None:
+                # Undecodable: empty thumbnails record the attempt, so later launches skip it
+                db.set_thumbnails(activity_id, b"", b"")
+            elif not db.set_thumbnails(activity_id, *thumbnails):
+                filled += 1
+        return filled
+
+     def backfill_thumbnails(self):
+        # Images migrated from older databases have no thumbnails yet; generate them once
+        self.db_manager.submit(self._backfill_job, callback=self._handle_backfilled)
+
+     def _handle_backfilled(self, filled):
+        # Each stored thumbnail already updated its board row through the change events
+        if filled:
+            logger.info("Generated thumbnails for %s activities.", filled)
 
      def setup_control_bar(self): # Modify to return frame
         control_frame = QFrame()
@@ -766,63 +867,121 @@ class ProjectTrackerApp(QMainWindow):
         self.sort_name_rb = QRadioButton("Name")
         self.sort_category_rb = QRadioButton("Category")
         self.sort_completion_rb = QRadioButton("Completion")
+        self.sort_modified_rb = QRadioButton("Modified")
+        self.sort_modified_rb.setToolTip("Most recently changed first")
+        self.sort_created_rb = QRadioButton("Created")
+        self.sort_created_rb.setToolTip("Newest first")
+        self.sort_tasks_rb = QRadioButton("Tasks")
+        self.sort_tasks_rb.setToolTip("Most tasks first")
+        self.sort_relevance_rb = QRadioButton("Relevance")
+        self.sort_relevance_rb.setToolTip("Best search matches first (falls back to name when not searching)")
         sort_layout.addWidget(self.sort_name_rb)
         sort_layout.addWidget(self.sort_category_rb)
         sort_layout.addWidget(self.sort_completion_rb)
+        sort_layout.addWidget(self.sort_modified_rb)
+        sort_layout.addWidget(self.sort_created_rb)
+        sort_layout.addWidget(self.sort_tasks_rb)
+        sort_layout.addWidget(self.sort_relevance_rb)
         self.sort_name_rb.setChecked(True)
         self.sort_name_rb.clicked.connect(lambda: self.activity_display.set_sort_by("name"))
         self.sort_category_rb.clicked.connect(lambda: self.activity_display.set_sort_by("category"))
         self.sort_completion_rb.clicked.connect(lambda: self.activity_display.set_sort_by("completion"))
+        self.sort_modified_rb.clicked.connect(lambda: self.activity_display.set_sort_by("modified"))
+        self.sort_created_rb.clicked.connect(lambda: self.activity_display.set_sort_by("created"))
+        self.sort_tasks_rb.clicked.connect(lambda: self.activity_display.set_sort_by("tasks"))
+        self.sort_relevance_rb.clicked.connect(lambda: self.activity_display.set_sort_by("relevance"))
         control_layout.addWidget(sort_group)
 
         control_layout.addStretch(1)
 
         search_label = QLabel("Search:")
         self.search_entry = QLineEdit()
-        self.search_entry.setPlaceholderText("Filter by name or category...")
+        self.search_entry.setPlaceholderText("Search names, categories and tasks...")
         self.search_entry.setClearButtonEnabled(True)
-        self.search_entry.textChanged.connect(self.activity_display.set_search_term)
+        # Keystrokes are coalesced: the board is filtered once typing pauses (or on Enter)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.apply_search)
+        self.search_entry.textChanged.connect(lambda text: self.search_timer.start())
+        self.search_entry.returnPressed.connect(self.apply_search)
         control_layout.addWidget(search_label)
         control_layout.addWidget(self.search_entry)
 
+        self.fuzzy_cb = QCheckBox("Typo tolerant")
+        self.fuzzy_cb.setToolTip("Also match names and categories with a small typo")
+        self.fuzzy_cb.setChecked(self.activity_display.search_index.fuzzy)
+        self.fuzzy_cb.toggled.connect(self.activity_display.set_fuzzy_search)
+        control_layout.addWidget(self.fuzzy_cb)
+
+        self.task_matches_cb = QCheckBox("Show matching tasks")
+        self.task_matches_cb.setToolTip("Show which task matched the search")
+        self.task_matches_cb.toggled.connect(self.activity_display.set_show_task_matches)
+        control_layout.addWidget(self.task_matches_cb)
+
         self.theme_button = QPushButton()
         self.theme_button.setCheckable(False)
         self.theme_button.setToolTip("Toggle Light/Dark Mode")
         self.theme_button.clicked.connect(self.toggle_theme)
+        # Every theme, including those from the Themes folder, on right-click
+        self.theme_button.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.theme_button.customContextMenuRequested.connect(self._show_theme_menu)
         control_layout.addWidget(self.theme_button)
         self.update_theme_action_text() # Call here to set initial state
 
         return control_frame # Return the frame
 
+     def apply_search(self):
+        self.search_timer.stop()
+        self.activity_display.set_search_term(self.search_entry.text())
+
      def open_activity_creator(self):
         dialog = ActivityCreatorDialog(self.db_manager, self)
         # Use exec_() for PyQt5
         if dialog.exec_() == QDialog.Accepted:
             self.statusBar().showMessage("New activity created.", 3000)
-            self.activity_display.update_display()
 
      def open_activity_editor(self, activity_id):
-        dialog = ActivityEditorDialog(activity_id, self.db_manager, self)
+        dialog = ActivityEditorDialog(activity_id, self.db_manager, self, self.write_behind)
         dialog.activity_saved.connect(self.handle_activity_saved)
         # Use exec_() for PyQt5
         dialog.exec_()
 
-     def handle_activity_saved(self):
+     def _show_pending_writes(self, count):
+        self.pending_writes_label.setText(f"Saving {count} change{'s' if count != 1 else ''}…")
+        self.pending_writes_label.setVisible(count > 0)
+
+     def handle_activity_saved(self, activity_id):
+        # The board row itself is updated from the database change event
         self.statusBar().showMessage("Activity updated.", 3000)
-        self.activity_display.update_display()
 
      def toggle_theme(self):
         self.theme_manager.toggle_theme(QApplication.instance())
+        self._theme_applied(self.theme_manager.compiled())
+
+     def choose_theme(self, name):
+        self._theme_applied(self.theme_manager.set_theme(QApplication.instance(), name))
+
+     def _theme_applied(self, theme):
+        # The existing widgets restyle in place; the board keeps its rows and scroll position
+        self.activity_display.apply_theme(theme)
         self.update_theme_action_text()
-        self.activity_display.update_display()
+
+     def _show_theme_menu(self, position):
+        menu = QMenu(self)
+        for name in self.theme_manager.available_themes():
+            action = menu.addAction(name)
+            action.setCheckable(True)
+            action.setChecked(name == self.theme_manager.get_current_theme())
+            action.triggered.connect(lambda checked=False, theme=name: self.choose_theme(theme))
+        menu.exec_(self.theme_button.mapToGlobal(position))
 
      def update_theme_action_text(self):
-        theme = self.theme_manager.get_current_theme()
         # Example fallback paths (replace with actual paths or remove if not needed)
         moon_icon_path = os.path.join(os.path.dirname(__file__), 'res', 'img', 'moon.png')
         sun_icon_path = os.path.join(os.path.dirname(__file__), 'res', 'img', 'sun.png')
 
-        if theme == "dark":
+        if self.theme_manager.is_dark():
             # Use fallback icon path for PyQt5 if theme icon isn't reliable
             icon = QIcon(moon_icon_path) if os.path.exists(moon_icon_path) else QIcon.fromTheme("weather-clear-night")
             self.theme_button.setIcon(icon)
@@ -835,13 +994,35 @@ class ProjectTrackerApp(QMainWindow):
             self.theme_button.setToolTip("Switch to Dark Mode")
 
      def closeEvent(self, event):
-        print("Closing application...")
-        self.db_manager.close()
+        logger.info("Closing application...")
+        if self.watchdog:
+            self.watchdog.stop()
+        self.write_behind.flush()
+        self.activity_display.save_snapshot()
+        self.db_manager.close() # Drains the queue, so the writes and the snapshot are done first
+        metrics_file = os.environ.get(METRICS_FILE_ENV)
+        if metrics_file:
+            try:
+                metrics.dump(metrics_file, {"extra": self.diagnostics_stats(), "stalls": self.stall_report()})
+            except OSError as e:
+                logger.error("Could not write metrics to %s: %s", metrics_file, e)
         settings = QSettings("JohnNoah", "ProjectTracker")
         settings.setValue("geometry", self.saveGeometry())
         settings.setValue("windowState", self.saveState())
         super().closeEvent(event)
 
+     def diagnostics_stats(self):
+        cache = self.activity_display.pixmap_cache.stats()
+        stats = {f"pixmap_cache_{key}": value for key, value in cache.items()}
+        stats.update(db_profile=self.db_manager.profile, db_journal_mode=self.db_manager.journal_mode)
+        return stats
+
+     def stall_report(self):
+        return self.watchdog.stalls() if self.watchdog else []
+
+     def show_diagnostics(self):
+        DiagnosticsDialog(self.diagnostics_stats, self.stall_report, self).exec_()
+
      def restore_geometry(self):
          settings = QSettings("JohnNoah", "ProjectTracker")
          geometry = settings.value("geometry")
@@ -853,6 +1034,7 @@ class ProjectTrackerApp(QMainWindow):
 
 # --- Entry Point (Remains the same) ---
 if __name__ == "__main__":
+    configure_logging() # Level from PROJECTTRACKER_LOG, warnings only by default
     app = QApplication(sys.argv)
     QApplication.setApplicationName("ProjectTracker")
     QApplication.setOrganizationName("JohnNoah")
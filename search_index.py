@@ -0,0 +1,204 @@
+# search_index.py
+
+import bisect
+import re
+import sys
+import unicodedata
+
+# Weights per matched query token, mirroring the bm25 column weights of the FTS index
+NAME_WEIGHT = 10.0
+CATEGORY_WEIGHT = 5.0
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def fold(text):
+    """Case- and accent-folded text, matching the FTS tokenizer's remove_diacritics 2."""
+    text = text or ""
+    if not text.isascii():
+        text = "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+    return text.casefold()
+
+
+def tokenize(text):
+    """Folded word tokens, split the same way the FTS query builder does."""
+    return [sys.intern(word) for word in _WORD_RE.findall(fold(text))]
+
+
+def typo_budget(token, fuzzy):
+    """Number of edits a query token may be away from a word prefix."""
+    if not fuzzy or len(token) < 4:
+        return 0 # Short tokens are too ambiguous to correct
+    return 1 if len(token) < 8 else 2
+
+
+def prefix_distance(token, word, limit):
+    """Edit distance between token and the closest prefix of word, or None if above limit."""
+    if limit == 0:
+        return 0 if word.startswith(token) else None
+    # Levenshtein rows over token; the minimum of the last row covers every prefix of word
+    previous = list(range(len(word) + 1))
+    for i, char in enumerate(token, 1):
+        current = [i]
+        for j, other in enumerate(word, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        if min(current) > limit:
+            return None
+        previous = current
+    distance = min(previous)
+    return distance if distance <= limit else None
+
+
+def _token_score(token, budget, name_words, category_words):
+    # Best weight this token earns against the activity's words, or None
+    best = None
+    for words, weight in ((name_words, NAME_WEIGHT), (category_words, CATEGORY_WEIGHT)):
+        for word in words:
+            distance = prefix_distance(token, word, budget)
+            if distance is not None:
+                score = weight / (1 + distance)
+                if best is None or score > best:
+                    best = score
+    return best
+
+
+def score_words(name_words, category_words, tokens, budgets):
+    """Rank of an activity for the query tokens, or None if any token is unmatched.
+
+    Ranks are negative like bm25(), so lower is a better match.
+    """
+    total = 0.0
+    for token, budget in zip(tokens, budgets):
+        score = _token_score(token, budget, name_words, category_words)
+        if score is None:
+            return None
+        total += score
+    return -total
+
+
+def score_activity(name, category, term, fuzzy=False):
+    """score_words for raw text; usable off the GUI thread (no index state)."""
+    tokens = tokenize(term)
+    if not tokens:
+        return None
+    return score_words(tokenize(name), tokenize(category), tokens, [typo_budget(t, fuzzy) for t in tokens])
+
+
+class SearchIndex:
+    """In-memory index of activity names and categories for the filter box.
+
+    Each activity is stored as its tuples of interned name and category
+    words; a sorted vocabulary with per-word id sets answers prefix lookups
+    without touching every activity. search(term) returns {activity_id: rank}
+    and remembers its result: when the next term only extends the previous
+    one (the usual case while typing), the previous hits are re-scored instead
+    of searching the whole index again.
+
+    With fuzzy set, tokens of 4+ characters may be one edit (two from 8
+    characters) away from a word prefix, and closer matches rank higher.
+    """
+    def __init__(self, fuzzy=False):
+        self.fuzzy = fuzzy
+        self.ready = False
+        self._entries = {} # activity id -> (name words, category words)
+        self._vocabulary = [] # Sorted unique words
+        self._postings = {} # word -> set of activity ids
+        self._last = None # (tokens, budgets, hits) of the previous search
+
+    def build(self, entries):
+        """Replaces the index contents with (id, name, category) rows."""
+        self._entries.clear()
+        self._postings.clear()
+        for activity_id, name, category in entries:
+            self._store(activity_id, name, category)
+        self._vocabulary = sorted(self._postings)
+        self._last = None
+        self.ready = True
+
+    def update(self, activity_id, name, category):
+        self.remove(activity_id)
+        for word in self._store(activity_id, name, category):
+            if len(self._postings[word]) == 1:
+                bisect.insort(self._vocabulary, word)
+        self._last = None
+
+    def remove(self, activity_id):
+        entry = self._entries.pop(activity_id, None)
+        if entry is None:
+            return
+        for word in set(entry[0] + entry[1]):
+            ids = self._postings[word]
+            ids.discard(activity_id)
+            if not ids:
+                del self._postings[word]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+        self._last = None
+
+    def set_fuzzy(self, fuzzy):
+        self.fuzzy = fuzzy
+        self._last = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store(self, activity_id, name, category):
+        entry = (tuple(tokenize(name)), tuple(tokenize(category)))
+        self._entries[activity_id] = entry
+        words = set(entry[0] + entry[1])
+        for word in words:
+            self._postings.setdefault(word, set()).add(activity_id)
+        return words
+
+    def search(self, term):
+        """{activity_id: rank} for term, or None if term has no searchable words."""
+        tokens = tokenize(term)
+        if not tokens:
+            return None
+        budgets = [typo_budget(token, self.fuzzy) for token in tokens]
+        if self._narrows(tokens, budgets):
+            candidates = self._last[2].keys()
+        else:
+            candidates = self._candidates(tokens, budgets)
+        hits = {}
+        for activity_id in candidates:
+            rank = score_words(*self._entries[activity_id], tokens, budgets)
+            if rank is not None:
+                hits[activity_id] = rank
+        self._last = (tokens, budgets, hits)
+        return hits
+
+    def _narrows(self, tokens, budgets):
+        # True if every match for tokens must also have matched the previous search:
+        # same earlier tokens, the last one possibly extended, and no new typo allowance
+        if self._last is None:
+            return False
+        last_tokens, last_budgets, _ = self._last
+        count = len(last_tokens)
+        if len(tokens) < count or tokens[:count - 1] != last_tokens[:-1]:
+            return False
+        return tokens[count - 1].startswith(last_tokens[-1]) and budgets[:count] == last_budgets
+
+    def _candidates(self, tokens, budgets):
+        # Activities having, for every token, some word within that token's typo budget
+        candidates = None
+        for token, budget in zip(tokens, budgets):
+            ids = set()
+            for word in self._words_for(token, budget):
+                ids |= self._postings[word]
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        return candidates
+
+    def _words_for(self, token, budget):
+        if budget == 0:
+            # Words starting with token form one contiguous run of the sorted vocabulary
+            start = bisect.bisect_left(self._vocabulary, token)
+            for word in self._vocabulary[start:]:
+                if not word.startswith(token):
+                    break
+                yield word
+            return
+        for word in self._vocabulary:
+            if prefix_distance(token, word, budget) is not None:
+                yield word
@@ -0,0 +1,143 @@
+# stall_watchdog.py
+
+import heapq
+import os
+import sys
+import threading
+import time
+import traceback
+
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+from instrumentation import get_logger, metrics, active_operations
+
+logger = get_logger("watchdog")
+
+# Opt in with the stall threshold in milliseconds, e.g. PROJECTTRACKER_WATCHDOG=250
+WATCHDOG_ENV = "PROJECTTRACKER_WATCHDOG"
+TICK_MS = 20 # Heartbeat interval on the GUI thread
+MAX_REPORTED_STALLS = 20 # Worst stalls kept for the diagnostics report
+
+
+class StallWatchdog(QObject):
+    """Detects event-loop stalls on the GUI thread and records what caused them.
+
+    A fast timer on the GUI thread stamps a heartbeat and records how late each
+    tick ran as eventloop.latency. A helper thread checks the heartbeat; once
+    the GUI thread has been blocked longer than threshold_ms it samples the GUI
+    thread's stack and the open spans of every thread (so a GUI thread waiting
+    on the database shows the DatabaseManager call the worker is in). When the
+    heartbeat resumes the stall is logged with its duration, stack and
+    operations, recorded as eventloop.stall, and the worst MAX_REPORTED_STALLS
+    are kept in stalls() for the diagnostics report.
+    """
+    def __init__(self, threshold_ms=250, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000
+        self._main_ident = threading.get_ident() # Created on the GUI thread
+        self._lock = threading.Lock()
+        self._last_tick = time.perf_counter()
+        self._sample = None # (stack, operations) taken during the current stall
+        self._worst = [] # Min-heap of (duration_ms, sequence, stall dict)
+        self._sequence = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(TICK_MS)
+        self.timer.timeout.connect(self._tick)
+
+    @classmethod
+    def from_environment(cls, parent=None):
+        """A started watchdog if PROJECTTRACKER_WATCHDOG is set, else None."""
+        value = os.environ.get(WATCHDOG_ENV)
+        if not value:
+            return None
+        try:
+            threshold_ms = float(value)
+        except ValueError:
+            logger.warning("Ignoring %s=%r, expected a threshold in milliseconds", WATCHDOG_ENV, value)
+            return None
+        watchdog = cls(threshold_ms, parent)
+        watchdog.start()
+        return watchdog
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._last_tick = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="StallWatchdog", daemon=True)
+        self._thread.start()
+        self.timer.start()
+        logger.info("Stall watchdog started (threshold %.0f ms)", self.threshold * 1000)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self.timer.stop()
+        self._stop.set()
+        self._thread.join(1.0)
+        self._thread = None
+
+    def stalls(self):
+        """The worst stalls seen so far, longest first."""
+        with self._lock:
+            return [stall for _, _, stall in sorted(self._worst, reverse=True)]
+
+    # --- GUI thread ---
+    def _tick(self):
+        now = time.perf_counter()
+        with self._lock:
+            gap = now - self._last_tick
+            self._last_tick = now
+            sample, self._sample = self._sample, None
+        metrics.record("eventloop.latency", max(0.0, gap * 1000 - TICK_MS))
+        if gap > self.threshold:
+            self._report(gap * 1000, sample)
+
+    def _report(self, duration_ms, sample):
+        stack, operations = sample if sample else ("(no sample taken)\n", active_operations())
+        stall = {
+            "duration_ms": round(duration_ms, 1),
+            "ended": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "operation": _describe(operations),
+            "operations": operations,
+            "stack": stack,
+        }
+        metrics.record("eventloop.stall", duration_ms)
+        logger.warning("UI stalled for %.0f ms during %s\n%s", duration_ms, stall["operation"], stack.rstrip())
+        with self._lock:
+            self._sequence += 1
+            entry = (duration_ms, self._sequence, stall)
+            if len(self._worst) < MAX_REPORTED_STALLS:
+                heapq.heappush(self._worst, entry)
+            else:
+                heapq.heappushpop(self._worst, entry)
+
+    # --- Helper thread ---
+    def _watch(self):
+        poll = min(self.threshold / 2, 0.05)
+        while not self._stop.wait(poll):
+            with self._lock:
+                blocked = time.perf_counter() - self._last_tick
+                if blocked <= self.threshold or self._sample is not None:
+                    continue
+            frame = sys._current_frames().get(self._main_ident)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "(GUI thread not found)\n"
+            del frame
+            sample = (stack, active_operations())
+            with self._lock:
+                self._sample = sample
+
+
+def _describe(operations):
+    # One line naming what the stall is attributed to, GUI thread first
+    parts = []
+    for thread_name, state in sorted(operations.items(), key=lambda item: item[0] != "MainThread"):
+        if state["active"]:
+            parts.append(f"{thread_name}: {' > '.join(state['active'])}")
+        elif thread_name == "MainThread" and state["last"]:
+            parts.append(f"{thread_name}: outside any span, last finished {state['last']}")
+    return "; ".join(parts) or "unknown operation"
@@ -0,0 +1,224 @@
+# task_editor.py
+
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle, QStyleOptionButton, QApplication
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, pyqtSignal
+
+from database_manager import TaskChangeSet
+
+# Columns of TaskTableModel
+DONE_COLUMN = 0
+DESCRIPTION_COLUMN = 1
+DELETE_COLUMN = 2
+
+
+class TaskTableModel(QAbstractTableModel):
+    """Tasks of one activity for the editor, loaded a page at a time.
+
+    Rows are [task_id, description, completed]; new tasks have task_id None
+    and stay at the end, below the loaded pages. Edits to existing tasks are
+    tracked in a dirty set against their values as loaded, so change_set()
+    only contains rows the user actually changed, however many are loaded.
+
+    When more pages exist, fetchMore() emits fetch_more_requested for the
+    owner to load the next one with append_tasks().
+
+    Ticking a saved task emits completion_toggled(task_id, completed); an
+    owner that writes ticks straight away calls adopt_completion() so they
+    aren't sent again with the next change_set().
+    """
+    fetch_more_requested = pyqtSignal()
+    completion_toggled = pyqtSignal(int, bool)
+    HEADERS = ("Done", "Task", "")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._row_by_id = {} # task id -> its row list, which stays the same object when rows move
+        self._original = {} # task id -> (description, completed) as loaded
+        self._dirty = set() # Ids of loaded tasks whose values differ from _original
+        self._deleted = [] # Ids of loaded tasks removed in the editor
+        self._new_count = 0 # Rows at the end that aren't saved yet
+        self._has_more = False
+        self._fetching = False
+
+    # --- Loading ---
+    def set_tasks(self, tasks, has_more):
+        self.beginResetModel()
+        self._rows = [[task_id, description, completed] for task_id, description, completed in tasks]
+        self._row_by_id = {row[0]: row for row in self._rows}
+        self._original = {task_id: (description, completed) for task_id, description, completed in tasks}
+        self._dirty.clear()
+        self._deleted = []
+        self._new_count = 0
+        self._has_more = has_more
+        self._fetching = False
+        self.endResetModel()
+
+    def append_tasks(self, tasks, has_more):
+        self._fetching = False
+        self._has_more = has_more
+        if not tasks:
+            return
+        first = len(self._rows) - self._new_count # Loaded pages go above the new rows
+        self.beginInsertRows(QModelIndex(), first, first + len(tasks) - 1)
+        rows = [[task_id, description, completed] for task_id, description, completed in tasks]
+        self._rows[first:first] = rows
+        self._row_by_id.update((row[0], row) for row in rows)
+        for task_id, description, completed in tasks:
+            self._original[task_id] = (description, completed)
+        self.endInsertRows()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return self._has_more and not parent.isValid()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent) and not self._fetching:
+            self._fetching = True # Until append_tasks delivers the page
+            self.fetch_more_requested.emit()
+
+    # --- Editing ---
+    def add_task(self, description="", completed=False):
+        """Appends an unsaved task and returns its description index."""
+        row = len(self._rows)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.append([None, description, completed])
+        self._new_count += 1
+        self.endInsertRows()
+        return self.index(row, DESCRIPTION_COLUMN)
+
+    def remove_task(self, row):
+        task_id = self._rows[row][0]
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        self.endRemoveRows()
+        if task_id is None:
+            self._new_count -= 1
+        else:
+            del self._row_by_id[task_id]
+            self._dirty.discard(task_id)
+            self._deleted.append(task_id)
+
+    def change_set(self):
+        """TaskChangeSet with the new, edited and removed tasks only."""
+        edited = [row for row in self._rows if row[0] is None or row[0] in self._dirty]
+        original = [(task_id, *self._original[task_id]) for task_id in list(self._dirty) + self._deleted]
+        return TaskChangeSet.from_rows(original, [tuple(row) for row in edited], self._deleted)
+
+    def mark_saved(self, new_task_ids):
+        """Adopts the ids the database gave the new tasks and makes the current values the baseline."""
+        new_ids = iter(new_task_ids)
+        for row in self._rows:
+            if row[0] is None and row[1].strip():
+                row[0] = next(new_ids, None)
+            if row[0] is not None:
+                self._row_by_id[row[0]] = row
+                self._original[row[0]] = (row[1].strip(), row[2])
+        self._dirty.clear()
+        self._deleted = []
+        self._new_count = sum(1 for row in self._rows if row[0] is None)
+
+    def adopt_completion(self, task_id, completed):
+        """Makes completed the saved state of task_id, e.g. once it was written elsewhere.
+
+        Returns the saved state it replaces.
+        """
+        description, previous = self._original[task_id]
+        self._original[task_id] = (description, completed)
+        row = self._row_by_id.get(task_id)
+        if row is None:
+            return previous # Removed in the editor; only its baseline changes
+        if (row[1].strip(), row[2]) != self._original[task_id]:
+            self._dirty.add(task_id)
+        else:
+            self._dirty.discard(task_id)
+        return previous
+
+    def is_modified(self):
+        return bool(self._dirty or self._deleted or self._new_count)
+
+    def task_at(self, row):
+        return tuple(self._rows[row])
+
+    # --- QAbstractTableModel ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == DONE_COLUMN:
+            flags |= Qt.ItemIsUserCheckable
+        elif index.column() == DESCRIPTION_COLUMN:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        task_id, description, completed = self._rows[index.row()]
+        column = index.column()
+        if column == DONE_COLUMN and role == Qt.CheckStateRole:
+            return Qt.Checked if completed else Qt.Unchecked
+        if column == DESCRIPTION_COLUMN:
+            if role in (Qt.DisplayRole, Qt.EditRole):
+                return description
+            if role == Qt.ToolTipRole:
+                return description
+        if column == DELETE_COLUMN and role == Qt.ToolTipRole:
+            return "Delete this task"
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid():
+            return False
+        row = self._rows[index.row()]
+        if index.column() == DONE_COLUMN and role == Qt.CheckStateRole:
+            row[2] = value == Qt.Checked
+        elif index.column() == DESCRIPTION_COLUMN and role == Qt.EditRole:
+            row[1] = value
+        else:
+            return False
+        task_id = row[0]
+        if task_id is not None:
+            if (row[1].strip(), row[2]) != self._original[task_id]:
+                self._dirty.add(task_id)
+            else:
+                self._dirty.discard(task_id) # Edited back to how it was loaded
+        self.dataChanged.emit(index, index, [role])
+        if task_id is not None and index.column() == DONE_COLUMN:
+            self.completion_toggled.emit(task_id, row[2])
+        return True
+
+
+class TaskDelegate(QStyledItemDelegate):
+    """Paints the delete button column and removes the row when it's clicked.
+
+    The description column uses the default editor, which Qt only creates
+    for the cell being edited; every other row is just painted.
+    """
+    def paint(self, painter, option, index):
+        if index.column() != DELETE_COLUMN:
+            super().paint(painter, option, index)
+            return
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = "X"
+        button.state = QStyle.State_Enabled
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if index.column() == DELETE_COLUMN and event.type() == QEvent.MouseButtonRelease \
+                and event.button() == Qt.LeftButton and option.rect.contains(event.pos()):
+            model.remove_task(index.row())
+            return True
+        return super().editorEvent(event, model, option, index)
@@ -1,157 +1,244 @@
 # theme_manager.py
 
+import json
+import os
+import sys
+
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import QSettings
+from PyQt5.QtGui import QColor, QPalette
 
-# Basic Stylesheets (can be expanded significantly)
-LIGHT_STYLE = """
-    /* Default Light Theme - can be customized */
-    QWidget {
-        background-color: #f0f0f0;
-        color: #000000;
-    }
-    QPushButton, QComboBox, QLineEdit, QTextEdit, QListView, QTableWidget, QListWidget, QCheckBox, QRadioButton, QGroupBox {
-        background-color: #ffffff;
-        border: 1px solid #cccccc;
-        padding: 5px;
-    }
-    QPushButton {
-        min-width: 80px;
-    }
-    QPushButton:hover {
-        background-color: #e0e0e0;
-    }
-    QMenuBar, QMenu {
-        background-color: #e8e8e8;
-        color: #000000;
-    }
-    QMenuBar::item:selected, QMenu::item:selected {
-        background-color: #d0d0d0;
-    }
-    QScrollArea {
-         background-color: #ffffff;
-         border: 1px solid #cccccc;
-    }
-    QScrollBar:vertical {
-        border: 1px solid #cccccc;
-        background: #f0f0f0;
-        width: 15px;
-        margin: 0px 0px 0px 0px;
-    }
-    QScrollBar::handle:vertical {
-        background: #c0c0c0;
-        min-height: 20px;
-    }
-    QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
-        height: 0px;
-        background: none;
-    }
-    QProgressBar {
-        border: 1px solid #cccccc;
-        text-align: center;
-        color: black; /* Ensure text is visible */
-        background-color: #ffffff;
-    }
-    QProgressBar::chunk {
-        background-color: #4CAF50; /* Green progress */
-    }
+from instrumentation import get_logger, span
 
-"""
+logger = get_logger("theme")
+
+# A theme is a set of palette colours, the colour of the board's progress
+# bars and, optionally, a small style sheet. Besides the built-in themes,
+# every *.json file in the Themes folder (next to Databases) defines one, e.g.
+#     {"name": "Solarized", "base": "dark",
+#      "colors": {"window": "#002b36", "base": "#073642", "text": "#93a1a1"},
+#      "disabled": {"text": "#586e75"},
+#      "progress": "#859900"}
+# A theme starts from its base (a built-in theme, "light" by default) and
+# overrides single colours; "dark" tells the theme button which way it
+# toggles and is taken from the base unless given. Colours are anything
+# QColor accepts, keys the QPalette roles in snake case.
+#
+# Themes are applied as an application palette, which Qt delivers to every
+# widget as a palette change - they repaint, nothing is rebuilt. A style
+# sheet can't follow palette changes (Qt resolves it when a widget is
+# polished), so one in a theme file makes switching to or from that theme
+# repolish every widget; keep it to what the palette can't express.
+THEMES_DIR = "Themes"
+DEFAULT_THEME = "light"
+
+PALETTE_ROLES = {
+    "window": QPalette.Window,
+    "window_text": QPalette.WindowText,
+    "base": QPalette.Base,
+    "alternate_base": QPalette.AlternateBase,
+    "tooltip_base": QPalette.ToolTipBase,
+    "tooltip_text": QPalette.ToolTipText,
+    "placeholder_text": QPalette.PlaceholderText,
+    "text": QPalette.Text,
+    "button": QPalette.Button,
+    "button_text": QPalette.ButtonText,
+    "bright_text": QPalette.BrightText,
+    "light": QPalette.Light,
+    "midlight": QPalette.Midlight,
+    "mid": QPalette.Mid,
+    "dark": QPalette.Dark,
+    "shadow": QPalette.Shadow,
+    "highlight": QPalette.Highlight,
+    "highlighted_text": QPalette.HighlightedText,
+    "link": QPalette.Link,
+    "link_visited": QPalette.LinkVisited,
+}
+
+BUILTIN_THEMES = {
+    "light": {
+        "dark": False,
+        "colors": {
+            "window": "#f0f0f0", "window_text": "#000000",
+            "base": "#ffffff", "alternate_base": "#f7f7f7", "text": "#000000",
+            "button": "#ffffff", "button_text": "#000000",
+            "tooltip_base": "#ffffdc", "tooltip_text": "#000000",
+            "mid": "#a0a0a0", "highlight": "#308cc6", "highlighted_text": "#ffffff",
+        },
+        "disabled": {"text": "#a0a0a0", "window_text": "#a0a0a0", "button_text": "#a0a0a0"},
+        "progress": "#4CAF50",
+    },
+    "dark": {
+        "dark": True,
+        "colors": {
+            "window": "#2e2e2e", "window_text": "#ffffff",
+            "base": "#3c3c3c", "alternate_base": "#353535", "text": "#ffffff",
+            "button": "#3c3c3c", "button_text": "#ffffff",
+            "tooltip_base": "#4a4a4a", "tooltip_text": "#ffffff",
+            "mid": "#808080", "light": "#555555", "midlight": "#4a4a4a", "dark": "#232323",
+            "highlight": "#3d6fa5", "highlighted_text": "#ffffff",
+            "link": "#8ab4f8", "bright_text": "#ff6b6b",
+        },
+        "disabled": {"text": "#777777", "window_text": "#777777", "button_text": "#777777",
+                     "base": "#303030", "button": "#303030"},
+        "progress": "#5cb85c",
+    },
+}
+
+
+class CompiledTheme:
+    """A theme ready to apply: its QPalette and progress colour are built once."""
+    __slots__ = ("name", "dark", "palette", "progress_color", "stylesheet")
+
+    def __init__(self, name, definition):
+        self.name = name
+        self.dark = definition["dark"]
+        colors = definition["colors"]
+        # Starting from button and window lets Qt derive the shades a theme leaves out
+        self.palette = QPalette(QColor(colors.get("button", "#ffffff")), QColor(colors.get("window", "#f0f0f0")))
+        for role_name, color in colors.items():
+            self.palette.setColor(PALETTE_ROLES[role_name], QColor(color))
+        for role_name, color in definition["disabled"].items():
+            self.palette.setColor(QPalette.Disabled, PALETTE_ROLES[role_name], QColor(color))
+        self.progress_color = QColor(definition["progress"])
+        self.stylesheet = definition["stylesheet"]
+
+
+def _themes_folder():
+    if getattr(sys, 'frozen', False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, THEMES_DIR)
+
+
+def _valid_colors(colors, source):
+    valid = {}
+    if not isinstance(colors, dict):
+        logger.warning("Ignoring colours of %s: expected an object of palette roles", source)
+        return valid
+    for role_name, color in colors.items():
+        if role_name in PALETTE_ROLES and isinstance(color, str) and QColor(color).isValid():
+            valid[role_name] = color
+        else:
+            logger.warning("Ignoring colour %s=%r from %s", role_name, color, source)
+    return valid
+
+
+def _read_theme_file(path):
+    """(name, definition) of a theme file, or (None, None) if it isn't usable."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable theme %s: %s", path, e)
+        return None, None
+    if not isinstance(entry, dict):
+        logger.warning("Ignoring theme %s: expected an object", path)
+        return None, None
+    name = entry.get("name") or os.path.splitext(os.path.basename(path))[0]
+    base = entry.get("base", DEFAULT_THEME)
+    if base not in BUILTIN_THEMES:
+        logger.warning("Theme %s: unknown base %r; using %s", path, base, DEFAULT_THEME)
+        base = DEFAULT_THEME
+    parent = BUILTIN_THEMES[base]
+    definition = {
+        "dark": bool(entry.get("dark", parent["dark"])),
+        "colors": {**parent["colors"], **_valid_colors(entry.get("colors", {}), path)},
+        "disabled": {**parent["disabled"], **_valid_colors(entry.get("disabled", {}), path)},
+        "progress": parent["progress"],
+        "stylesheet": "",
+    }
+    progress = entry.get("progress")
+    if isinstance(progress, str) and QColor(progress).isValid():
+        definition["progress"] = progress
+    elif progress is not None:
+        logger.warning("Ignoring progress colour %r from %s", progress, path)
+    if isinstance(entry.get("stylesheet"), str):
+        definition["stylesheet"] = entry["stylesheet"]
+    return str(name), definition
+
+
+def load_themes(folder=None):
+    """Built-in themes plus those of the theme files in folder, by name."""
+    themes = {name: dict(definition, stylesheet="") for name, definition in BUILTIN_THEMES.items()}
+    folder = folder or _themes_folder()
+    try:
+        files = sorted(entry for entry in os.listdir(folder) if entry.lower().endswith(".json"))
+    except FileNotFoundError:
+        return themes
+    except OSError as e:
+        logger.warning("Could not list themes in %s: %s", folder, e)
+        return themes
+    for file_name in files:
+        name, definition = _read_theme_file(os.path.join(folder, file_name))
+        if name is None:
+            continue
+        if name in themes:
+            logger.info("Theme %s from %s replaces an earlier one", name, file_name)
+        themes[name] = definition
+    return themes
 
-DARK_STYLE = """
-    QWidget {
-        background-color: #2e2e2e;
-        color: #ffffff;
-    }
-    QPushButton, QComboBox, QLineEdit, QTextEdit, QListView, QTableWidget, QListWidget, QCheckBox, QRadioButton, QGroupBox {
-        background-color: #3c3c3c;
-        border: 1px solid #555555;
-        color: #ffffff;
-        padding: 5px;
-    }
-    QPushButton {
-        min-width: 80px;
-    }
-    QPushButton:hover {
-        background-color: #4a4a4a;
-    }
-    QPushButton:disabled {
-        background-color: #303030;
-        color: #777777;
-        border: 1px solid #444444;
-    }
-    QLineEdit:disabled, QTextEdit:disabled {
-         background-color: #303030;
-         color: #777777;
-    }
-    QMenuBar, QMenu {
-        background-color: #3c3c3c;
-        color: #ffffff;
-        border-bottom: 1px solid #555555;
-    }
-    QMenuBar::item:selected, QMenu::item:selected {
-        background-color: #4a4a4a;
-    }
-    QScrollArea {
-         background-color: #3c3c3c;
-         border: 1px solid #555555;
-    }
-    QScrollBar:vertical {
-        border: 1px solid #555555;
-        background: #2e2e2e;
-        width: 15px;
-        margin: 0px 0px 0px 0px;
-    }
-    QScrollBar::handle:vertical {
-        background: #505050;
-        min-height: 20px;
-    }
-    QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
-        height: 0px;
-        background: none;
-    }
-    QProgressBar {
-        border: 1px solid #555555;
-        text-align: center;
-        color: white; /* Ensure text is visible */
-        background-color: #3c3c3c;
-    }
-    QProgressBar::chunk {
-        background-color: #5cb85c; /* Brighter Green progress */
-    }
-    QToolTip { /* Style tooltips */
-        background-color: #4a4a4a;
-        color: #ffffff;
-        border: 1px solid #555555;
-    }
-    QDialog { /* Ensure dialogs also get themed */
-        background-color: #2e2e2e;
-    }
-    QLabel#NoImageLabel { /* Style the specific "No Image" label */
-        color: #aaaaaa;
-        font-style: italic;
-    }
-"""
 
 class ThemeManager:
-    def __init__(self):
+    """Applies themes to the application and remembers the chosen one.
+
+    Each theme is compiled the first time it's used and kept, so switching
+    back and forth only hands Qt a ready palette. toggle_theme() switches
+    between the last light and the last dark theme used.
+    """
+    def __init__(self, themes_folder=None):
         self.settings = QSettings("YourOrgName", "ActivityTracker") # Use QSettings to save theme
-        self.current_theme = self.settings.value("theme", "light", type=str)
+        self.themes = load_themes(themes_folder)
+        self._compiled = {}
+        self.current_theme = self.settings.value("theme", DEFAULT_THEME, type=str)
+        if self.current_theme not in self.themes:
+            self.current_theme = DEFAULT_THEME
 
-    def apply_theme(self, app: QApplication):
-        if self.current_theme == "dark":
-            app.setStyleSheet(DARK_STYLE)
-        else:
-            app.setStyleSheet(LIGHT_STYLE)
+    def available_themes(self):
+        return sorted(self.themes, key=lambda name: (name not in BUILTIN_THEMES, name.lower()))
+
+    def compiled(self, name=None):
+        name = name or self.current_theme
+        theme = self._compiled.get(name)
+        if theme is None:
+            theme = self._compiled[name] = CompiledTheme(name, self.themes[name])
+        return theme
+
+    def apply_theme(self, app: QApplication, name=None):
+        """Makes the theme (the current one by default) the application's; returns it compiled."""
+        theme = self.compiled(name)
+        with span("theme.apply"):
+            if app.style().objectName().lower() != "fusion":
+                # Platform styles draw some controls in system colours; Fusion uses the palette throughout
+                app.setStyle("Fusion")
+            app.setPalette(theme.palette)
+            if theme.stylesheet or app.styleSheet():
+                # Set after the palette: the repolish it triggers resolves the style sheet against it
+                app.setStyleSheet(theme.stylesheet)
+        return theme
+
+    def set_theme(self, app: QApplication, name):
+        if name not in self.themes:
+            logger.warning("Unknown theme %r", name)
+            return self.compiled()
+        self.current_theme = name
+        self.settings.setValue("theme", name)
+        self.settings.setValue("theme/last_dark" if self.themes[name]["dark"] else "theme/last_light", name)
+        return self.apply_theme(app)
 
     def toggle_theme(self, app: QApplication):
-        if self.current_theme == "light":
-            self.current_theme = "dark"
+        if self.themes[self.current_theme]["dark"]:
+            target = self.settings.value("theme/last_light", "light", type=str)
         else:
-            self.current_theme = "light"
-        self.settings.setValue("theme", self.current_theme)
-        self.apply_theme(app)
+            target = self.settings.value("theme/last_dark", "dark", type=str)
+        if target not in self.themes or self.themes[target]["dark"] == self.themes[self.current_theme]["dark"]:
+            target = "light" if self.themes[self.current_theme]["dark"] else "dark"
+        self.set_theme(app, target)
         return self.current_theme
 
     def get_current_theme(self):
-        return self.current_theme
\ No newline at end of file
+        return self.current_theme
+
+    def is_dark(self):
+        return self.themes[self.current_theme]["dark"]
@@ -0,0 +1,294 @@
+# tracker_cli.py
+#
+# Command-line access to the tracker database for scripts, shell loops and
+# git hooks. Built on DatabaseManager alone: nothing here (or in what it
+# imports) may pull in PyQt5 or theme_manager, which would cost more start-up
+# time than the command itself.
+#
+#   python tracker_cli.py list --search infra --sort completion
+#   python tracker_cli.py add "Website" --category Work --task "Draft copy"
+#   python tracker_cli.py add-task Website "Publish"
+#   python tracker_cli.py done Website Publish
+#   git log --format=%s -5 | python tracker_cli.py import-tasks Website
+#   python tracker_cli.py import projects.csv --on-duplicate merge
+#   python tracker_cli.py export backup.zip
+
+import argparse
+import json
+import os
+import sys
+
+from connection_profiles import PROFILES
+from database_manager import DatabaseManager, TaskChangeSet, PAGE_SIZE, DUPLICATE_POLICIES, DUPLICATE_SKIP
+from import_options import DEFAULT_BATCH_SIZE, FORMATS
+from instrumentation import configure_logging
+
+SORTS = ("name", "category", "completion", "modified", "created", "tasks", "relevance")
+
+
+def _resolve_activity(db, reference):
+    # An activity given as its id or its name; (activity_id, error)
+    if reference.isdigit() and db.get_activities("", "name", None, int(reference)):
+        return int(reference), None
+    activity_id = db.get_activity_id(reference)
+    if activity_id is None:
+        return None, f"No activity named or numbered '{reference}'."
+    return activity_id, None
+
+
+def _resolve_tasks(tasks, references):
+    # Tasks given as ids or as text matching exactly one description; (tasks, error)
+    by_id = {task_id: (task_id, description, completed) for task_id, description, completed in tasks}
+    found = []
+    for reference in references:
+        if reference.isdigit() and int(reference) in by_id:
+            found.append(by_id[int(reference)])
+            continue
+        text = reference.casefold()
+        exact = [task for task in tasks if task[1].casefold() == text]
+        matches = exact or [task for task in tasks if text in task[1].casefold()]
+        if len(matches) != 1:
+            problem = "matches no task" if not matches else f"matches {len(matches)} tasks"
+            return None, f"'{reference}' {problem}; use the task id (see the tasks command)."
+        found.append(matches[0])
+    return found, None
+
+
+def _print_activities(rows, as_json):
+    if as_json:
+        json.dump([{"id": row.id, "name": row.name, "category": row.category,
+                    "completion": round(row.completion_percent, 1), "tasks": row.task_count,
+                    "done": row.done_count, "modified": row.modified_at} for row in rows],
+                  sys.stdout, indent=2)
+        print()
+        return
+    for row in rows:
+        category = f"  [{row.category}]" if row.category else ""
+        print(f"{row.id:>6}  {row.completion_percent:5.1f}%  {row.done_count:>4}/{row.task_count:<4}  "
+              f"{row.name}{category}")
+
+
+def cmd_list(db, args):
+    term = args.search or ""
+    sort_by = args.sort or ("relevance" if term else "name")
+    limit = args.limit if args.limit is not None else float("inf")
+    rows, after = [], None
+    # Page through instead of loading everything when only the first few are wanted
+    while len(rows) < limit:
+        page, after = db.get_activities_page(term, sort_by, None, after, min(PAGE_SIZE, limit - len(rows)))
+        rows.extend(page)
+        if after is None:
+            break
+    _print_activities(rows, args.json)
+    return 0
+
+
+def cmd_search(db, args):
+    args.search = args.term
+    return cmd_list(db, args)
+
+
+def cmd_tasks(db, args):
+    activity_id, error = _resolve_activity(db, args.activity)
+    if error:
+        return _fail(error)
+    tasks = db.get_tasks(activity_id)
+    if args.json:
+        json.dump([{"id": task_id, "description": description, "completed": completed}
+                   for task_id, description, completed in tasks], sys.stdout, indent=2)
+        print()
+        return 0
+    for task_id, description, completed in tasks:
+        print(f"{task_id:>6}  [{'x' if completed else ' '}]  {description}")
+    return 0
+
+
+def cmd_add(db, args):
+    activity_id, error = db.create_activity(args.name, args.category, args.task or [])
+    if error:
+        return _fail(error)
+    print(activity_id)
+    return 0
+
+
+def cmd_add_task(db, args):
+    activity_id, error = _resolve_activity(db, args.activity)
+    if error:
+        return _fail(error)
+    changes = TaskChangeSet(inserts=[(description.strip(), False) for description in args.description
+                                     if description.strip()])
+    task_ids, error = db.apply_task_changes(activity_id, changes)
+    if error:
+        return _fail(error)
+    for task_id in task_ids:
+        print(task_id)
+    return 0
+
+
+def cmd_done(db, args):
+    activity_id, error = _resolve_activity(db, args.activity)
+    if error:
+        return _fail(error)
+    tasks, error = _resolve_tasks(db.get_tasks(activity_id), args.task)
+    if error:
+        return _fail(error)
+    completed = not args.undo
+    changes = TaskChangeSet(updates=[(task_id, description, completed) for task_id, description, _ in tasks])
+    _, error = db.apply_task_changes(activity_id, changes)
+    if error:
+        return _fail(error)
+    print(f"{db.get_activity_completion(activity_id):.1f}%")
+    return 0
+
+
+def cmd_import_tasks(db, args):
+    # One task per non-empty stdin line, all in one transaction
+    activity_id, error = _resolve_activity(db, args.activity)
+    if error:
+        return _fail(error)
+    inserts = [(line.strip(), args.done) for line in sys.stdin if line.strip()]
+    task_ids, error = db.apply_task_changes(activity_id, TaskChangeSet(inserts=inserts))
+    if error:
+        return _fail(error)
+    print(f"Added {len(task_ids)} tasks.", file=sys.stderr)
+    return 0
+
+
+def cmd_import(db, args):
+    from bulk_import import import_records, read_records
+    file_format = args.format or ("jsonl" if args.file.endswith((".jsonl", ".json")) else "csv")
+    on_terminal = sys.stderr.isatty()
+    show_progress = args.progress or on_terminal
+
+    def report(stats):
+        # Rewrites one line on a terminal, a line per batch in a log
+        print(f"{stats.records:,} activities, {stats.tasks:,} tasks, {stats.tasks_per_second:,.0f} tasks/s",
+              end="\r" if on_terminal else "\n", file=sys.stderr, flush=True)
+
+    if args.file == "-":
+        source, image_dir = sys.stdin, os.getcwd()
+    else:
+        try:
+            source = open(args.file, newline="", encoding="utf-8-sig")
+        except OSError as e:
+            return _fail(f"Could not open {args.file}: {e}")
+        image_dir = os.path.dirname(os.path.abspath(args.file))
+    try:
+        records = read_records(source, file_format, args.batch_size)
+        stats, error = import_records(db, records, args.batch_size, args.on_duplicate, image_dir,
+                                      report if show_progress else None)
+    except ValueError as e:
+        error, stats = str(e), None
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    if show_progress and on_terminal:
+        print(file=sys.stderr)
+    if stats:
+        print(stats.summary(), file=sys.stderr)
+    return _fail(error) if error else 0
+
+
+def cmd_export(db, args):
+    from tracker_export import export_to_directory, export_to_zip
+    on_terminal = sys.stderr.isatty()
+
+    def report(stats):
+        print(f"{stats.activities:,} activities, {stats.tasks:,} tasks, {stats.images:,} images",
+              end="\r" if on_terminal else "\n", file=sys.stderr, flush=True)
+
+    export = export_to_zip if args.destination.lower().endswith(".zip") else export_to_directory
+    stats, error = export(db, args.destination, report if args.progress or on_terminal else None)
+    if on_terminal:
+        print(file=sys.stderr)
+    if error:
+        return _fail(error)
+    print(stats.summary(), file=sys.stderr)
+    return 0
+
+
+def _fail(message):
+    print(f"error: {message}", file=sys.stderr)
+    return 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="tracker_cli.py", description="Project Tracker from the command line.")
+    parser.add_argument("--db", default="activities.db",
+                        help="Database file; relative names are looked up in the Databases folder (default: %(default)s)")
+    parser.add_argument("--profile", choices=sorted(PROFILES),
+                        help="Connection profile (default: from connection_profiles.json, else local)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="List activities with their completion")
+    list_parser.add_argument("--search", help="Only activities matching this text")
+    list_parser.add_argument("--sort", choices=SORTS, help="Order (default: name, or relevance with --search)")
+    list_parser.add_argument("--limit", type=int, help="Show at most this many")
+    list_parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    list_parser.set_defaults(handler=cmd_list)
+
+    search_parser = commands.add_parser("search", help="Shorthand for list --search TERM")
+    search_parser.add_argument("term")
+    search_parser.add_argument("--sort", choices=SORTS)
+    search_parser.add_argument("--limit", type=int)
+    search_parser.add_argument("--json", action="store_true")
+    search_parser.set_defaults(handler=cmd_search)
+
+    tasks_parser = commands.add_parser("tasks", help="List an activity's tasks with their ids")
+    tasks_parser.add_argument("activity", help="Activity id or name")
+    tasks_parser.add_argument("--json", action="store_true")
+    tasks_parser.set_defaults(handler=cmd_tasks)
+
+    add_parser = commands.add_parser("add", help="Create an activity; prints its id")
+    add_parser.add_argument("name")
+    add_parser.add_argument("--category")
+    add_parser.add_argument("--task", action="append", help="A task to start with (repeatable)")
+    add_parser.set_defaults(handler=cmd_add)
+
+    add_task_parser = commands.add_parser("add-task", help="Add tasks to an activity; prints their ids")
+    add_task_parser.add_argument("activity", help="Activity id or name")
+    add_task_parser.add_argument("description", nargs="+")
+    add_task_parser.set_defaults(handler=cmd_add_task)
+
+    done_parser = commands.add_parser("done", help="Tick tasks off; prints the new completion")
+    done_parser.add_argument("activity", help="Activity id or name")
+    done_parser.add_argument("task", nargs="+", help="Task id, or text matching one task")
+    done_parser.add_argument("--undo", action="store_true", help="Mark the tasks not done instead")
+    done_parser.set_defaults(handler=cmd_done)
+
+    bulk_parser = commands.add_parser("import", help="Bulk import activities and tasks from CSV or JSON lines")
+    bulk_parser.add_argument("file", help="Input file, or - for stdin; image paths are relative to its folder")
+    bulk_parser.add_argument("--format", choices=FORMATS, help="Default: from the file extension, else csv")
+    bulk_parser.add_argument("--on-duplicate", choices=DUPLICATE_POLICIES, default=DUPLICATE_SKIP,
+                             help="When an activity name already exists (default: %(default)s)")
+    bulk_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                             help="Tasks per transaction (default: %(default)s)")
+    bulk_parser.add_argument("--progress", action="store_true", help="Report progress even when not on a terminal")
+    bulk_parser.set_defaults(handler=cmd_import)
+
+    export_parser = commands.add_parser("export", help="Export everything as JSON lines plus images")
+    export_parser.add_argument("destination", help="A .zip file, or a folder to write activities.jsonl and images/ into")
+    export_parser.add_argument("--progress", action="store_true", help="Report progress even when not on a terminal")
+    export_parser.set_defaults(handler=cmd_export)
+
+    import_parser = commands.add_parser("import-tasks", help="Add one task per line read from stdin")
+    import_parser.add_argument("activity", help="Activity id or name")
+    import_parser.add_argument("--done", action="store_true", help="Import the tasks as already done")
+    import_parser.set_defaults(handler=cmd_import_tasks)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    configure_logging() # Warnings to stderr; PROJECTTRACKER_LOG=debug for more
+    db = DatabaseManager(args.db, args.profile)
+    if not db.conn:
+        return _fail("Could not open the database.")
+    try:
+        return args.handler(db, args)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
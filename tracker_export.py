@@ -0,0 +1,138 @@
+# tracker_export.py
+#
+# Streams the whole tracker out as JSON lines plus image files, either into a
+# folder or into a zip file. Activities are read a page at a time, tasks a
+# page at a time and images in BLOB chunks, so peak memory doesn't depend on
+# the size of the database or of any image. The JSON lines use the format
+# bulk_import reads, so an export (unzipped) can be imported again.
+# Qt-free: used by tracker_cli.py.
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+
+from database_manager import BLOB_CHUNK_SIZE
+from instrumentation import get_logger
+
+logger = get_logger("export")
+
+ACTIVITIES_FILE = "activities.jsonl"
+IMAGES_DIR = "images"
+# Leading bytes of the image formats the app accepts
+_IMAGE_SIGNATURES = ((b"\x89PNG", ".png"), (b"\xff\xd8", ".jpg"), (b"GIF8", ".gif"), (b"BM", ".bmp"))
+
+
+class ExportStats:
+    __slots__ = ("activities", "tasks", "images", "image_bytes", "started")
+
+    def __init__(self):
+        self.activities = self.tasks = self.images = self.image_bytes = 0
+        self.started = time.perf_counter()
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return (f"{self.activities:,} activities, {self.tasks:,} tasks, {self.images:,} images "
+                f"({self.image_bytes / 1e6:,.1f} MB) in {elapsed:.1f} s")
+
+
+def _image_extension(first_chunk):
+    for signature, extension in _IMAGE_SIGNATURES:
+        if first_chunk.startswith(signature):
+            return extension
+    return ".bin"
+
+
+def _write_image(db, activity_id, open_output):
+    # Streams one image to open_output(relative_path) and returns (path, bytes), or (None, 0)
+    chunks = db.iter_image_chunks(activity_id)
+    first = next(chunks, None)
+    if first is None:
+        return None, 0
+    path = f"{IMAGES_DIR}/{activity_id}{_image_extension(first)}"
+    size = len(first)
+    with open_output(path) as out:
+        out.write(first)
+        for chunk in chunks:
+            out.write(chunk)
+            size += len(chunk)
+    return path, size
+
+
+def _write_activity(db, activity, image_path, out, stats):
+    # One JSON line, written piecewise so an activity's tasks are never all in memory
+    header = {"name": activity['name'], "category": activity['category'], "image": image_path,
+              "id": activity['id'], "created_at": activity['created_at'], "modified_at": activity['modified_at']}
+    out.write(json.dumps(header)[:-1] + ', "tasks": [')
+    after_id, first = None, True
+    while True:
+        tasks, after_id = db.get_tasks_page(activity['id'], after_id)
+        for _, description, completed in tasks:
+            out.write(("" if first else ", ") + json.dumps({"description": description, "completed": completed}))
+            first = False
+        stats.tasks += len(tasks)
+        if after_id is None:
+            break
+    out.write("]}\n")
+
+
+def _export(db, write_lines, open_image, progress):
+    stats = ExportStats()
+    after_id = None
+    while True:
+        activities, after_id = db.get_export_page(after_id)
+        for activity in activities:
+            image_path = None
+            if activity['image_size']:
+                image_path, size = _write_image(db, activity['id'], open_image)
+                if image_path:
+                    stats.images += 1
+                    stats.image_bytes += size
+            _write_activity(db, activity, image_path, write_lines, stats)
+            stats.activities += 1
+        if progress:
+            progress(stats)
+        if after_id is None:
+            return stats
+
+
+def export_to_directory(db, directory, progress=None):
+    """Writes activities.jsonl and images/ into directory; returns (stats, error)."""
+    try:
+        os.makedirs(os.path.join(directory, IMAGES_DIR), exist_ok=True)
+        with open(os.path.join(directory, ACTIVITIES_FILE), "w", encoding="utf-8") as lines:
+            stats = _export(db, lines, lambda path: open(os.path.join(directory, path), "wb"), progress)
+    except OSError as e:
+        logger.error("Export to %s failed: %s", directory, e)
+        return None, f"Export failed: {e}"
+    return stats, None
+
+
+def export_to_zip(db, zip_path, progress=None):
+    """Writes the same layout into a zip file; returns (stats, error).
+
+    A zip entry must be written in one go, so the JSON lines go to a spooled
+    temporary file (in memory while small) while the images are streamed
+    into their entries, and are copied into the archive at the end.
+    """
+    try:
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive, \
+                tempfile.SpooledTemporaryFile(max_size=BLOB_CHUNK_SIZE * 4, mode="w+", encoding="utf-8") as lines:
+            # Images are stored as is: PNG and JPEG are already compressed
+            stats = _export(db, lines,
+                            lambda path: archive.open(zipfile.ZipInfo(path, time.localtime()[:6]), "w", force_zip64=True),
+                            progress)
+            lines.seek(0)
+            info = zipfile.ZipInfo(ACTIVITIES_FILE, time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, "w", force_zip64=True) as entry, \
+                    io.TextIOWrapper(entry, encoding="utf-8") as out:
+                shutil.copyfileobj(lines, out, BLOB_CHUNK_SIZE)
+    except (OSError, zipfile.BadZipFile) as e:
+        logger.error("Export to %s failed: %s", zip_path, e)
+        return None, f"Export failed: {e}"
+    return stats, None
+
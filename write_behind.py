@@ -0,0 +1,83 @@
+# write_behind.py
+
+import functools
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from database_manager import DatabaseManager, TASK_WRITE_FIELDS
+from instrumentation import get_logger
+
+logger = get_logger("write_behind")
+
+FLUSH_DELAY_MS = 400 # Longest a write waits in memory before it is sent to the worker
+
+
+class WriteBehindQueue(QObject):
+    """Collects small edits in memory and writes them in one transaction.
+
+    update_task() records field values per task; a later write to the
+    same task overrides the earlier one's fields (last value wins), so
+    ticking twenty boxes, or one box twenty times, becomes one
+    apply_coalesced_writes request instead of a commit per click.
+
+    Writes are flushed FLUSH_DELAY_MS after the first one since the last
+    flush - the timer isn't restarted by later writes, so steady clicking
+    can't postpone them indefinitely - or at once by flush(), which dialogs
+    call when they close and the main window calls before shutting the
+    worker down. The worker runs requests in submission order, so anything
+    submitted after a flush sees its writes, and closing the worker drains
+    the queue, so a clean shutdown loses nothing.
+
+    pending_changed(count) reports the rows not yet committed (waiting here
+    or in flight) for an indicator; write_failed(message) reports a flush
+    the database rejected, whose writes are dropped.
+    """
+    pending_changed = pyqtSignal(int)
+    write_failed = pyqtSignal(str)
+
+    def __init__(self, db_manager, parent=None, delay_ms=FLUSH_DELAY_MS):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self._tasks = {} # task_id -> (activity_id, {field: value})
+        self._in_flight = 0 # Rows of flushes the worker hasn't answered yet
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self.flush)
+
+    def pending_count(self):
+        return len(self._tasks) + self._in_flight
+
+    def update_task(self, activity_id, task_id, **fields):
+        """Queues new values for some of a task's TASK_WRITE_FIELDS."""
+        unknown = set(fields) - set(TASK_WRITE_FIELDS)
+        if unknown:
+            raise ValueError(f"Not a task field: {', '.join(sorted(unknown))}")
+        self._tasks.setdefault(task_id, (activity_id, {}))[1].update(fields)
+        self._queued()
+
+    def _queued(self):
+        if not self._timer.isActive():
+            self._timer.start()
+        self.pending_changed.emit(self.pending_count())
+
+    def flush(self):
+        """Sends everything pending to the worker as one request."""
+        self._timer.stop()
+        if not self._tasks:
+            return
+        tasks, self._tasks = self._tasks, {}
+        count = len(tasks)
+        self._in_flight += count
+        logger.debug("Flushing %s task writes", count)
+        # A request that raises reports to on_error instead, so the count always comes down
+        self.db_manager.submit(DatabaseManager.apply_coalesced_writes, tasks,
+                               callback=functools.partial(self._flushed, count),
+                               on_error=functools.partial(self._flushed, count))
+
+    def _flushed(self, count, error):
+        self._in_flight -= count
+        if error:
+            logger.error("Write-behind flush failed: %s", error)
+            self.write_failed.emit(error)
+        self.pending_changed.emit(self.pending_count())